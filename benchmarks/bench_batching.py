@@ -0,0 +1,87 @@
+"""
+Measures the DLIS server's request batching with a simulated vectorized model.
+
+A predict call costs a fixed overhead, like a framework call on one input.
+A predict_batch call costs the same overhead plus a small cost per input.
+Concurrent clients go through the template's Batcher, as the HTTP server
+does when OML_MAX_BATCH_SIZE is set.
+
+    python benchmarks/bench_batching.py [--clients 32] [--requests 20] [--overhead-ms 5]
+"""
+import argparse
+import os
+import threading
+import time
+
+from importlib.util import spec_from_file_location, module_from_spec
+
+SERVING_PATH = os.path.join(
+    os.path.dirname(__file__), '..', 'oml', 'templates', 'platforms', 'common', 'python', 'code', 'serving.py')
+BATCH_SIZES = [1, 8, 32]
+
+
+class VectorizedModel:
+
+    def __init__(self, overhead, per_item):
+        self.overhead = overhead
+        self.per_item = per_item
+        self.lock = threading.Lock()
+
+    def predict(self, data):
+        return self.predict_batch([data])[0]
+
+    def predict_batch(self, batch):
+        # One model instance runs one call at a time, like a single GPU/BLAS stream
+        with self.lock:
+            time.sleep(self.overhead + self.per_item * len(batch))
+        return [data for data in batch]
+
+
+def run(predict, clients, requests):
+    latencies = []
+
+    def client():
+        for _ in range(requests):
+            start = time.perf_counter()
+            predict('query')
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=20, help='Requests per client.')
+    parser.add_argument('--overhead-ms', type=float, default=5)
+    parser.add_argument('--per-item-ms', type=float, default=0.1)
+    parser.add_argument('--max-wait-ms', type=float, default=2)
+    args = parser.parse_args()
+
+    spec = spec_from_file_location('serving', SERVING_PATH)
+    serving = module_from_spec(spec)
+    spec.loader.exec_module(serving)
+    model = VectorizedModel(args.overhead_ms / 1000, args.per_item_ms / 1000)
+
+    print('{:>10}{:>10}{:>10}{:>10}{:>12}'.format('batch', 'req/s', 'p50 ms', 'p99 ms', 'avg batch'))
+    for size in BATCH_SIZES:
+        if size == 1:
+            qps, p50, p99 = run(model.predict, args.clients, args.requests)
+            average = 1
+        else:
+            batcher = serving.Batcher(model, size, args.max_wait_ms)
+            qps, p50, p99 = run(lambda data: batcher.submit(data).result(), args.clients, args.requests)
+            average = batcher.predictions / batcher.batches
+        print('{:>10}{:>10.0f}{:>10.1f}{:>10.1f}{:>12.1f}'.format(size, qps, p50, p99, average))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Times the model catalog queries behind the CLI hooks, before and after the
+indexes of sql/migrations/001_add_catalog_indexes.sql.
+
+SQLite stands in for MySQL: the catalog tables are recreated in memory,
+loaded with synthetic rows and each access pattern is timed on its own.
+The index statements are read from the migration script itself.
+
+    python benchmarks/bench_catalog_queries.py [--models 1000] [--artifacts 20] [--deployments 10]
+"""
+import argparse
+import os
+import random
+import re
+import sqlite3
+import statistics
+import time
+
+MIGRATION_PATH = os.path.join(os.path.dirname(__file__), '..', 'sql', 'migrations', '001_add_catalog_indexes.sql')
+JOB_TYPES = ('test', 'deploy', 'scale')
+STATUSES = ('running', 'succeeded', 'failed')
+
+SCHEMA = '''
+CREATE TABLE models (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(120) NOT NULL,
+    owner VARCHAR(50) NOT NULL,
+    language VARCHAR(20) NOT NULL
+);
+CREATE TABLE artifacts (
+    id INTEGER PRIMARY KEY,
+    model_id INT REFERENCES models(id),
+    version VARCHAR(20) NOT NULL,
+    platform VARCHAR(25) NOT NULL,
+    is_compliant BOOLEAN DEFAULT 0
+);
+CREATE TABLE deployments (
+    id INTEGER PRIMARY KEY,
+    artifact_id BIGINT REFERENCES artifacts(id),
+    job_id VARCHAR(80) NOT NULL,
+    job_type VARCHAR(25) NOT NULL,
+    status VARCHAR(20) NOT NULL
+);
+'''
+
+# Access pattern -> (query, function returning its parameters)
+QUERIES = {
+    'model by name': (
+        'SELECT * FROM models WHERE name = ?',
+        lambda s: ('model-{}'.format(random.randrange(s.models)),)),
+    'artifacts page': (
+        'SELECT * FROM artifacts WHERE model_id = ? ORDER BY id LIMIT 100',
+        lambda s: (random.randrange(s.models) + 1,)),
+    'compliant artifacts': (
+        'SELECT * FROM artifacts WHERE model_id = ? AND is_compliant = 1 ORDER BY id LIMIT 100',
+        lambda s: (random.randrange(s.models) + 1,)),
+    'artifact by version': (
+        'SELECT * FROM artifacts WHERE model_id = ? AND is_compliant = 1 AND version = ?',
+        lambda s: (random.randrange(s.models) + 1, '1.0.{}'.format(random.randrange(s.artifacts)))),
+    'artifact jobs': (
+        'SELECT * FROM deployments WHERE artifact_id = ? AND job_type = ?',
+        lambda s: (random.randrange(s.models * s.artifacts) + 1, random.choice(JOB_TYPES))),
+    'job status update': (
+        'UPDATE deployments SET status = ? WHERE job_id = ?',
+        lambda s: (random.choice(STATUSES), 'job-{}'.format(random.randrange(s.models * s.artifacts * s.deployments)))),
+}
+
+
+def read_indexes(path=MIGRATION_PATH):
+    """Returns the migration's CREATE INDEX statements without the database qualifier."""
+    with open(path) as f:
+        statements = [line.strip() for line in f if line.startswith('CREATE')]
+    return [re.sub(r'`model_catalog`\.`(\w+)`', r'\1', statement) for statement in statements]
+
+
+def load(db, args):
+    db.executescript(SCHEMA)
+    db.executemany(
+        'INSERT INTO models (id, name, owner, language) VALUES (?, ?, ?, ?)',
+        ((i + 1, 'model-{}'.format(i), 'owner', 'python') for i in range(args.models)))
+    db.executemany(
+        'INSERT INTO artifacts (id, model_id, version, platform, is_compliant) VALUES (?, ?, ?, ?, ?)',
+        ((i + 1, i // args.artifacts + 1, '1.0.{}'.format(i % args.artifacts), 'dlis', i % 2)
+         for i in range(args.models * args.artifacts)))
+    db.executemany(
+        'INSERT INTO deployments (artifact_id, job_id, job_type, status) VALUES (?, ?, ?, ?)',
+        ((i // args.deployments + 1, 'job-{}'.format(i), JOB_TYPES[i % len(JOB_TYPES)], STATUSES[i % len(STATUSES)])
+         for i in range(args.models * args.artifacts * args.deployments)))
+    db.commit()
+
+
+def time_query(db, query, params, runs):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        db.execute(query, params()).fetchall()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def uses_index(db, query, params):
+    plan = db.execute('EXPLAIN QUERY PLAN ' + query, params()).fetchall()
+    return any('USING' in row[-1] and 'INDEX' in row[-1] for row in plan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--models', type=int, default=1000)
+    parser.add_argument('--artifacts', type=int, default=20, help='Artifacts per model.')
+    parser.add_argument('--deployments', type=int, default=10, help='Deployment jobs per artifact.')
+    parser.add_argument('--runs', type=int, default=50, help='Runs per query.')
+    args = parser.parse_args()
+
+    db = sqlite3.connect(':memory:')
+    load(db, args)
+    print('{} models, {} artifacts, {} deployments\n'.format(
+        args.models, args.models * args.artifacts, args.models * args.artifacts * args.deployments))
+
+    before = {name: time_query(db, query, lambda: params(args), args.runs) for name, (query, params) in QUERIES.items()}
+    for statement in read_indexes():
+        db.execute(statement)
+    db.execute('ANALYZE')
+    after = {name: time_query(db, query, lambda: params(args), args.runs) for name, (query, params) in QUERIES.items()}
+
+    print('{:<22}{:>14}{:>14}{:>8}'.format('query', 'no index ms', 'indexed ms', 'index'))
+    for name, (query, params) in QUERIES.items():
+        print('{:<22}{:>14.3f}{:>14.3f}{:>8}'.format(
+            name, before[name], after[name], 'yes' if uses_index(db, query, lambda: params(args)) else 'no'))
+
+
+if __name__ == '__main__':
+    main()
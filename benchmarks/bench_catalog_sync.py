@@ -0,0 +1,134 @@
+"""
+Compares catalog status syncing after `oml dlis list` against a stub API.
+
+The stub catalog holds --catalog-jobs jobs, many more than are listed, and
+the listed model's jobs are spread over --artifacts artifacts. The old path
+sends one PUT per listed job. Fetching every known status to send only the
+changed ones costs as much as the catalog is large. The new path fetches
+the statuses of the listed model's artifacts only and sends the changed
+ones in a single bulk request, or one PUT each when the API has no bulk
+endpoint.
+
+    python benchmarks/bench_catalog_sync.py [--changed 0.1] [--latency 2] [--catalog-jobs 50000] [--artifacts 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from stubs import StubServer  # noqa: E402
+from oml.hooks.catalog import ModelCatalogHook  # noqa: E402
+from oml.settings import Settings  # noqa: E402
+
+JOB_COUNTS = [10, 100, 1000]
+API_PATH = '/api/v1/deployments'
+MODEL_NAME = 'bench'
+
+
+def make_routes(known, artifact_jobs, artifacts):
+    def get_models(query, body):
+        return 200, [{'id': '1', 'name': MODEL_NAME}]
+
+    def get_artifacts(query, body):
+        offset, limit = int(query['offset'][0]), int(query['limit'][0])
+        return 200, [{'id': str(i)} for i in range(artifacts)][offset:offset + limit]
+
+    def get_artifact_jobs(artifact_id):
+        def route(query, body):
+            return 200, [{'job_id': job_id, 'status': known[job_id]} for job_id in artifact_jobs.get(artifact_id, [])]
+        return route
+
+    def get_jobs(query, body):
+        return 200, [{'job_id': job_id, 'status': status} for job_id, status in known.items()]
+
+    def put_job(query, body):
+        known[query['job_id'][0]] = body['status']
+        return 200, {}
+
+    def put_bulk(query, body):
+        for update in body:
+            known[update['job_id']] = update['status']
+        return 200, [{} for _ in body]
+
+    routes = {
+        ('GET', '/api/v1/models'): get_models,
+        ('GET', '/api/v1/models/1/artifacts'): get_artifacts,
+        ('GET', API_PATH): get_jobs,
+        ('PUT', API_PATH): put_job,
+        ('PUT', API_PATH + '/bulk'): put_bulk,
+    }
+    for i in range(artifacts):
+        routes[('GET', '/api/v1/artifacts/{}/deployments'.format(i))] = get_artifact_jobs(str(i))
+    return routes
+
+
+def run(server, known, catalog_jobs, sync):
+    known.clear()
+    known.update({str(i): 'running' for i in range(catalog_jobs)})
+    server.reset()
+    # Every `oml dlis list` is a new process, which looks the model id up again
+    ModelCatalogHook._model_ids.clear()
+    start = time.perf_counter()
+    sync()
+    return server.total_requests, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--changed', type=float, default=0.1, help='Fraction of jobs whose status changed.')
+    parser.add_argument('--latency', type=float, default=2, help='Stub latency per request, in ms.')
+    parser.add_argument('--catalog-jobs', type=int, default=50000, help='Jobs known by the stub catalog.')
+    parser.add_argument('--artifacts', type=int, default=5, help='Artifacts of the listed model.')
+    args = parser.parse_args()
+
+    known, artifact_jobs = {}, {}
+    routes = make_routes(known, artifact_jobs, args.artifacts)
+    server = StubServer(routes, args.latency / 1000).start()
+    # The missing bulk endpoint is remembered in a throwaway user metadata file
+    metadata_path = os.path.join(tempfile.mkdtemp(), 'metadata.yml')
+    with mock.patch('oml.util.auth.get_token', return_value={'accessToken': '1111'}), \
+            mock.patch.object(Settings, 'api_endpoint', server.url), \
+            mock.patch('oml.settings.METADATA_FILE_PATH', metadata_path):
+        catalog = ModelCatalogHook()
+        no_bulk_catalog = ModelCatalogHook()
+
+        print('{} jobs in the catalog, {} artifacts for the listed model'.format(args.catalog_jobs, args.artifacts))
+        print('{:>6}{:>14}{:>12}{:>16}{:>14}{:>14}{:>11}{:>15}{:>13}'.format(
+            'jobs', 'per-job reqs', 'per-job ms', 'fetch-all reqs', 'fetch-all ms',
+            'scoped reqs', 'scoped ms', 'no-bulk reqs', 'no-bulk ms'))
+        for count in JOB_COUNTS:
+            jobs = [str(i) for i in range(count)]
+            artifact_jobs.clear()
+            for i, job_id in enumerate(jobs):
+                artifact_jobs.setdefault(str(i % args.artifacts), []).append(job_id)
+            statuses = {job_id: 'succeeded' if i < count * args.changed else 'running' for i, job_id in enumerate(jobs)}
+
+            def per_job():
+                for job_id, status in statuses.items():
+                    catalog.update_deployment(job_id, status)
+
+            def fetch_all():
+                known_statuses = {job['job_id']: job['status'] for job in catalog.api.get_deployment_jobs('test', None)}
+                catalog.api.update_deployments({
+                    job_id: status for job_id, status in statuses.items() if known_statuses.get(job_id) != status})
+
+            old = run(server, known, args.catalog_jobs, per_job)
+            diffed = run(server, known, args.catalog_jobs, fetch_all)
+            new = run(server, known, args.catalog_jobs,
+                      lambda: catalog.sync_deployments('test', statuses, MODEL_NAME))
+            bulk = routes.pop(('PUT', API_PATH + '/bulk'))
+            fallback = run(server, known, args.catalog_jobs,
+                           lambda: no_bulk_catalog.sync_deployments('test', statuses, MODEL_NAME))
+            routes[('PUT', API_PATH + '/bulk')] = bulk
+            print('{:>6}{:>14}{:>12.1f}{:>16}{:>14.1f}{:>14}{:>11.1f}{:>15}{:>13.1f}'.format(
+                count, old[0], old[1], diffed[0], diffed[1], new[0], new[1], fallback[0], fallback[1]))
+
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Measures connection reuse of the REST hooks against a local stub server.
+
+Replays the request pattern of `oml dlis list` (one DLIS query, then one
+model catalog lookup per job) and counts the TCP connections the stub
+accepted, comparing the old per-hook sessions and bare requests calls with
+the shared pooled client.
+
+    python benchmarks/bench_http.py [--commands 20] [--jobs 10] [--latency 5] [--tls]
+
+--tls serves HTTPS with a throwaway self-signed certificate (needs the
+openssl binary), so each new connection also pays a TLS handshake.
+"""
+import argparse
+import os
+import shutil
+import ssl
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from oml.util.http import Client  # noqa: E402
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.latency = latency
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Avoid Nagle/delayed-ACK stalls on kept-alive connections
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        payload = b'{"value": []}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_certificate(path):
+    cert = os.path.join(path, 'cert.pem')
+    key = os.path.join(path, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1',
+        '-keyout', key, '-out', cert], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)  # nosec
+    return cert, key
+
+
+def bare(base_url, args, verify):
+    for _ in range(args.commands):
+        yield lambda url: requests.get(url, verify=verify)
+
+
+def per_hook(base_url, args, verify):
+    # Before the shared client every hook built its own requests.Session
+    for _ in range(args.commands):
+        yield hook_getter(requests.Session(), requests.Session(), verify)
+
+
+def shared(base_url, args, verify):
+    for _ in range(args.commands):
+        yield hook_getter(Client(), Client(), verify)
+
+
+def hook_getter(dlis, catalog, verify):
+    return lambda url: (dlis if url.endswith('dlis') else catalog).get(url, verify=verify)
+
+
+def run(mode, base_url, args, verify):
+    server_before = args.server.connections
+    latencies = []
+    start = time.perf_counter()
+    for get in mode(base_url, args, verify):
+        for url in ['/'.join([base_url, 'dlis'])] + ['/'.join([base_url, 'models', str(i)]) for i in range(args.jobs)]:
+            t = time.perf_counter()
+            get(url).raise_for_status()
+            latencies.append((time.perf_counter() - t) * 1000)
+    total = time.perf_counter() - start
+
+    connections = args.server.connections - server_before
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'connections': connections,
+        'reuse': 1 - connections / len(latencies),
+        'p50': statistics.median(latencies),
+        'p99': latencies[int(len(latencies) * 0.99) - 1],
+        'total': total
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--commands', type=int, default=20, help='Simulated `oml dlis list` runs.')
+    parser.add_argument('--jobs', type=int, default=10, help='Catalog lookups per run.')
+    parser.add_argument('--latency', type=float, default=5, help='Stub latency per request, in ms.')
+    parser.add_argument('--tls', action='store_true')
+    args = parser.parse_args()
+
+    args.server = StubServer(args.latency / 1000)
+    scheme, verify, tmp_path = 'http', True, None
+    if args.tls:
+        tmp_path = tempfile.mkdtemp()
+        cert, key = make_certificate(tmp_path)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        args.server.socket = context.wrap_socket(args.server.socket, server_side=True)
+        scheme, verify = 'https', cert
+    threading.Thread(target=args.server.serve_forever, daemon=True).start()
+    base_url = '{}://127.0.0.1:{}'.format(scheme, args.server.server_port)
+
+    print('{:<10}{:>10}{:>13}{:>8}{:>10}{:>10}{:>10}'.format(
+        'mode', 'requests', 'connections', 'reuse', 'p50 ms', 'p99 ms', 'total s'))
+    for name, mode in [('bare', bare), ('per-hook', per_hook), ('shared', shared)]:
+        r = run(mode, base_url, args, verify)
+        print('{:<10}{:>10}{:>13}{:>8.1%}{:>10.2f}{:>10.2f}{:>10.2f}'.format(
+            name, r['requests'], r['connections'], r['reuse'], r['p50'], r['p99'], r['total']))
+
+    args.server.shutdown()
+    if tmp_path is not None:
+        shutil.rmtree(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Measures the cold import cost of the oml package.
+
+Each statement runs in a fresh interpreter with an empty HOME and is timed
+from inside the process, so the numbers include any filesystem work done
+at import time but not interpreter start-up.
+
+    python benchmarks/bench_import.py [--runs 20] [--baseline <git-rev>]
+
+With --baseline the same statements are also timed against the oml
+package exported from the given revision, for a before/after comparison.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+
+REPO_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+STATEMENTS = [
+    'import oml',
+    'import oml.settings',
+    'from oml.cli import main',
+]
+
+
+def time_statement(stmt, pythonpath, runs):
+    samples = []
+    for _ in range(runs):
+        home = tempfile.mkdtemp()
+        env = dict(os.environ, HOME=home, USERPROFILE=home, PYTHONPATH=pythonpath)
+        code = 'import time\nstart = time.perf_counter()\n{}\nprint(time.perf_counter() - start)'.format(stmt)
+        res = subprocess.run([sys.executable, '-c', code], env=env, cwd=home,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)  # nosec
+        shutil.rmtree(home)
+        if res.returncode != 0:
+            return None
+        samples.append(float(res.stdout.decode('utf-8').split()[-1]))
+    return statistics.median(samples) * 1000
+
+
+def format_ms(value):
+    return '{:>12}'.format('n/a') if value is None else '{:>12.1f}'.format(value)
+
+
+def export_revision(rev, dest):
+    archive = subprocess.run(['git', '-C', REPO_PATH, 'archive', rev, 'oml'],
+        stdout=subprocess.PIPE, check=True).stdout  # nosec
+    subprocess.run(['tar', '-x', '-C', dest], input=archive, check=True)  # nosec
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--baseline', help='Git revision to compare against.')
+    args = parser.parse_args()
+
+    columns = [('current', REPO_PATH)]
+    baseline_path = None
+    if args.baseline:
+        baseline_path = tempfile.mkdtemp()
+        export_revision(args.baseline, baseline_path)
+        columns.insert(0, (args.baseline, baseline_path))
+
+    print('{:<28}'.format('statement (median ms)') + ''.join('{:>12}'.format(c[0][:12]) for c in columns))
+    for stmt in STATEMENTS:
+        row = [time_statement(stmt, path, args.runs) for _, path in columns]
+        print('{:<28}'.format(stmt) + ''.join(format_ms(v) for v in row))
+
+    if baseline_path is not None:
+        shutil.rmtree(baseline_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Compares SecureManifest.json generation with the sequential version it
+replaces, cold and with the hash cache of a previous run.
+
+A synthetic package of --files small files plus --large-mb of larger files,
+like a packaged conda environment, is written to a temporary directory.
+
+    python benchmarks/bench_manifest.py [--files 20000] [--large-mb 512] [--workers 8]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from oml.util import manifest  # noqa: E402
+
+
+def old_create_manifest(root):
+    # What create_manifest used to do, without the chdir
+    files = []
+    for path, subdirs, names in os.walk(root):
+        for name in names:
+            if name == manifest.MANIFEST_FILENAME:
+                continue
+            file_path = os.path.join(path, name)
+            m = hashlib.sha512()
+            with open(file_path, 'rb') as f:
+                while True:
+                    buf = f.read(2**20)
+                    if not buf:
+                        break
+                    m.update(buf)
+            files.append({'name': os.path.relpath(file_path, root), 'length': os.path.getsize(file_path),
+                          'value': m.hexdigest().upper(), 'algorithm': 'SHA512'})
+    with open(os.path.join(root, manifest.MANIFEST_FILENAME), 'w') as f:
+        f.write(json.dumps({'files': files}, indent=4, ensure_ascii=True))
+
+
+def write_package(root, files, large_mb):
+    for i in range(files):
+        path = os.path.join(root, 'lib', 'pkg{}'.format(i // 500), 'file{}.py'.format(i))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(512 + i % 8192))
+    for i in range(large_mb // 64):
+        with open(os.path.join(root, 'lib', 'large{}.so'.format(i)), 'wb') as f:
+            for _ in range(64):
+                f.write(os.urandom(2**20))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--large-mb', type=int, default=512)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    tmp_path = tempfile.mkdtemp()
+    try:
+        root = os.path.join(tmp_path, 'package')
+        cache_path = os.path.join(tmp_path, 'cache')
+        write_package(root, args.files, args.large_mb)
+
+        old = timed(old_create_manifest, root)
+        with open(os.path.join(root, manifest.MANIFEST_FILENAME)) as f:
+            expected = sorted(json.load(f)['files'], key=lambda entry: entry['name'])
+        cold = timed(manifest.create_manifest, root, args.workers, cache_dir_path=None)
+        timed(manifest.create_manifest, root, args.workers, cache_dir_path=cache_path)
+        warm = timed(manifest.create_manifest, root, args.workers, cache_dir_path=cache_path)
+        with open(os.path.join(root, manifest.MANIFEST_FILENAME)) as f:
+            assert sorted(json.load(f)['files'], key=lambda entry: entry['name']) == expected
+
+        print('{} small files, {} MB of large files, {} CPUs'.format(args.files, args.large_mb, os.cpu_count()))
+        print('{:>24}{:>10}'.format('', 'seconds'))
+        print('{:>24}{:>10.2f}'.format('sequential', old))
+        print('{:>24}{:>10.2f}'.format('parallel', cold))
+        print('{:>24}{:>10.2f}'.format('parallel, cached', warm))
+    finally:
+        shutil.rmtree(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
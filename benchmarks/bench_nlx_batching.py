@@ -0,0 +1,109 @@
+"""
+Compares the NLX template's generate_batches with the accumulating generator
+it replaces, on time and peak memory to read a validation file.
+
+A synthetic validation file of --lines labelled sentences of up to SEQ_LEN
+tokens is scored over a synthetic vocabulary. The old generator is slow on
+large files, so it only reads the first --old-lines lines. Needs numpy and nltk.
+
+    python benchmarks/bench_nlx_batching.py [--lines 100000] [--old-lines 5000] [--batch-size 256]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from itertools import islice
+
+import numpy as np
+
+from bench_nlx_featurization import make_package
+
+
+def old_generate_batches(model, filename, seq_len, limit):
+    # What NLXModel.generate_batches used to do, with get_ids called once per line
+    x_batch, y_batch, batch_lengths = [], [], []
+    for count, (x, y, line_seqlen) in enumerate(model.get_dynamic_line(filename, seq_len)):
+        if count >= limit:
+            return
+        x_batch.append(x)
+        y_batch.append(y)
+        batch_lengths.append(line_seqlen)
+        # Lines are ragged, which older numpy turned into object arrays
+        yield (np.asarray(x_batch, dtype=object), np.asarray(y_batch, dtype=object), np.asarray(batch_lengths))
+
+
+def measure(batches):
+    start = time.perf_counter()
+    for _ in batches():
+        pass
+    elapsed = time.perf_counter() - start
+
+    # Memory is traced in a second pass, as tracing slows allocations down
+    tracemalloc.start()
+    for _ in batches():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--old-lines', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--vocab-size', type=int, default=50000)
+    args = parser.parse_args()
+
+    tmp_path = tempfile.mkdtemp()
+    try:
+        nlx_model = make_package(tmp_path)
+        seq_len = nlx_model.SEQ_LEN
+        rng = random.Random(0)
+        data_path = os.path.join(tmp_path, 'data')
+        os.makedirs(data_path)
+        words = ['<PAD>', '<UNK>'] + ['w{}'.format(i) for i in range(args.vocab_size - 2)]
+        with open(os.path.join(data_path, 'vocab.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(words))
+        validation_path = os.path.join(data_path, 'validation.txt')
+        with open(validation_path, 'w', encoding='utf-8') as f:
+            for _ in range(args.lines):
+                n = rng.randint(1, seq_len)
+                f.write('{}\t{}\n'.format(' '.join(rng.choice(words) for _ in range(n)),
+                                          ' '.join(str(rng.randint(0, 9)) for _ in range(n))))
+
+        class Model(nlx_model.NLXModel):
+            def predict(self, data):
+                pass
+
+            def eval(self, **kwargs):
+                pass
+
+        model = Model(data_path)
+        old_batches = -(-args.old_lines // args.batch_size)
+        variants = [
+            ('old', args.old_lines, lambda: old_generate_batches(model, validation_path, seq_len, args.old_lines)),
+            ('new', args.old_lines,
+             lambda: islice(model.generate_batches(args.batch_size, filename=validation_path), old_batches)),
+            ('new', args.lines, lambda: model.generate_batches(args.batch_size, filename=validation_path)),
+            ('new bucketed', args.lines,
+             lambda: model.generate_batches(args.batch_size, bucket=True, filename=validation_path)),
+            ('new shuffled', args.lines,
+             lambda: model.generate_batches(args.batch_size, shuffle=True, filename=validation_path)),
+        ]
+        print('Batches of {} lines of up to {} tokens'.format(args.batch_size, seq_len))
+        print('{:>14}{:>10}{:>12}{:>14}{:>12}'.format('generator', 'lines', 'seconds', 'us/line', 'peak KB'))
+        for name, lines, batches in variants:
+            elapsed, peak = measure(batches)
+            print('{:>14}{:>10}{:>12.2f}{:>14.1f}{:>12.0f}'.format(
+                name, lines, elapsed, elapsed * 1e6 / lines, peak / 1024))
+    finally:
+        shutil.rmtree(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
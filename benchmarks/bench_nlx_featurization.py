@@ -0,0 +1,126 @@
+"""
+Compares the NLX template's featurization APIs per query: dense one-hot,
+sparse one-hot, token ids and padded id batches.
+
+Queries are the sentences of validation.txt, or random sentences over the
+vocabulary when it is empty. Without --vocab a synthetic vocabulary of
+--vocab-size words is used. Needs numpy, scipy and nltk with its punkt data,
+or --split-tokenizer to split on whitespace and time featurization alone.
+
+    python benchmarks/bench_nlx_featurization.py [--vocab-size 200000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from importlib import import_module
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), '..', 'oml', 'templates', 'languages', 'python')
+PACKAGE_NAME = 'nlxbench'
+
+
+def make_package(tmp_path):
+    """Lays the base and nlx template code out as an importable package, as `oml init -t nlx` does."""
+    package_path = os.path.join(tmp_path, PACKAGE_NAME)
+    os.makedirs(package_path)
+    for template in ('base', 'nlx'):
+        code_path = os.path.join(TEMPLATE_PATH, template, 'code')
+        for name in os.listdir(code_path):
+            if name.endswith('.py') and not name.startswith('tpl_'):
+                shutil.copy(os.path.join(code_path, name), package_path)
+    sys.path.insert(0, tmp_path)
+    return import_module(PACKAGE_NAME + '.nlx_model')
+
+
+def write_data(data_path, vocab_path, vocab_size, validation_path, count, seed):
+    os.makedirs(data_path)
+    rng = random.Random(seed)
+    if vocab_path:
+        shutil.copy(vocab_path, os.path.join(data_path, 'vocab.txt'))
+        with open(vocab_path, encoding='utf-8') as f:
+            words = [line.strip() for line in f]
+    else:
+        words = ['<PAD>', '<UNK>'] + ['w{}'.format(i) for i in range(vocab_size - 2)]
+        with open(os.path.join(data_path, 'vocab.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(words))
+
+    with open(validation_path, encoding='utf-8') as f:
+        queries = [line.split('\t')[0].strip() for line in f if line.strip()]
+    if not queries:
+        queries = [' '.join(rng.choice(words) for _ in range(rng.randint(5, 30))) for _ in range(count)]
+    with open(os.path.join(data_path, 'validation.txt'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(queries))
+    return queries[:count]
+
+
+def nbytes(result):
+    if isinstance(result, tuple):
+        return sum(nbytes(part) for part in result)
+    if hasattr(result, 'indptr'):
+        return result.data.nbytes + result.indices.nbytes + result.indptr.nbytes
+    return result.nbytes
+
+
+def measure(featurize, queries, batch):
+    calls = [queries] if batch else queries
+    start = time.perf_counter()
+    size = sum(nbytes(featurize(call)) for call in calls)
+    elapsed = time.perf_counter() - start
+
+    # Memory is traced in a second pass, as tracing slows allocations down
+    tracemalloc.start()
+    for call in calls:
+        featurize(call)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed * 1000 / len(queries), size / len(queries), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--vocab', help='vocab.txt to use instead of a synthetic one.')
+    parser.add_argument('--vocab-size', type=int, default=200000)
+    parser.add_argument('--validation', default=os.path.join(TEMPLATE_PATH, 'nlx', 'data', 'validation.txt'))
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--split-tokenizer', action='store_true', help='Split queries on whitespace.')
+    args = parser.parse_args()
+
+    tmp_path = tempfile.mkdtemp()
+    try:
+        nlx_model = make_package(tmp_path)
+        if args.split_tokenizer:
+            nlx_model.word_tokenize = str.split
+        data_path = os.path.join(tmp_path, 'data')
+        queries = write_data(data_path, args.vocab, args.vocab_size, args.validation, args.queries, seed=0)
+
+        class Model(nlx_model.NLXModel):
+            def predict(self, data):
+                pass
+
+            def eval(self, **kwargs):
+                pass
+
+        model = Model(data_path)
+        variants = [
+            ('dense one-hot', model.generate_onehot, False),
+            ('sparse one-hot', model.onehot_sparse, False),
+            ('token ids', model.token_ids, False),
+            ('sparse batch', model.onehot_sparse_batch, True),
+            ('id batch', model.token_ids_batch, True),
+        ]
+        print('{} queries, vocabulary of {} words'.format(len(queries), model.vocab_size))
+        print('{:>16}{:>14}{:>16}{:>14}'.format('featurization', 'ms/query', 'bytes/query', 'peak KB'))
+        for name, featurize, batch in variants:
+            ms, size, peak = measure(featurize, queries, batch)
+            print('{:>16}{:>14.3f}{:>16.0f}{:>14.0f}'.format(name, ms, size, peak / 1024))
+    finally:
+        shutil.rmtree(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
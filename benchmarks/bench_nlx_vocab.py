@@ -0,0 +1,95 @@
+"""
+Compares the NLX template's Vocabulary with the dict it replaces, on load
+time and on token lookups.
+
+A synthetic vocabulary of --size words is written to a temporary vocab.txt.
+Lookups map queries of --tokens tokens, drawn from the vocabulary with a
+share of unknown words, one query at a time and as one batch. Needs numpy.
+
+    python benchmarks/bench_nlx_vocab.py [--size 500000] [--queries 2000] [--tokens 30]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from importlib.util import spec_from_file_location, module_from_spec
+
+VOCAB_PATH = os.path.join(
+    os.path.dirname(__file__), '..', 'oml', 'templates', 'languages', 'python', 'nlx', 'code', 'vocab.py')
+UNK_ID = 1
+
+
+def dict_vocab(vocab_path):
+    # What NLXModel.generate_vocab_map and get_ids used to do
+    query_wl = [line.strip() for line in open(vocab_path, encoding='utf-8', mode='r')]
+    return {query_wl[i]: i for i in range(len(query_wl))}
+
+
+def dict_ids(query_dict, seq):
+    ids = []
+    for tok in seq:
+        if tok in query_dict.keys():
+            ids.append(query_dict[tok])
+        else:
+            ids.append(UNK_ID)
+    return ids
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--size', type=int, default=500000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--tokens', type=int, default=30)
+    parser.add_argument('--unknown', type=float, default=0.1, help='Share of unknown tokens.')
+    args = parser.parse_args()
+
+    spec = spec_from_file_location('vocab', VOCAB_PATH)
+    vocab_module = module_from_spec(spec)
+    spec.loader.exec_module(vocab_module)
+    Vocabulary = vocab_module.Vocabulary
+
+    rng = random.Random(0)
+    words = ['<PAD>', '<UNK>'] + ['word{}'.format(i) for i in range(args.size - 2)]
+    queries = [[rng.choice(words) if rng.random() > args.unknown else 'oov{}'.format(rng.random())
+                for _ in range(args.tokens)] for _ in range(args.queries)]
+
+    tmp_path = tempfile.mkdtemp()
+    try:
+        vocab_path = os.path.join(tmp_path, 'vocab.txt')
+        with open(vocab_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(words))
+        Vocabulary.from_text(vocab_path).save(vocab_path)
+
+        query_dict, dict_load = timed(dict_vocab, vocab_path)
+        _, text_load = timed(Vocabulary.from_text, vocab_path)
+        vocab, mmap_load = timed(Vocabulary.load, vocab_path)
+
+        _, dict_lookup = timed(lambda: [dict_ids(query_dict, query) for query in queries])
+        _, vocab_lookup = timed(lambda: [vocab.lookup(query, UNK_ID) for query in queries])
+        flat = [token for query in queries for token in query]
+        _, batch_lookup = timed(vocab.lookup, flat, UNK_ID)
+        assert vocab.lookup(flat, UNK_ID).tolist() == [i for query in queries for i in dict_ids(query_dict, query)]
+
+        print('{} words, {} queries of {} tokens'.format(args.size, args.queries, args.tokens))
+        print('{:>28}{:>12}'.format('', 'ms'))
+        print('{:>28}{:>12.1f}'.format('load dict from text', dict_load))
+        print('{:>28}{:>12.1f}'.format('load Vocabulary from text', text_load))
+        print('{:>28}{:>12.1f}'.format('load Vocabulary mmap', mmap_load))
+        print('{:>28}{:>12.4f}'.format('dict get_ids per query', dict_lookup / args.queries))
+        print('{:>28}{:>12.4f}'.format('lookup per query', vocab_lookup / args.queries))
+        print('{:>28}{:>12.4f}'.format('batch lookup per query', batch_lookup / args.queries))
+    finally:
+        shutil.rmtree(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Measures the serving Predictor's prediction cache on a skewed query stream.
+
+Queries follow a Zipf-like distribution over a vocabulary, as production
+query logs do, and each predict call costs a fixed time. Concurrent clients
+go through the template's Predictor with and without cache_entries set.
+
+    python benchmarks/bench_prediction_cache.py [--clients 16] [--requests 200] [--predict-ms 2]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+from importlib.util import spec_from_file_location, module_from_spec
+
+SERVING_PATH = os.path.join(
+    os.path.dirname(__file__), '..', 'oml', 'templates', 'platforms', 'common', 'python', 'code', 'serving.py')
+
+
+class SleepModel:
+
+    predict_time = 0.002
+
+    def predict(self, data):
+        time.sleep(self.predict_time)
+        return data.upper()
+
+
+def queries(count, vocabulary, seed):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    return ['query {}'.format(i) for i in rng.choices(range(vocabulary), weights, k=count)]
+
+
+def run(predictor, streams):
+    def client(stream):
+        for data in stream:
+            predictor.submit(data).result()
+
+    threads = [threading.Thread(target=client, args=(stream,)) for stream in streams]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(len(stream) for stream in streams) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per client.')
+    parser.add_argument('--vocabulary', type=int, default=10000)
+    parser.add_argument('--predict-ms', type=float, default=2)
+    args = parser.parse_args()
+
+    spec = spec_from_file_location('serving', SERVING_PATH)
+    serving = module_from_spec(spec)
+    spec.loader.exec_module(serving)
+    sys.modules['serving'] = serving
+    SleepModel.predict_time = args.predict_ms / 1000
+    streams = [queries(args.requests, args.vocabulary, seed) for seed in range(args.clients)]
+
+    print('{:>14}{:>10}{:>10}'.format('cache_entries', 'req/s', 'hit rate'))
+    for entries in (0, 1000, 10000):
+        config = dict(serving.DEFAULTS, workers=args.clients, max_in_flight=args.clients, cache_entries=entries)
+        predictor = serving.Predictor(SleepModel, config=config)
+        qps = run(predictor, streams)
+        hit_rate = predictor.cache.stats()['hit_rate'] if predictor.cache else 0.0
+        print('{:>14}{:>10.0f}{:>10.1%}'.format(entries, qps, hit_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Times `oml publish`'s catalog registration against a local stub catalog API.
+
+Compares the separate get/create model and create artifact calls, used
+when the API has no upsert endpoint, with the single artifacts/register
+request.
+
+    python benchmarks/bench_register.py [--publishes 20] [--latency 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from stubs import StubServer, catalog_routes  # noqa: E402
+from oml.hooks.catalog import ModelCatalogHook  # noqa: E402
+from oml.settings import Settings  # noqa: E402
+
+METADATA = {
+    'name': 'bench',
+    'owner': 'DOMAIN\\bench',
+    'language': 'python',
+    'flavor': {'name': 'tensorflow'},
+    'platform': 'dlis'
+}
+
+
+def run(upsert, args):
+    server = StubServer(catalog_routes(upsert), args.latency / 1000).start()
+    ModelCatalogHook._model_ids.clear()
+    latencies = []
+    # Endpoints the stub lacks are remembered in a throwaway user metadata file
+    metadata_path = os.path.join(tempfile.mkdtemp(), 'metadata.yml')
+    with mock.patch('oml.util.auth.get_token', return_value={'accessToken': '1111'}), \
+            mock.patch.object(Settings, 'api_endpoint', server.url), \
+            mock.patch('oml.settings.METADATA_FILE_PATH', metadata_path):
+        for i in range(args.publishes):
+            # Every publish is a new oml process with a new hook
+            if args.cold:
+                ModelCatalogHook._model_ids.clear()
+            catalog = ModelCatalogHook(METADATA)
+            start = time.perf_counter()
+            catalog.register('model', '1.0.{}'.format(i), 'path', 'adls')
+            latencies.append((time.perf_counter() - start) * 1000)
+    requests = server.total_requests
+    server.stop()
+    return requests / args.publishes, statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--publishes', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=20, help='Stub latency per request, in ms.')
+    parser.add_argument('--warm', dest='cold', action='store_false',
+        help='Keep the model id cache between publishes, as within one process.')
+    args = parser.parse_args()
+
+    print('{:<12}{:>16}{:>12}'.format('path', 'reqs/publish', 'median ms'))
+    for name, upsert in [('separate', False), ('upsert', True)]:
+        requests, median = run(upsert, args)
+        print('{:<12}{:>16.1f}{:>12.1f}'.format(name, requests, median))
+
+
+if __name__ == '__main__':
+    main()
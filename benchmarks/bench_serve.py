@@ -0,0 +1,100 @@
+"""
+Measures `oml serve` throughput for each --server choice.
+
+A WSGI app that spends the given time in predict, half sleeping like I/O
+and half on the CPU, is served on a local port while a fixed number of
+clients post to it over kept-alive connections.
+
+    python benchmarks/bench_serve.py [--clients 8] [--requests 400] [--predict-ms 10]
+"""
+import argparse
+import http.client
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from oml.util import wsgi  # noqa: E402
+
+CONFIGS = [
+    ('wsgiref', 1, 1),
+    ('threaded', 1, 8),
+    ('prefork', 4, 2),
+]
+
+
+def make_app(predict_ms):
+    def app(environ, start_response):
+        environ['wsgi.input'].read(int(environ.get('CONTENT_LENGTH') or 0))
+        time.sleep(predict_ms / 2000)
+        deadline = time.perf_counter() + predict_ms / 2000
+        while time.perf_counter() < deadline:
+            pass
+        start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', '2')])
+        return [b'ok']
+    return app
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def wait_for(port):
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+
+
+def load(port, clients, requests):
+    def client(count):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        for _ in range(count):
+            conn.request('POST', '/', body='test input')
+            conn.getresponse().read()
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(requests // clients,)) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return (requests // clients * clients) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--predict-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    app = make_app(args.predict_ms)
+    print('{:<10}{:>9}{:>9}{:>10}'.format('server', 'workers', 'threads', 'req/s'))
+    for server, workers, threads in CONFIGS:
+        if server == 'prefork' and not hasattr(os, 'fork'):
+            continue
+        port = free_port()
+        pid = os.fork() if hasattr(os, 'fork') else None
+        if pid == 0:
+            wsgi.serve(app, '127.0.0.1', port, server, workers, threads)
+            os._exit(0)
+        wait_for(port)
+        qps = load(port, args.clients, args.requests)
+        os.kill(pid, signal.SIGINT)
+        os.waitpid(pid, 0)
+        print('{:<10}{:>9}{:>9}{:>10.0f}'.format(server, workers, threads, qps))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Compares serving a C# model by starting its exe per request with the
+persistent serve-stdio workers.
+
+A Python script plays the exe: it sleeps for the given model load time on
+start, then answers either one `predict <data>` call or framed requests on
+stdin, like the generated Program.cs.
+
+    python benchmarks/bench_worker.py [--requests 50] [--load-ms 200]
+"""
+import argparse
+import os
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from oml.util.worker import WorkerPool  # noqa: E402
+
+STUB_EXE = '''
+import struct
+import sys
+import time
+
+time.sleep(float(sys.argv[1]))
+if sys.argv[2] == 'predict':
+    print(sys.argv[3].upper())
+    sys.exit(0)
+
+stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+while True:
+    header = stdin.read(4)
+    if len(header) < 4:
+        break
+    payload = stdin.read(struct.unpack('>I', header)[0]).upper()
+    stdout.write(struct.pack('>BI', 0, len(payload)) + payload)
+    stdout.flush()
+'''
+
+
+def time_calls(call, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), max(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--load-ms', type=float, default=200, help='Simulated model load time.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_path:
+        exe_path = os.path.join(tmp_path, 'model.py')
+        with open(exe_path, 'w') as f:
+            f.write(STUB_EXE)
+        exe = [sys.executable, exe_path, str(args.load_ms / 1000)]
+
+        spawn = time_calls(
+            lambda: subprocess.run(exe + ['predict', 'test input'], stdout=subprocess.PIPE, check=True),  # nosec
+            args.requests)
+        with WorkerPool(exe + ['serve-stdio']) as pool:
+            pool.predict('warm up')
+            worker = time_calls(lambda: pool.predict('test input'), args.requests)
+
+    print('{:<14}{:>12}{:>12}'.format('mode', 'median ms', 'max ms'))
+    print('{:<14}{:>12.2f}{:>12.2f}'.format('spawn', *spawn))
+    print('{:<14}{:>12.2f}{:>12.2f}'.format('serve-stdio', *worker))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares the parallel archiver of oml.util.zip with shutil.make_archive, the
+single-threaded deflate it replaces, on throughput and archive size per level.
+
+A synthetic tree of --size-mb shaped like a conda environment is written to a
+temporary directory: mostly small source and text files, plus native
+libraries (.so) and wheels that are already compressed.
+
+    python benchmarks/bench_zip.py [--size-mb 2048] [--levels 0,1,6,9] [--workers 8]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from oml.util import zip as zip_util  # noqa: E402
+
+# Share of the tree's bytes per kind of file: (extension, share, file size, compressible)
+KINDS = [
+    ('.py', 0.35, 16 * 1024, True),
+    ('.txt', 0.15, 64 * 1024, True),
+    ('.so', 0.4, 8 * 2**20, False),
+    ('.whl', 0.1, 4 * 2**20, False),
+]
+WORDS = [''.join(chr(97 + i % 26) for i in range(n, n + 3 + n % 7)) for n in range(500)]
+
+
+def write_tree(root, size_mb, seed):
+    rng = random.Random(seed)
+    text = ' '.join(rng.choice(WORDS) for _ in range(200000)).encode()
+    noise = os.urandom(2**20)
+    count = 0
+    for ext, share, file_size, compressible in KINDS:
+        written = 0
+        while written < share * size_mb * 2**20:
+            path = os.path.join(root, 'lib', 'pkg{}'.format(count // 200), 'file{}{}'.format(count, ext))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                remaining = file_size
+                while remaining:
+                    source = text if compressible else noise
+                    start = rng.randrange(len(source) - min(remaining, len(source)) + 1)
+                    chunk = source[start:start + remaining]
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            written += file_size
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--size-mb', type=int, default=2048)
+    parser.add_argument('--levels', default='0,1,6,9', help='Comma separated deflate levels.')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    tmp_path = tempfile.mkdtemp()
+    try:
+        src = os.path.join(tmp_path, 'env')
+        count = write_tree(src, args.size_mb, seed=0)
+        size = sum(os.path.getsize(os.path.join(path, name)) for path, _, names in os.walk(src) for name in names)
+        print('{} files, {:.0f} MB, {} CPUs, {} workers'.format(
+            count, size / 2**20, os.cpu_count(), args.workers or os.cpu_count()))
+        print('{:>24}{:>10}{:>10}{:>12}'.format('archiver', 'seconds', 'MB/s', 'size MB'))
+
+        cwd = os.getcwd()
+        start = time.perf_counter()
+        os.chdir(tmp_path)
+        zip_path = shutil.make_archive('baseline', 'zip', src)
+        os.chdir(cwd)
+        runs = [('make_archive', time.perf_counter() - start, zip_path)]
+        for level in (int(level) for level in args.levels.split(',')):
+            start = time.perf_counter()
+            zip_path = zip_util.archive(src, tmp_path, 'level{}'.format(level), level=level, workers=args.workers)
+            runs.append(('parallel, level {}'.format(level), time.perf_counter() - start, zip_path))
+
+        for name, elapsed, zip_path in runs:
+            print('{:>24}{:>10.2f}{:>10.0f}{:>12.0f}'.format(
+                name, elapsed, size / 2**20 / elapsed, os.path.getsize(zip_path) / 2**20))
+            os.remove(zip_path)
+    finally:
+        shutil.rmtree(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Local HTTP stub server shared by the benchmarks.
+
+Routes map (method, path) to a function taking the parsed query and JSON
+body and returning (status, payload). Every request sleeps for the given
+latency first, and the server counts requests and accepted connections.
+"""
+import json
+import threading
+import time
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, routes=None, latency=0):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.routes = routes or {}
+        self.latency = latency
+        self.connections = 0
+        self.requests = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_port)
+
+    @property
+    def total_requests(self):
+        return sum(self.requests.values())
+
+    def reset(self):
+        with self.lock:
+            self.connections = 0
+            self.requests.clear()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Avoid Nagle/delayed-ACK stalls on kept-alive connections
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+    def do_PUT(self):
+        self._respond()
+
+    def _respond(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length).decode('utf-8')) if length else None
+        with self.server.lock:
+            self.server.requests[(self.command, url.path)] += 1
+        time.sleep(self.server.latency)
+
+        route = self.server.routes.get((self.command, url.path))
+        if route is None:
+            status, payload = 404, {'error': 'not found'}
+        else:
+            status, payload = route(parse_qs(url.query), body)
+
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def catalog_routes(upsert=True):
+    """Routes of a minimal in-memory model catalog API.
+
+    With ``upsert=False`` the artifacts/register endpoint is left out, like
+    on API versions that predate it.
+    """
+    models = {}
+    artifacts = []
+
+    def get_models(query, body):
+        names = query.get('name')
+        return 200, [m for m in models.values() if names is None or m['name'] in names]
+
+    def create_model(query, body):
+        model = dict(body, id=len(models) + 1)
+        models[model['name']] = model
+        return 201, model
+
+    def create_artifact(query, body):
+        artifact = dict(body, id=len(artifacts) + 1)
+        artifacts.append(artifact)
+        return 201, artifact
+
+    def register_artifact(query, body):
+        model = models.get(body['model']['name'])
+        if model is None:
+            _, model = create_model(query, body['model'])
+        return create_artifact(query, dict(body['artifact'], model_id=model['id']))
+
+    routes = {
+        ('GET', '/api/v1/models'): get_models,
+        ('POST', '/api/v1/models'): create_model,
+        ('POST', '/api/v1/artifacts'): create_artifact,
+    }
+    if upsert:
+        routes[('POST', '/api/v1/artifacts/register')] = register_artifact
+    return routes
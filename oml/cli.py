@@ -1,19 +1,67 @@
 import click
+import importlib
 import os
 import re
 
-from prettytable import PrettyTable
+from itertools import islice
 from oml.context import pass_context
 from oml.factory import TemplateFactory
-from oml.hooks.gitrepo import GitRepositoryHook
 from oml.model import Model
-from oml.settings import PYTHON_LANG, CSHARP_LANG
+from oml.settings import PYTHON_LANG, CSHARP_LANG, PAGE_SIZE
+from oml.util import cache as response_cache
 
-import oml.platforms.dlis.cli as dlis
-import oml.platforms.azureml.cli as azureml
 
+class LazyGroup(click.Group):
+    """Click group that imports subcommands only when they are dispatched.
 
-@click.group(context_settings=dict(
+    :param lazy_subcommands: Mapping of command name to a tuple of the
+        import path of the command object (``'package.module.attribute'``)
+        and the short help shown by ``--help``.
+    """
+
+    def __init__(self, *args, lazy_subcommands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in self.lazy_subcommands:
+            self.add_command(self._load_command(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx, formatter):
+        """Lists the commands without importing the lazy ones."""
+        names = self.list_commands(ctx)
+        if not names:
+            return
+
+        # allow for 3 times the default spacing
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows = []
+        for name in names:
+            if name not in self.commands:
+                rows.append((name, self.lazy_subcommands[name][1]))
+                continue
+            cmd = self.commands[name]
+            if not cmd.hidden:
+                rows.append((name, cmd.get_short_help_str(limit)))
+
+        if rows:
+            with formatter.section('Commands'):
+                formatter.write_dl(rows)
+
+    def _load_command(self, cmd_name):
+        import_path = self.lazy_subcommands[cmd_name][0]
+        module_name, attr = import_path.rsplit('.', 1)
+        return getattr(importlib.import_module(module_name), attr)
+
+
+@click.group(cls=LazyGroup, lazy_subcommands={
+    'dlis': ('oml.platforms.dlis.cli.commands', 'DLIS operation commands.'),
+    'azureml': ('oml.platforms.azureml.cli.commands', 'AzureML operation commands.'),
+}, context_settings=dict(
     auto_envvar_prefix='OML',
     help_option_names=['-h', '--help'],
     ignore_unknown_options=True,
@@ -21,36 +69,44 @@ import oml.platforms.azureml.cli as azureml
 ))
 @click.version_option()
 @click.option('-v', '--verbose', is_flag=True, help='Enables verbose mode.')
+@click.option('--no-cache', is_flag=True, help='Bypasses the local cache of catalog and DLIS lookups.')
 @pass_context
-def main(ctx, verbose):
+def main(ctx, verbose, no_cache):
     """Machine Learning Model Management Tool"""
     ctx.verbose = verbose
+    if not no_cache:
+        response_cache.enable()
+        click.get_current_context().call_on_close(response_cache.disable)
     # ctx.is_outdated()
 
 
 @main.command()
 @click.argument('model-name', required=False)
+@click.option('--limit', type=click.IntRange(min=1), help='Maximum number of versions to list.')
+@click.option('--page-size', type=click.IntRange(min=1), default=PAGE_SIZE, show_default=True,
+    help='Versions fetched per request.')
+@click.option('--format', 'output_format', type=click.Choice(['table', 'jsonl']), default='table',
+    show_default=True, help='Output format. jsonl prints each version as soon as it is fetched.')
 @pass_context
-def list(ctx, model_name):
+def list(ctx, model_name, limit, page_size, output_format):
     """Lists all published versions of a model."""
     try:
         ctx.tracker.track_event('command', 'list')
         model = Model(os.getcwd(), ctx.verbose)
-        result = model.list_artifacts(model_name)
-        if result:
-            tbl = PrettyTable(['Version', 'Path', 'Platform',
-                'Compliant', 'Created'], align='l')
-            for row in result:
-                tbl.add_row([
-                    row['version'],
-                    row['path'],
-                    row['platform'].upper(),
-                    'False' if row['is_compliant'] == 0 else 'True',
-                    row['created_at']])
-            ctx.log(tbl)
-            ctx.log('{} published version(s) found.'.format(len(result)))
-        else:
-            ctx.log("The model doesn't have any published versions.")
+        if limit is not None:
+            page_size = min(page_size, limit)
+        rows = islice(model.iter_artifacts(model_name, page_size), limit)
+        count = ctx.log_rows(rows, ['Version', 'Path', 'Platform', 'Compliant', 'Created'], lambda row: [
+            row['version'],
+            row['path'],
+            row['platform'].upper(),
+            'False' if row['is_compliant'] == 0 else 'True',
+            row['created_at']], output_format)
+        if output_format == 'table':
+            if count > 0:
+                ctx.log('{} published version(s) found.'.format(count))
+            else:
+                ctx.log("The model doesn't have any published versions.")
     except Exception as e:
         ctx.tracker.track_event('exception', 'list')
         ctx.error_log(e)
@@ -61,6 +117,7 @@ def list(ctx, model_name):
 @pass_context
 def push(ctx, path):
     """Push a model into OXO model repository."""
+    from oml.hooks.gitrepo import GitRepositoryHook
     try:
         model = Model(os.getcwd(), ctx.verbose)
         if path is None:
@@ -75,6 +132,7 @@ def push(ctx, path):
 @pass_context
 def pull(ctx):
     """Clone OXO model repository."""
+    from oml.hooks.gitrepo import GitRepositoryHook
     try:
         repo = GitRepositoryHook()
         repo.pull_model()
@@ -123,13 +181,25 @@ def init(ctx, name, flavor, template, language, build_mode, platform):
 @main.command()
 @click.option('--port', default=8000, show_default=True,
     help='Port number that is serving the service.')
+@click.option('-w', '--workers', default=1, show_default=True, type=click.IntRange(min=1),
+    help='Number of model processes answering requests. Python models need --server prefork.')
+@click.option('-t', '--threads', default=4, show_default=True, type=click.IntRange(min=1),
+    help='Request threads per process of the threaded and prefork servers.')
+@click.option('--server', default='wsgiref', show_default=True,
+    type=click.Choice(['wsgiref', 'threaded', 'prefork']),
+    help='wsgiref serves one request at a time. threaded keeps connections alive and serves them concurrently. '
+    'prefork loads a python model once and forks --workers processes sharing it.')
+@click.option('--warmup', is_flag=True, default=False,
+    help='Warm the model up with data/input.txt before serving, as the packaged servers do, and check the time '
+    'to ready and the latency against WaitingModelReadyInMin and TimeoutInMs. Warm-up requests are sent as '
+    'concurrently as one server process handles them: --threads at once, or one at a time with wsgiref.')
 @pass_context
-def serve(ctx, port):
+def serve(ctx, port, workers, threads, server, warmup):
     """Serving current model at localhost."""
     try:
         ctx.tracker.track_event('command', 'serve')
         model = Model(os.getcwd(), ctx.verbose)
-        model.serve(port)
+        model.serve(port, workers, threads, server, warmup)
     except Exception as e:
         ctx.tracker.track_event('exception', 'serve')
         ctx.error_log(e)
@@ -158,18 +228,74 @@ def eval(ctx):
     help='Testing mode.')
 @click.option('-e', '--endpoint', default='http://localhost:8000', show_default=True,
     help='The endpoint that is serving a model.')
+@click.option('-c', '--concurrency', default=1, show_default=True, type=click.IntRange(min=1),
+    help='Requests sent at once in live mode.')
+@click.option('--timeout', default=30.0, show_default=True, type=float,
+    help='Seconds to wait for each live request.')
+@click.option('--retries', default=2, show_default=True, type=click.IntRange(min=0),
+    help='Retries of a live request after a connection error, timeout, 429 or 5xx.')
 @pass_context
-def test(ctx, file_path, delimiter, mode, endpoint):
+def test(ctx, file_path, delimiter, mode, endpoint, concurrency, timeout, retries):
     """Running unit tests on current model."""
     try:
         ctx.tracker.track_event('command', 'test')
         model = Model(os.getcwd(), ctx.verbose)
-        model.test(mode, file_path, delimiter, endpoint, ctx.verbose)
+        model.test(mode, file_path, delimiter, endpoint, ctx.verbose, concurrency, timeout, retries)
     except Exception as e:
         ctx.tracker.track_event('exception', 'test')
         ctx.error_log(e)
 
 
+@main.command()
+@click.option('-f', '--file-path', type=click.Path(exists=True, resolve_path=True),
+    help='File with one request per line. Default: data/input.txt, else tests/predictions.txt.')
+@click.option('-d', '--delimiter', default='\t', show_default=True,
+    help='Delimiter before the expected response in test files.')
+@click.option('-e', '--endpoint',
+    help='Endpoint serving the model. Default: http://localhost:8000, or localhost:9000 with --protocol grpc.')
+@click.option('--protocol', default='http', show_default=True, type=click.Choice(['http', 'grpc']),
+    help='http posts each request; grpc calls GenericService.Eval.')
+@click.option('--qps', type=float, help='Offer a fixed QPS.')
+@click.option('--ramp', default='10:200:10', show_default=True,
+    help='START:STOP:STEP QPS to offer in turn when --qps is not set, until one is not sustained.')
+@click.option('--duration', default=10.0, show_default=True, type=float,
+    help='Seconds to offer each QPS.')
+@click.option('--timeout', default=10.0, show_default=True, type=float, help='Seconds to wait for each request.')
+@click.option('--max-error-rate', default=0.01, show_default=True, type=click.FloatRange(0, 1),
+    help='Largest share of failed requests for a QPS to count as sustained.')
+@click.option('--slo-ms', type=float, help='Largest p99 latency in ms for a QPS to count as sustained.')
+@click.option('--cpu-cores', type=click.IntRange(min=1),
+    help='CPU cores the endpoint runs on, recorded for `oml dlis test --bench-file`. Default: this machine\'s.')
+@click.option('-o', '--output', type=click.Path(dir_okay=False, writable=True),
+    help='Write the JSON result to this file instead of the console.')
+@pass_context
+def bench(ctx, file_path, delimiter, endpoint, protocol, qps, ramp, duration, timeout, max_error_rate, slo_ms,
+        cpu_cores, output):
+    """Measures the maximum QPS an endpoint sustains."""
+    try:
+        import json
+        from oml.settings import find_base_path
+        from oml.util.bench import Bench, find_input_file, parse_ramp, read_inputs
+
+        ctx.tracker.track_event('command', 'bench')
+        inputs = read_inputs(file_path or find_input_file(find_base_path(os.getcwd())), delimiter)
+        steps = [qps] if qps else parse_ramp(ramp)
+        with Bench(endpoint, protocol, timeout, max_error_rate=max_error_rate, slo_ms=slo_ms) as load:
+            result = load.run(inputs, steps, duration)
+        result['cpu_cores'] = cpu_cores or os.cpu_count()
+
+        text = json.dumps(result, indent=2)
+        if output:
+            with open(output, 'w') as f:
+                f.write(text)
+            ctx.log('Maximum sustainable QPS: {}. Result written to {}.'.format(result['max_sustainable_qps'], output))
+        else:
+            click.echo(text)
+    except Exception as e:
+        ctx.tracker.track_event('exception', 'bench')
+        ctx.error_log(e)
+
+
 @main.command()
 @click.option('-p', '--platform', default=None, show_default=True, hidden=True,
     type=click.Choice(['dlis', 'dlisv3', 'dlisv3binary', 'qas']),
@@ -243,5 +369,40 @@ def generate_noncomp_template(ctx):
         ctx.error_log(e)
 
 
-main.add_command(dlis.commands)
-main.add_command(azureml.commands)
+@main.group()
+def cache():
+    """Local cache of catalog and DLIS lookups."""
+    pass
+
+
+@cache.command()
+@pass_context
+def stats(ctx):
+    """Shows the cache size and hit rates."""
+    try:
+        ctx.tracker.track_event('command', 'cache_stats')
+        stats = response_cache.ResponseCache().stats()
+        ctx.log('Entries:     {}'.format(stats['entries']))
+        ctx.log('Size:        {:.1f} KB'.format(stats['size'] / 1024))
+        ctx.log('Hits:        {}'.format(stats['hits']))
+        ctx.log('Revalidated: {}'.format(stats['revalidated']))
+        ctx.log('Misses:      {}'.format(stats['misses']))
+        ctx.log('Evictions:   {}'.format(stats['evictions']))
+        ctx.log('Hit rate:    {:.1%}'.format(stats['hit_rate']))
+    except Exception as e:
+        ctx.tracker.track_event('exception', 'cache_stats')
+        ctx.error_log(e)
+
+
+@cache.command()
+@pass_context
+def clear(ctx):
+    """Removes all cached responses and statistics."""
+    try:
+        ctx.tracker.track_event('command', 'cache_clear')
+        response_cache.disable()
+        response_cache.ResponseCache().clear()
+        ctx.log('Cache cleared.')
+    except Exception as e:
+        ctx.tracker.track_event('exception', 'cache_clear')
+        ctx.error_log(e)
@@ -1,8 +1,10 @@
 import click
+import json
 import sys
 import traceback
 
 from oml.hooks.appinsights import AppInsightsHook
+from prettytable import PrettyTable
 from oml.util.shell import run_shell
 
 
@@ -21,6 +23,26 @@ class Context:
         if self.verbose:
             self.log(msg, True)
 
+    def log_rows(self, rows, columns, to_cells, output_format='table'):
+        """Logs rows as a table, or as one JSON object per line as they arrive.
+
+        Returns the number of rows logged.
+        """
+        count = 0
+        if output_format == 'jsonl':
+            for row in rows:
+                self.log(json.dumps(row, default=str))
+                count += 1
+            return count
+
+        tbl = PrettyTable(columns, align='l')
+        for row in rows:
+            tbl.add_row(to_cells(row))
+            count += 1
+        if count > 0:
+            self.log(tbl)
+        return count
+
     def error_log(self, msg):
         if self.verbose:
             traceback.print_exc()
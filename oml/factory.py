@@ -2,8 +2,6 @@ import os
 import platform
 
 from distutils.dir_util import copy_tree
-from git import IndexFile, Repo
-from jinja2 import Environment, FileSystemLoader
 from pathlib import Path
 from shutil import copytree, ignore_patterns, rmtree
 
@@ -52,6 +50,8 @@ class TemplateFactory:
             update_model_metadata(path, metadata)
 
     def generate_multistage_pipeline_template(self, path, model_name):
+        from jinja2 import Environment, FileSystemLoader
+
         rootdir = self._git_rel_path(path) or model_name
         pipelines_dirpath = os.path.join(path, '.azure-pipelines')
         azure_templates_dirpath = os.path.join(self.base_template_dirpath, '.azure-pipelines')
@@ -68,6 +68,8 @@ class TemplateFactory:
                 print('Generated new multistage pipeline template in .azure-pipelines directory')
 
     def generate_noncomp_pipeline_template(self, path, model_name):
+        from jinja2 import Environment, FileSystemLoader
+
         rootdir = self._git_rel_path(path) or model_name
         pipelines_dirpath = os.path.join(path, '.azure-pipelines')
         if Path(os.path.join(pipelines_dirpath, 'noncomp-pipeline.yml')).exists():
@@ -120,6 +122,8 @@ class TemplateFactory:
         os.rename(os.path.join(dest, 'code'), os.path.join(dest, model_name))
 
     def _generate_common_files(self, path, flavor, model_name, serve_platform):
+        from jinja2 import Environment, FileSystemLoader
+
         env = Environment(loader=FileSystemLoader(TEMPLATE_COMMON_DIR_PATH), autoescape=True)
         template = env.get_template(MODEL_META_FILENAME)
         template.stream(
@@ -144,6 +148,8 @@ class TemplateFactory:
         return model_name
 
     def _generate_templated_files(self, dest, model_name, rootdir, serve_platform='', flavor=''):
+        from jinja2 import Environment, FileSystemLoader
+
         env = Environment(
             loader=FileSystemLoader(self.base_template_dirpath),
             autoescape=True,
@@ -165,6 +171,8 @@ class TemplateFactory:
 
     @staticmethod
     def _git_rel_path(path):
+        from git import IndexFile, Repo
+
         try:
             repo = Repo(path, search_parent_directories=True)
             index = IndexFile(repo)
@@ -1,7 +1,6 @@
 import time
 
-from azure.datalake.store import core, lib, multithread
-from oml.settings import CLIENT_ID, TENANT_ID
+from oml.settings import config
 from oml.util import auth
 
 DATALAKE = 'https://datalake.azure.net/'
@@ -14,6 +13,8 @@ class AzureDataLakeStoreHook:
         self.authenticate()
 
     def authenticate(self):
+        from azure.datalake.store import core, lib
+
         token = auth.get_token(DATALAKE)
         # Needed for ADLS datalake operations
         token.update({
@@ -21,8 +22,8 @@ class AzureDataLakeStoreHook:
             'resource': DATALAKE,
             'refresh': token.get('refreshToken', False),
             'time': time.time(),
-            'tenant': TENANT_ID,
-            'client': CLIENT_ID
+            'tenant': config.tenant_id,
+            'client': config.client_id
         })
         adlCreds = lib.DataLakeCredential(token)
 
@@ -30,6 +31,8 @@ class AzureDataLakeStoreHook:
         self.adls = core.AzureDLFileSystem(adlCreds, store_name=self.store_name)
 
     def upload(self, src, dest, overwrite=True):
+        from azure.datalake.store import multithread
+
         print('Uploading from {} to {}'.format(src, dest))
         multithread.ADLUploader(self.adls, dest, src, overwrite=overwrite)
         print('Uploaded!')
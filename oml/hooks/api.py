@@ -1,21 +1,27 @@
-import requests
+import time
 
 from oml.exceptions import OMLException
-from oml.settings import API_ENDPOINT
-from oml.util import auth
+from oml.settings import config, get_user_metadata, update_user_metadata, PAGE_SIZE
+from oml.util import auth, http
 from oml.util.requests import handle_response
 
+# User metadata key of the endpoints found missing on the Platform API, with when they were probed
+UNSUPPORTED_ENDPOINTS_KEY = 'unsupported_endpoints'
+# Seconds before a missing endpoint is probed again, in case the API was updated
+UNSUPPORTED_ENDPOINT_TTL = 24 * 60 * 60
+
 
 class ApiHook:
 
     def __init__(self):
-        endpoint = '/'.join([API_ENDPOINT, 'api', 'v1'])
+        endpoint = '/'.join([config.api_endpoint, 'api', 'v1'])
         self.models_url = '/'.join([endpoint, 'models'])
         self.artifacts_url = '/'.join([endpoint, 'artifacts'])
         self.deployments_url = '/'.join([endpoint, 'deployments'])
-        token = auth.get_token(API_ENDPOINT)
-        self._session = requests.Session()
-        self._session.headers.update({'Authorization': 'Bearer {}'.format(token['accessToken'])})
+        self.register_url = '/'.join([self.artifacts_url, 'register'])
+        self.bulk_deployments_url = '/'.join([self.deployments_url, 'bulk'])
+        self._unsupported = None
+        self._session = http.Client(auth=auth.BearerAuth(config.api_endpoint), cache_scope=endpoint)
 
     @handle_response
     def create_model(self, data):
@@ -36,8 +42,49 @@ class ApiHook:
     def create_artifact(self, data):
         return self._session.post(self.artifacts_url, json=data)
 
+    def register_artifact(self, model_data, artifact_data):
+        """Creates the model if it does not exist yet and its artifact in a single request.
+
+        Returns the new artifact, with its ``model_id``, or None when the API
+        does not expose the upsert endpoint.
+        """
+        if not self._is_supported(self.register_url):
+            return None
+        res = self._session.post(self.register_url, json={'model': model_data, 'artifact': artifact_data})
+        if res.status_code == 200 or res.status_code == 201:
+            return res.json()
+        elif not _is_unsupported(res):
+            raise OMLException(res.text)
+        self._set_unsupported(self.register_url)
+        return None
+
     @handle_response
     def get_artifacts(self, model_id=None, is_compliant=None, version=None, name=None):
+        url, params = self._get_artifacts_query(model_id, is_compliant, version, name)
+        return self._session.get(url, params=params)
+
+    def iter_artifacts(self, model_id=None, is_compliant=None, version=None, name=None, page_size=PAGE_SIZE):
+        """Yields the artifacts of a model, fetching them one page at a time."""
+        url, params = self._get_artifacts_query(model_id, is_compliant, version, name)
+        params.update({'limit': page_size, 'offset': 0})
+
+        previous = None
+        while True:
+            page = self._get_page(url, params)
+            # Guards against servers that ignore the offset
+            if page == previous:
+                return
+            yield from page
+            if len(page) != page_size:
+                return
+            params['offset'] += page_size
+            previous = page
+
+    @handle_response
+    def _get_page(self, url, params):
+        return self._session.get(url, params=params)
+
+    def _get_artifacts_query(self, model_id, is_compliant, version, name):
         if model_id is None and name is not None:
             models = self.get_model(name=name)
             model = next(iter(models), None)
@@ -55,7 +102,7 @@ class ApiHook:
             params.update({'version': version})
         if name is not None:
             params.update({'name': name})
-        return self._session.get(url, params=params)
+        return url, params
 
     @handle_response
     def create_deployment(self, data):
@@ -79,3 +126,38 @@ class ApiHook:
     @handle_response
     def update_deployment(self, job_id, status):
         return self._session.put(self.deployments_url, json={'status': status}, params={'job_id': job_id})
+
+    def update_deployments(self, updates):
+        """Updates the status of many deployment jobs in a single request.
+
+        Falls back to one request per job when the API does not expose the
+        bulk endpoint.
+
+        :param updates: dict of Platform API job id to status
+        """
+        if self._is_supported(self.bulk_deployments_url):
+            data = [{'job_id': job_id, 'status': status} for job_id, status in updates.items()]
+            res = self._session.put(self.bulk_deployments_url, json=data)
+            if res.status_code == 200 or res.status_code == 201:
+                return res.json()
+            elif not _is_unsupported(res):
+                raise OMLException(res.text)
+            self._set_unsupported(self.bulk_deployments_url)
+
+        return [self.update_deployment(job_id, status) for job_id, status in updates.items()]
+
+    def _is_supported(self, url):
+        """Whether url was not found missing recently, by this or a previous oml process."""
+        if self._unsupported is None:
+            self._unsupported = get_user_metadata().get(UNSUPPORTED_ENDPOINTS_KEY) or dict()
+        probed = self._unsupported.get(url)
+        return probed is None or time.time() - probed >= UNSUPPORTED_ENDPOINT_TTL
+
+    def _set_unsupported(self, url):
+        self._unsupported[url] = time.time()
+        update_user_metadata(UNSUPPORTED_ENDPOINTS_KEY, self._unsupported)
+
+
+def _is_unsupported(res):
+    """Whether the API does not expose the endpoint, rather than rejecting the request."""
+    return res.status_code in (404, 405, 501)
@@ -1,23 +1,55 @@
-import pkg_resources
+import atexit
+import json
+import os
 import platform
+import queue
+import threading
 
 from applicationinsights import TelemetryClient
+from applicationinsights.channel import SynchronousQueue, SynchronousSender, TelemetryChannel
 from datetime import datetime
-from oml.settings import APP_INSIGHTS_KEY, APP_INSIGHTS_EVENT_TITLE, USER_ID
+from oml.settings import config, ensure_app_cache_dir, TELEMETRY_SPOOL_FILE_PATH
+
+TELEMETRY_MODES = ('off', 'async', 'sync')
+MAX_QUEUE_SIZE = 200
+MAX_SPOOL_EVENTS = 100
+# Seconds the process waits at exit for the queued events to be sent before spooling them
+CLOSE_TIMEOUT = 1.0
+
+
+def get_telemetry_mode():
+    """Reads the telemetry mode from OML_TELEMETRY. Defaults to async."""
+    mode = os.environ.get('OML_TELEMETRY', 'async').lower()
+    return mode if mode in TELEMETRY_MODES else 'async'
 
 
 class AppInsightsHook:
 
-    def __init__(self):
-        self.tc = TelemetryClient(APP_INSIGHTS_KEY)
-        self.user_id = USER_ID
+    def __init__(self, endpoint=None):
+        import pkg_resources
+
+        self.mode = get_telemetry_mode()
+        if endpoint is not None:
+            channel = TelemetryChannel(queue=SynchronousQueue(SynchronousSender(endpoint)))
+            self.tc = TelemetryClient(config.app_insights_key, channel)
+        else:
+            self.tc = TelemetryClient(config.app_insights_key)
+        self.user_id = config.user_id
         self.app_version = pkg_resources.require('oml')[0].version
         self.python_version = platform.python_version()
         self.platform = platform.platform()
         self.timestamp = str(datetime.utcnow())
+        self.worker = None
+
+        if self.mode == 'async':
+            self.worker = TelemetryWorker(self.tc)
+            for event_data in read_spool():
+                self.worker.put(event_data)
 
     def track_event(self, event_type, action):
         """Sends Custom Event to Application Insights"""
+        if self.mode == 'off':
+            return
 
         event_data = {
             'user_id': self.user_id,
@@ -29,5 +61,128 @@ class AppInsightsHook:
             'timestamp': self.timestamp
         }
 
-        self.tc.track_event(APP_INSIGHTS_EVENT_TITLE, event_data)
+        if self.worker is not None:
+            self.worker.put(event_data)
+        else:
+            self.tc.track_event(config.app_insights_event_title, event_data)
+            self.tc.flush()
+
+    def flush(self, timeout=None):
+        """Blocks until the queued events are sent or the timeout expires."""
+        if self.worker is not None:
+            return self.worker.join(timeout)
         self.tc.flush()
+        return True
+
+
+class TelemetryWorker:
+    """Sends events from a bounded in-memory queue on a daemon thread.
+
+    Events are taken off the queue in batches of up to ``batch_size`` and sent
+    with a single flush of the telemetry client. When the process exits, the
+    queue is given ``CLOSE_TIMEOUT`` seconds to drain. Whatever is still
+    queued or in flight then is written to the spool file, to be replayed by
+    the next ``oml`` run, so an event caught mid-send may be delivered twice.
+    Events are dropped, not blocked on, when the queue is full.
+    """
+
+    def __init__(self, tc, max_queue_size=MAX_QUEUE_SIZE, batch_size=20):
+        self.tc = tc
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+        self._in_flight = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='oml-telemetry', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, event_data):
+        try:
+            self.queue.put_nowait(event_data)
+        except queue.Full:
+            self.dropped += 1
+
+    def join(self, timeout=None):
+        """Waits for the queue to drain. Returns False on timeout."""
+        done = threading.Event()
+
+        def wait():
+            self.queue.join()
+            done.set()
+
+        threading.Thread(target=wait, daemon=True).start()
+        return done.wait(timeout)
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Waits up to timeout seconds for the queue to drain, then stops sending and spools the unsent events."""
+        if not self._closed:
+            self.join(timeout)
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending = list(self._in_flight)
+        while True:
+            try:
+                pending.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        write_spool(pending)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self._lock:
+                if self._closed:
+                    # Taken off the queue after close spooled it
+                    write_spool(batch)
+                    return
+                self._in_flight = batch
+            for event_data in batch:
+                self.tc.track_event(config.app_insights_event_title, event_data)
+            self.tc.flush()
+            with self._lock:
+                self._in_flight = []
+            for _ in batch:
+                self.queue.task_done()
+
+
+def write_spool(events):
+    if not events:
+        return
+    try:
+        ensure_app_cache_dir()
+        with open(TELEMETRY_SPOOL_FILE_PATH, 'a') as f:
+            for event_data in events[-MAX_SPOOL_EVENTS:]:
+                f.write(json.dumps(event_data) + '\n')
+    except OSError:
+        pass
+
+
+def read_spool():
+    """Takes ownership of the spool file and returns the events in it."""
+    claimed_path = '{}.{}'.format(TELEMETRY_SPOOL_FILE_PATH, os.getpid())
+    try:
+        os.replace(TELEMETRY_SPOOL_FILE_PATH, claimed_path)
+    except OSError:
+        return []
+
+    events = []
+    try:
+        with open(claimed_path) as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+    finally:
+        os.remove(claimed_path)
+    return events[-MAX_SPOOL_EVENTS:]
@@ -1,9 +1,13 @@
 from oml.exceptions import OMLException
 from oml.hooks.api import ApiHook
+from oml.settings import PAGE_SIZE
 
 
 class ModelCatalogHook:
 
+    # Model ids by name, shared by the hooks of the process
+    _model_ids = {}
+
     def __init__(self, metadata=None, verbose=False):
         self.metadata = metadata
         self.api = ApiHook()
@@ -18,17 +22,7 @@ class ModelCatalogHook:
             'language': self.metadata['language'],
             'flavor': self.metadata['flavor']['name']
         }
-
-        model = self.get_model(name=model_data['name'])
-
-        if model is None:
-            new_model = self.api.create_model(model_data)
-            model_id = new_model['id']
-        else:
-            model_id = model['id']
-
         artifact_data = {
-            'model_id': model_id,
             'version': version,
             'type': artifact_type,
             'path': path,
@@ -36,7 +30,21 @@ class ModelCatalogHook:
             'platform': self.metadata['platform'],
             'is_compliant': is_compliant
         }
-        self.api.create_artifact(artifact_data)
+
+        artifact = self.api.register_artifact(model_data, artifact_data)
+        if artifact is not None:
+            self._model_ids[model_data['name']] = artifact['model_id']
+            return artifact
+
+        # The API has no upsert endpoint, create the model and artifact separately
+        model_id = self._get_model_id(model_data['name'])
+        if model_id is None:
+            new_model = self.api.create_model(model_data)
+            model_id = new_model['id']
+            self._model_ids[model_data['name']] = model_id
+
+        artifact_data['model_id'] = model_id
+        return self.api.create_artifact(artifact_data)
 
     def create_deployment(self, artifact_id, job_id, job_type, status='queued'):
         """Tracking model deployment workflow.
@@ -58,15 +66,61 @@ class ModelCatalogHook:
     def update_deployment(self, job_id, status):
         self.api.update_deployment(job_id, status)
 
+    def sync_deployments(self, job_type, statuses, model_name=None):
+        """Sends the job statuses seen on the platform that differ from the catalog's.
+
+        The catalog's statuses are fetched for the jobs of model_name's
+        artifacts only, rather than every job of the type. Jobs the catalog
+        does not track are left out. Without model_name every status is sent.
+
+        :param job_type: Type of jobs. Allowed values: 'test' and 'deployment'
+        :param statuses: dict of Platform API job id to status
+        :param model_name: Name of the model the jobs belong to
+        :return: dict of the job statuses that were sent
+        """
+        if statuses and model_name is not None:
+            known = self._get_job_statuses(job_type, model_name)
+            statuses = {job_id: status for job_id, status in statuses.items()
+                        if known.get(str(job_id), status) != status}
+        if not statuses:
+            return {}
+        self.api.update_deployments(statuses)
+        return statuses
+
+    def _get_job_statuses(self, job_type, model_name):
+        """Returns the catalog's status of every job of the type of the model's artifacts, by job id."""
+        model_id = self._get_model_id(model_name)
+        if model_id is None:
+            return {}
+        known = {}
+        for artifact in self.api.iter_artifacts(model_id):
+            for job in self.api.get_deployment_jobs(job_type, artifact['id']):
+                known[str(job['job_id'])] = job['status']
+        return known
+
     def list(self, model_name=None):
         if model_name is None:
             model_name = self.metadata['name']
 
-        return self.api.get_artifacts(name=model_name)
+        return self.api.get_artifacts(self._get_model_id(model_name), name=model_name)
+
+    def iter_list(self, model_name=None, page_size=PAGE_SIZE):
+        if model_name is None:
+            model_name = self.metadata['name']
+
+        return self.api.iter_artifacts(self._get_model_id(model_name), name=model_name, page_size=page_size)
 
     def get_model(self, name):
         models = self.api.get_model(name=name)
-        return next(iter(models), None)
+        model = next(iter(models), None)
+        if model is not None:
+            self._model_ids[name] = model['id']
+        return model
+
+    def _get_model_id(self, name):
+        if name not in self._model_ids:
+            self.get_model(name)
+        return self._model_ids.get(name)
 
     def get_model_artifacts(self, model_id, is_compliant=None, version=None):
         return self.api.get_artifacts(model_id, is_compliant, version)
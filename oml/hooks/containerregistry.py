@@ -1,9 +1,8 @@
-from azure.mgmt.containerregistry import ContainerRegistryManagementClient, models
-
-
 class ContainerRegistryHook:
 
     def create_registry(self, auth, name, resource_group, location, subscription_id, admin_user_enabled):
+        from azure.mgmt.containerregistry import ContainerRegistryManagementClient, models
+
         client = ContainerRegistryManagementClient(auth, subscription_id)
         registry = models.Registry(sku=models.Sku(name="Standard"),
                                    location=location,
@@ -11,5 +10,7 @@ class ContainerRegistryHook:
         return client.registries.create(resource_group, name, registry, subscription_id=subscription_id).result()
 
     def delete_registry(self, auth, name, resource_group, subscription_id):
+        from azure.mgmt.containerregistry import ContainerRegistryManagementClient
+
         client = ContainerRegistryManagementClient(auth, subscription_id)
         return client.registries.delete(resource_group, name).result()
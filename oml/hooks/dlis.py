@@ -1,19 +1,16 @@
-import requests
-
 from oml.exceptions import OMLException
-from oml.settings import API_ENDPOINT, DLIS_API_ENDPOINT
-from oml.util import auth
+from oml.settings import config, PAGE_SIZE
+from oml.util import auth, http
 
 
 class DLISHook:
 
     def __init__(self):
-        self.tests_url = '/'.join([DLIS_API_ENDPOINT, 'dlis', 'tests'])
-        self.deployments_url = '/'.join([DLIS_API_ENDPOINT, 'dlis', 'deployments'])
-        self.active_models_url = '/'.join([DLIS_API_ENDPOINT, 'dlis', 'activemodels'])
-        token = auth.get_token(API_ENDPOINT)
-        self._session = requests.Session()
-        self._session.headers.update({'Authorization': 'Bearer {}'.format(token['accessToken'])})
+        dlis_endpoint = '/'.join([config.dlis_api_endpoint, 'dlis'])
+        self.tests_url = '/'.join([dlis_endpoint, 'tests'])
+        self.deployments_url = '/'.join([dlis_endpoint, 'deployments'])
+        self.active_models_url = '/'.join([dlis_endpoint, 'activemodels'])
+        self._session = http.Client(auth=auth.BearerAuth(config.api_endpoint), cache_scope=dlis_endpoint)
 
     def get_tests(self, id=None, filter=None):
         if filter is not None:
@@ -30,6 +27,10 @@ class DLISHook:
         else:
             self._raise_exception_with_suggestions(res)
 
+    def iter_tests(self, filter=None, page_size=PAGE_SIZE):
+        """Yields matching tests, newest first, fetching them one page at a time."""
+        return self._iter_pages(self.tests_url, filter, page_size)
+
     def create_test(self, data):
         res = self._session.post(self.tests_url, json=data)
         if res.status_code == 200:
@@ -53,6 +54,10 @@ class DLISHook:
         else:
             self._raise_exception_with_suggestions(res)
 
+    def iter_deployments(self, filter=None, page_size=PAGE_SIZE):
+        """Yields matching deployments, newest first, fetching them one page at a time."""
+        return self._iter_pages(self.deployments_url, filter, page_size)
+
     def create_deployment(self, data):
         res = self._session.post(self.deployments_url, json=data)
 
@@ -75,6 +80,36 @@ class DLISHook:
         else:
             self._raise_exception_with_suggestions(res)
 
+    def _iter_pages(self, url, filter, page_size):
+        if filter is not None:
+            params = self._get_odata_filter(filter)
+        else:
+            params = {'$orderby': 'StartTime desc'}
+        params.update({'$top': page_size, '$skip': 0})
+
+        previous = None
+        while True:
+            res = self._session.get(url, params=params)
+            if res.status_code != 200:
+                self._raise_exception_with_suggestions(res)
+
+            # Either a plain array or an OData envelope with a continuation link
+            page, next_link = res.json(), None
+            if isinstance(page, dict):
+                page, next_link = page.get('value', []), page.get('@odata.nextLink')
+            # Guards against servers that ignore $skip
+            if page == previous:
+                return
+            yield from page
+
+            if next_link is not None:
+                url, params = next_link, None
+            elif params is not None and len(page) == page_size:
+                params['$skip'] += page_size
+            else:
+                return
+            previous = page
+
     @staticmethod
     def _get_odata_filter(filter):
         where = []
@@ -1,13 +1,13 @@
 import os
 
 from git import Repo, RemoteProgress, InvalidGitRepositoryError, GitCommandError
-from oml.settings import load_model_metadata, GIT_REPOSITORY_URL
+from oml.settings import config, load_model_metadata
 
 
 class GitRepositoryHook:
 
     def __init__(self):
-        self.remote_url = GIT_REPOSITORY_URL
+        self.remote_url = config.git_repository_url
 
     def push_model(self, path):
         """Checkout branch with model name, commit and push to remote."""
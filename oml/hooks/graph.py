@@ -1,6 +1,4 @@
-import requests
-
-from oml.util import auth
+from oml.util import auth, http
 from oml.util.requests import handle_response
 
 
@@ -8,9 +6,7 @@ class GraphHook:
 
     def __init__(self):
         endpoint = 'https://graph.microsoft.com'
-        token = auth.get_token(endpoint)
-        self._session = requests.Session()
-        self._session.headers.update({'Authorization': 'Bearer {}'.format(token['accessToken'])})
+        self._session = http.Client(auth=auth.BearerAuth(endpoint))
         self.users_endpoint = '/'.join([endpoint, 'beta', 'users'])
 
     @handle_response
@@ -1,13 +1,14 @@
 import base64
 import re
 
-from azure.keyvault.secrets import SecretClient
 from urllib.parse import urlparse
 
 
 class KeyVaultHook:
 
     def get_private_key(self, cert_url, credentials):
+        from azure.keyvault.secrets import SecretClient
+
         url_parts = urlparse(cert_url)
         vault_url = "https://{}".format(url_parts.netloc)
 
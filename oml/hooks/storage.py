@@ -1,15 +1,16 @@
-from azure.storage.common import TokenCredential
-from azure.storage.blob import BlockBlobService
-from oml.settings import STORAGE_ACCOUNT, STORAGE_ENDPOINT
+from oml.settings import config
 from oml.util import auth
 
 
 class AzureStorageHook:
 
     def __init__(self):
+        from azure.storage.common import TokenCredential
+        from azure.storage.blob import BlockBlobService
+
         # https://docs.microsoft.com/en-us/azure/storage/common/storage-auth-aad-app
-        token = TokenCredential(auth.get_token(STORAGE_ENDPOINT))
-        self.blob_service = BlockBlobService(STORAGE_ACCOUNT, token_credential=token['accessToken'])
+        token = TokenCredential(auth.get_token(config.storage_endpoint))
+        self.blob_service = BlockBlobService(config.storage_account, token_credential=token['accessToken'])
 
     def upload(self, container_name, blob_name, local_file_path):
         if not self.blob_service.exists(container_name):
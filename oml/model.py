@@ -1,29 +1,17 @@
 import os
-import pkg_resources
-import requests
 import shutil
 import uuid
 
-from requests.exceptions import ConnectionError
-
 from oml.exceptions import OMLException
-from oml.hooks.catalog import ModelCatalogHook
-from oml.hooks.adls import AzureDataLakeStoreHook
-from oml.models.csharp import CSharpModel
-from oml.models.python import PythonModel
 from oml.settings import (
+    config,
     load_model_metadata,
     update_model_metadata,
-    DLIS_ADLS_MODEL_STORE,
-    DLIS_ADLS_MODEL_STORE_NAME,
-    DLIS_COSMOS_ADLS_MODEL_STORE_NAME,
-    DLIS_COSMOS_ADLS_MODEL_STORE_HTTP,
     MODEL_META_FILENAME,
     PYTHON_LANG,
     CSHARP_LANG)
 from oml.settings import find_base_path
 from oml.util.version import increment
-from oml.util.pipeline import is_running_in_pipeline
 
 
 class Model:
@@ -44,14 +32,20 @@ class Model:
         self.verbose = verbose
 
     def list_artifacts(self, model_name):
+        from oml.hooks.catalog import ModelCatalogHook
         catalog = ModelCatalogHook(self.metadata)
         return catalog.list(model_name)
 
+    def iter_artifacts(self, model_name, page_size):
+        from oml.hooks.catalog import ModelCatalogHook
+        catalog = ModelCatalogHook(self.metadata)
+        return catalog.iter_list(model_name, page_size)
+
     def eval(self):
         self.model.eval()
 
-    def serve(self, port=8000):
-        self.model.serve(port)
+    def serve(self, port=8000, workers=1, threads=1, server='wsgiref', warmup=False):
+        self.model.serve(port, workers, threads, server, warmup)
 
     def test(
             self,
@@ -59,38 +53,29 @@ class Model:
             path=None,
             delimiter='\t',
             endpoint='http://localhost:8000',
-            verbose=False):
+            verbose=False,
+            concurrency=1,
+            timeout=30.0,
+            retries=2):
         if mode == 'live':
-            counter = 0
-            err = []
-            is_ok = True
-            if path is not None and not os.path.exists(path):
+            from oml.util.loadtest import LoadTest, read_cases
+
+            if path is None:
+                raise OMLException('File path is required in live mode.')
+            if not os.path.exists(path):
                 raise FileExistsError('File not found.')
 
-            with open(path, 'r') as f:
-                for line in f:
-                    result = ''
-                    counter += 1
-                    input, output = line.strip().split(delimiter)
-
-                    try:
-                        r = requests.post(endpoint, input)
-                        result = r.text
-                    except ConnectionError:
-                        err.append('[Error] Failed to connect {}'.format(endpoint))
-                        is_ok = False
-                        break
-
-                    if output != result:
-                        err.append('[Error] Line {}: Expected={} Actual={}'.format(counter, output, result))
-                        is_ok = False
-            if is_ok:
-                print('{} test executed: PASSED.'.format(counter))
-            else:
-                print('{} test executed: FAILED.'.format(counter))
-                if verbose:
-                    for e in err:
-                        print(e)
+            with LoadTest(endpoint, concurrency, timeout, retries) as load_test:
+                report = load_test.run(read_cases(path, delimiter))
+
+            stats = report.to_dict()
+            print('{} test executed: {}.'.format(report.total, 'PASSED' if report.ok else 'FAILED'))
+            print('Passed: {passed}, failed: {failed}, {throughput} req/s at concurrency {concurrency}.'.format(
+                **stats))
+            print('Latency p50/p95/p99: {p50}/{p95}/{p99} ms.'.format(**stats['latency_ms']))
+            if verbose:
+                for failure in report.failures:
+                    print('[Error] Line {}: {}'.format(failure.line, failure.error))
         elif mode == 'offline':
             self.model.test()
 
@@ -114,6 +99,10 @@ class Model:
 
     def publish(self, storage, datasource_id=None, version=None,
             increment_type='patch', is_compliant=None):
+        import pkg_resources
+        from oml.hooks.catalog import ModelCatalogHook
+        from oml.util.pipeline import is_running_in_pipeline
+
         if version is None:
             version = self.model_version
 
@@ -153,17 +142,18 @@ class Model:
 
         unique_id = str(uuid.uuid4())[:5]
         dest = '{}/{}/{}/{}'.format('models', self.model_name, version, unique_id)
-        self._publish_adls(DLIS_ADLS_MODEL_STORE_NAME, dest)
-        return '{}/{}/'.format(DLIS_ADLS_MODEL_STORE, dest)
+        self._publish_adls(config.dlis_adls_model_store_name, dest)
+        return '{}/{}/'.format(config.dlis_adls_model_store, dest)
 
     def _publish_cosmos_adls(self, version):
         unique_id = str(uuid.uuid4())[:5]
         dest = '{}/{}/{}/{}/{}'.format('local', 'omlmodels', self.model_name, version, unique_id)
-        self._publish_adls(DLIS_COSMOS_ADLS_MODEL_STORE_NAME, dest)
+        self._publish_adls(config.dlis_cosmos_adls_model_store_name, dest)
         # We upload to ADLS behind DLIS Cosmos store, but we return the Cosmos path for accessing it later
-        return '{}/{}/'.format(DLIS_COSMOS_ADLS_MODEL_STORE_HTTP, dest)
+        return '{}/{}/'.format(config.dlis_cosmos_adls_model_store_http, dest)
 
     def _publish_adls(self, store_name, dest):
+        from oml.hooks.adls import AzureDataLakeStoreHook
         try:
             adls = AzureDataLakeStoreHook(store_name)
             adls.upload(self.package_dir_path, dest)
@@ -171,7 +161,9 @@ class Model:
             raise OMLException('Something is wrong. ADLS upload failed. Error details: {}'.format(e))
 
     def _load_model(self):
+        # Language models pull in bottle, jinja2 and friends; import on demand
         if self.language == PYTHON_LANG:
+            from oml.models.python import PythonModel
             return PythonModel(
                 self.model_name,
                 self.model_version,
@@ -180,6 +172,7 @@ class Model:
                 self.package_dir_path,
                 self.proj_dir_path)
         elif self.language == CSHARP_LANG:
+            from oml.models.csharp import CSharpModel
             return CSharpModel(
                 self.model_name,
                 self.base_path,
@@ -8,7 +8,7 @@ class BaseModel(ABC):
         pass
 
     @abstractmethod
-    def serve(self, port):
+    def serve(self, port, workers=1, threads=1, server='wsgiref', warmup=False):
         pass
 
     @abstractmethod
@@ -1,10 +1,11 @@
 import os
 import shutil
+import time
 
-from bottle import post, request, response, run
 from distutils.dir_util import copy_tree
 from shutil import copyfile
 
+from oml.exceptions import OMLException
 from oml.models import BaseModel
 from oml.settings import TEMPLATE_PLATFORM_DIR_PATH, SCORE_FILENAME, CSHARP_LANG
 from oml.util.shell import exec_dotnet, exec_nuget, run_shell
@@ -51,19 +52,34 @@ class CSharpModel(BaseModel):
         dest = os.path.join(self.base_path, SCORE_FILENAME)
         copyfile(src, dest)
 
-    def serve(self, port):
+    def serve(self, port, workers=1, threads=1, server='wsgiref', warmup=False):
+        from bottle import Bottle, request, response
+        from oml.util import wsgi
+        from oml.util.worker import WorkerPool
+
+        if server == 'prefork':
+            raise OMLException('c# models already run --workers model processes. Use --server threaded instead.')
+
+        # Keep the model loaded in long-lived processes instead of starting the exe per request
+        pool = WorkerPool([self.exe_path, 'serve-stdio'], size=workers)
+        app = Bottle()
+
+        @app.post('/')
         def handler():
             data = request.body.read().decode('utf-8')
             response.content_type = 'text/plain'
-            cmd = [self.exe_path, 'predict', data]
-            res = run_shell(cmd, capture_output=True)
-            return res.rstrip()
+            return pool.predict(data).rstrip()
 
         self._build_project(self.sln_path)
         print("""To use the server, run the following command from another shell:
             curl http://localhost:{} --data \"test input here\"""".format(port))
-        post('/')(handler)
-        run(host='localhost', port=port)
+        start = time.perf_counter()
+        with pool:
+            if warmup:
+                from oml.util.warmup import validate
+                # As many requests at once as the server sends to the pool
+                validate(self.base_path, pool.predict, time.perf_counter() - start, wsgi.concurrency(server, threads))
+            wsgi.serve(app, 'localhost', port, server, threads=threads)
 
     def test(self):
         self._build_project(self.sln_path)
@@ -1,17 +1,22 @@
+import json
 import os
 import shutil
 import sys
 import platform
+import time
 
-from bottle import post, request, response, run
 from distutils.dir_util import copy_tree
-from jinja2 import Environment, FileSystemLoader
 from importlib.util import spec_from_file_location, module_from_spec
 from shutil import copytree, ignore_patterns
 
 from oml.exceptions import OMLException
 from oml.models import BaseModel
-from oml.settings import MODEL_FILENAME, TEMPLATE_PLATFORM_DIR_PATH, PYTHON_LANG
+from oml.settings import (
+    load_model_metadata,
+    MODEL_FILENAME,
+    SERVING_CONFIG_FILENAME,
+    TEMPLATE_PLATFORM_DIR_PATH,
+    PYTHON_LANG)
 from oml.util.shell import run_shell
 from oml.util.zip import archive
 from oml.util.manifest import create_manifest
@@ -40,9 +45,19 @@ class PythonModel(BaseModel):
         model = self._load_model()
         model.eval()
 
-    def serve(self, port):
+    def serve(self, port, workers=1, threads=1, server='wsgiref', warmup=False):
+        from bottle import Bottle, request, response
+        from oml.util import wsgi
+
+        start = time.perf_counter()
         model = self._load_model()
+        if warmup:
+            # Before prefork forks, so every worker shares the warm model
+            from oml.util.warmup import validate
+            validate(self.base_path, model.predict, time.perf_counter() - start, wsgi.concurrency(server, threads))
+        app = Bottle()
 
+        @app.post('/')
         def handler():
             data = request.body.read().decode('utf-8')
             response.content_type = 'text/plain'
@@ -50,8 +65,7 @@ class PythonModel(BaseModel):
 
         print("""To use the server, run the following command from another shell:
             curl http://localhost:{} --data \"test input here\"""".format(port))
-        post('/')(handler)
-        run(host='localhost', port=port)
+        wsgi.serve(app, 'localhost', port, server, workers, threads)
 
     def test(self):
         os.chdir(self.base_path)
@@ -87,21 +101,28 @@ class PythonModel(BaseModel):
         return os.path.exists(model_manifest_path)
 
     def _load_model(self):
+        return self._load_model_class()(self.data_dir_path)
+
+    def _load_model_class(self):
         sys.path.append(self.base_path)
         path = os.path.join(self.proj_dir_path, MODEL_FILENAME)
         spec = spec_from_file_location('{}.model'.format(self.model_name), path)
         mod = module_from_spec(spec)
         spec.loader.exec_module(mod)
-        return mod.Model(self.data_dir_path)
+        return mod.Model
 
     def _package_platform(self, platform_name, skip_archive):
+        from jinja2 import Environment, FileSystemLoader
+
         if platform.system() != 'Windows':
             raise OMLException('OS is not supported: {}'.format(platform.system()))
 
         # Copy static files
         template_dir_path = os.path.join(TEMPLATE_PLATFORM_DIR_PATH, platform_name, PYTHON_LANG)
         copytree(template_dir_path, self.model_package_dir_path, ignore=ignore_patterns('tpl_*'))
+        copy_tree(os.path.join(TEMPLATE_PLATFORM_DIR_PATH, 'common', PYTHON_LANG), self.model_package_dir_path)
         copy_tree(self.data_dir_path, os.path.join(self.model_package_dir_path, 'data'))
+        self._save_serving_config()
 
         # Generate code based on template
         env = Environment(loader=FileSystemLoader(template_dir_path), autoescape=True)
@@ -119,6 +140,35 @@ class PythonModel(BaseModel):
 
         # Package Conda environment
         self._package_conda(skip_archive)
+        self._prepare_package_data()
+
+    def _prepare_package_data(self):
+        """
+        Runs the model's prepare_package hook on the packaged data. The hook runs
+        in the model's conda environment, which has the model's dependencies,
+        rather than importing the model into the CLI.
+        """
+        python_path = os.path.join(self.conda_package_path, 'python.exe')
+        if not os.path.exists(python_path):
+            print('[Warning] {} not found, skipping the prepare_package hook.'.format(python_path))
+            return
+        # Models generated before the hook existed have no prepare_package
+        script = '\n'.join([
+            'import sys',
+            'from {}.model import Model'.format(self.model_name),
+            "prepare_package = getattr(Model, 'prepare_package', None)",
+            'if prepare_package is not None:',
+            '    prepare_package(sys.argv[1])'])
+        try:
+            run_shell([python_path, '-c', script, os.path.join(self.model_package_dir_path, 'data')])
+        except Exception:
+            raise OMLException('The model\'s prepare_package hook failed.')
+
+    def _save_serving_config(self):
+        # The serving code has no yaml parser, so pass it the oml.yml settings as JSON
+        serving_config = load_model_metadata(self.base_path).get('serving') or {}
+        with open(os.path.join(self.model_package_dir_path, 'code', SERVING_CONFIG_FILENAME), 'w') as f:
+            json.dump(serving_config, f)
 
     def _package_conda(self, skip_archive):
         os.chdir(self.base_path)
@@ -8,6 +8,7 @@ from oml.settings import (
     load_model_metadata,
     TEST_JOB_TYPE,
     DEPLOYMENT_JOB_TYPE,
+    PAGE_SIZE,
     PYTHON_LANG,
     CSHARP_LANG)
 from oml.util import pipeline
@@ -24,6 +25,8 @@ class DlisApi:
             self.metadata = None
         self.client = DLISHook()
         self.catalog = ModelCatalogHook(self.metadata)
+        # Job statuses seen by get/list by resource and model name, synced to the catalog by sync_statuses
+        self.pending_statuses = {}
 
     def get(self, resource, job_id=None):
         result = None
@@ -42,11 +45,14 @@ class DlisApi:
             if job_id is None and len(result) > 0:
                 result = result[0]
             if 'Status' in result:
-                self.catalog.update_deployment(job_id, result['Status'].lower())
+                self._track_status(resource, result.get('ModelName'), result.get('ID', job_id), result['Status'])
         return result
 
     def list(self, resource, model_name=None, owner=None, status=None):
-        jobs = []
+        return list(self.iter_list(resource, model_name, owner, status))
+
+    def iter_list(self, resource, model_name=None, owner=None, status=None, page_size=PAGE_SIZE):
+        """Yields the user's jobs as they are fetched, one page at a time."""
         filters = {}
 
         model = self._get_model_info(model_name)
@@ -62,14 +68,15 @@ class DlisApi:
             filters['DRI'] = model['owner'].split('\\')[1]
 
         if resource == TEST_JOB_TYPE:
-            result = self.client.get_tests(filter=filters)
+            result = self.client.iter_tests(filter=filters, page_size=page_size)
         elif resource == DEPLOYMENT_JOB_TYPE:
-            result = self.client.get_deployments(filter=filters)
+            result = self.client.iter_deployments(filter=filters, page_size=page_size)
+        else:
+            return
 
-        if result is None:
-            return None
         for p in result:
-            jobs.append({
+            self._track_status(resource, p['ModelName'], p['ID'], p['Status'])
+            yield {
                 'id': p['ID'],
                 'model_name': p['ModelName'],
                 'start_time': p['StartTime'],
@@ -78,9 +85,21 @@ class DlisApi:
                 'namespace': p['Namespace'] if 'Namespace' in p else None,
                 'is_compliant': p['IsCompliant'] if 'IsCompliant' in p else None,
                 'error': p['Error'] if p['Error'] is None else '{}...'.format(p['Error'][:50])
-            })
-            self.catalog.update_deployment(p['ID'], p['Status'].lower())
-        return jobs
+            }
+
+    def sync_statuses(self):
+        """Sends the job statuses seen since the last sync to the model catalog.
+
+        Only the statuses that differ from the catalog's are sent, in one
+        request per resource type and model. Call it after the results have
+        been displayed.
+        """
+        pending, self.pending_statuses = self.pending_statuses, {}
+        for (resource, model_name), statuses in pending.items():
+            self.catalog.sync_deployments(resource, statuses, model_name)
+
+    def _track_status(self, resource, model_name, job_id, status):
+        self.pending_statuses.setdefault((resource, model_name), {})[job_id] = status.lower()
 
     def _get_configuration(self, command):
         """Get custom default configs from oml.yml file."""
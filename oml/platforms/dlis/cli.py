@@ -2,11 +2,11 @@ import click
 import json
 import os
 
+from itertools import islice
 from oml.context import pass_context
 from oml.model import Model
 from oml.platforms.dlis import DlisApi
-from oml.settings import TEST_JOB_TYPE, DEPLOYMENT_JOB_TYPE
-from prettytable import PrettyTable
+from oml.settings import TEST_JOB_TYPE, DEPLOYMENT_JOB_TYPE, PAGE_SIZE
 
 
 @click.group('dlis')
@@ -31,6 +31,7 @@ def show(ctx, resource, id):
             ctx.log(json.dumps(result, indent=2))
         else:
             ctx.log('Not found. Please check that you specified the right resource type.')
+        client.sync_statuses()
     except Exception as e:
         ctx.tracker.track_event('exception', 'dlis_show')
         ctx.error_log(e)
@@ -43,32 +44,37 @@ def show(ctx, resource, id):
 @click.option('-n', '--model-name', help='Model name.')
 @click.option('-o', '--owner', help='Model owner name.')
 @click.option('-s', '--status', help='Task status.')
+@click.option('--limit', type=click.IntRange(min=1), help='Maximum number of tasks to list.')
+@click.option('--page-size', type=click.IntRange(min=1), default=PAGE_SIZE, show_default=True,
+    help='Tasks fetched per request.')
+@click.option('--format', 'output_format', type=click.Choice(['table', 'jsonl']), default='table',
+    show_default=True, help='Output format. jsonl prints each task as soon as it is fetched.')
 @pass_context
-def list(ctx, resource, model_name, owner, status):
+def list(ctx, resource, model_name, owner, status, limit, page_size, output_format):
     """List user tests or deployments."""
     try:
         ctx.tracker.track_event('command', 'dlis_list')
         client = DlisApi()
-        result = client.list(resource, model_name, owner, status)
-
-        if result:
-            tbl = PrettyTable([
-                'ID', 'Model Name', 'Start Time',
-                'End Time', 'Status', 'Namespace', 'Is Compliant', 'Error'], align='l')
-            for row in result:
-                tbl.add_row([
-                    row['id'],
-                    row['model_name'],
-                    row['start_time'],
-                    row['end_time'],
-                    row['status'],
-                    row['namespace'],
-                    row['is_compliant'],
-                    row['error']])
-            ctx.log(tbl)
-            ctx.log('{} {}(s) found.'.format(len(result), resource))
-        else:
-            ctx.log('No {}s found.'.format(resource))
+        if limit is not None:
+            page_size = min(page_size, limit)
+        rows = islice(client.iter_list(resource, model_name, owner, status, page_size), limit)
+        count = ctx.log_rows(rows, [
+            'ID', 'Model Name', 'Start Time',
+            'End Time', 'Status', 'Namespace', 'Is Compliant', 'Error'], lambda row: [
+                row['id'],
+                row['model_name'],
+                row['start_time'],
+                row['end_time'],
+                row['status'],
+                row['namespace'],
+                row['is_compliant'],
+                row['error']], output_format)
+        if output_format == 'table':
+            if count > 0:
+                ctx.log('{} {}(s) found.'.format(count, resource))
+            else:
+                ctx.log('No {}s found.'.format(resource))
+        client.sync_statuses()
     except Exception as e:
         ctx.tracker.track_event('exception', 'dlis_list')
         ctx.error_log(e)
@@ -97,13 +103,21 @@ def list(ctx, resource, model_name, owner, status):
     help='Whether to use AVX2. Can be set in oml.yml. Default: False')
 @click.option('--env-vars',
     help='Environment variables to use, separated with semicolon in NAME=value format. Can be set in oml.yml')
+@click.option('--bench-file', type=click.Path(exists=True, dir_okay=False),
+    help='Result of `oml bench --output`. Its maximum sustainable QPS and CPU cores are used '
+    'when --qps or --cpu-cores is not set.')
 @pass_context
 def test(ctx, model_name, model_version, model_type, artifact_uri, test_query_uri, platform_type,
         timeout_in_ms, max_query_size_in_bytes, qps, waiting_model_ready_in_min, cpu_cores,
-        memory_usage_in_mb, gpu_devices, fpga_devices, use_avx2, env_vars):
+        memory_usage_in_mb, gpu_devices, fpga_devices, use_avx2, env_vars, bench_file):
     """Run test in Polaris."""
     try:
         ctx.tracker.track_event('command', 'dlis_test')
+        if bench_file:
+            from oml.util.bench import load_result
+            bench = load_result(bench_file)
+            qps = qps or int(bench['max_sustainable_qps']) or None
+            cpu_cores = cpu_cores or bench.get('cpu_cores')
         client = DlisApi()
         guid = client.test(
             model_name=model_name,
@@ -1,6 +1,6 @@
 import os
+import threading
 import uuid
-import yaml
 
 from pathlib import Path
 
@@ -16,65 +16,154 @@ TEMPLATE_LANG_DIR_PATH = os.path.join(TEMPLATE_BASE_PATH, 'languages')
 TEMPLATE_PLATFORM_DIR_PATH = os.path.join(TEMPLATE_BASE_PATH, 'platforms')
 TEMPLATE_ADDONS_DIR_PATH = os.path.join(TEMPLATE_BASE_PATH, 'addons')
 
-# CONFIG FILE
-conf_filename = 'conf.yml'
-if os.environ.get('ENVIRONMENT') == 'dev':
-    conf_filename = 'conf.dev.yml'
-CONF_FILE_PATH = os.path.join(PACKAGE_BASE_PATH, os.path.join('conf', conf_filename))
-
 # CACHE
 APP_CACHE_DIR_PATH = os.path.join(os.path.expanduser('~'), '.oml')
 ADLS_TOKEN_FILE_PATH = os.path.join(APP_CACHE_DIR_PATH, 'token.yml')
 ADAL_TOKEN_FILE_PATH = os.path.join(APP_CACHE_DIR_PATH, 'accessTokens.json')
 METADATA_FILE_PATH = os.path.join(APP_CACHE_DIR_PATH, 'metadata.yml')
+TELEMETRY_SPOOL_FILE_PATH = os.path.join(APP_CACHE_DIR_PATH, 'telemetry.spool')
+HTTP_CACHE_DIR_PATH = os.path.join(APP_CACHE_DIR_PATH, 'cache')
+MANIFEST_CACHE_DIR_PATH = os.path.join(APP_CACHE_DIR_PATH, 'manifests')
 
 MODEL_FILENAME = 'model.py'
 MODEL_META_FILENAME = 'oml.yml'
 SCORE_FILENAME = '.score'
+# Serving settings from oml.yml, as read by the packaged serving code
+SERVING_CONFIG_FILENAME = 'serving.json'
 PYTHON_LANG = 'python'
 CSHARP_LANG = 'c#'
 TEST_JOB_TYPE = 'test'
 DEPLOYMENT_JOB_TYPE = 'deployment'
+# Records fetched per request by paginated listings
+PAGE_SIZE = 100
+
+
+def get_conf_file_path():
+    conf_filename = 'conf.yml'
+    if os.environ.get('ENVIRONMENT') == 'dev':
+        conf_filename = 'conf.dev.yml'
+    return os.path.join(PACKAGE_BASE_PATH, 'conf', conf_filename)
+
+
+class Settings:
+    """OML configuration, loaded on first access.
+
+    Importing this module does no I/O. ``conf.yml`` is parsed and the user id
+    is read from (or written to) ``metadata.yml`` the first time a value is
+    needed, and the result is cached for the life of the process. Use
+    :meth:`reload` to read the files again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cfg = None
+        self._user_id = None
+
+    def reload(self):
+        with self._lock:
+            self._cfg = None
+            self._user_id = None
 
-# Create local cache directory if not exists
-if not os.path.exists(APP_CACHE_DIR_PATH):
-    os.makedirs(APP_CACHE_DIR_PATH, exist_ok=True)
+    @property
+    def cfg(self):
+        if self._cfg is None:
+            with self._lock:
+                if self._cfg is None:
+                    import yaml
 
-# Load UUID from local cache
-USER_ID = None
-if os.path.exists(METADATA_FILE_PATH):
-    with open(METADATA_FILE_PATH, 'r') as f:
-        metadata = yaml.safe_load(f)
-        USER_ID = metadata['user_id']
-else:
-    USER_ID = str(uuid.uuid4())
-    data = {'user_id': USER_ID}
-    with open(METADATA_FILE_PATH, 'w') as f:
-        yaml.dump(data, stream=f, default_flow_style=False)
-
-# Load configurations from config file
-with open(CONF_FILE_PATH, 'r') as f:
-    cfg = yaml.safe_load(f)
-
-CLIENT_ID = cfg['app']['omlcli-client-id']
-TENANT_ID = cfg['app']['tenant-id']
-AUTHORITY_URI = 'https://login.microsoftonline.com/' + TENANT_ID
-
-MODEL_STORE_ADLS_NAME = cfg['azure']['data-lake-storage']['name']
-DLIS_ADLS_MODEL_STORE = cfg['dlis']['model-store']['adls']['uri']
-DLIS_ADLS_MODEL_STORE_NAME = cfg['dlis']['model-store']['adls']['store-name']
-DLIS_COSMOS_ADLS_MODEL_STORE = cfg['dlis']['model-store']['cosmos-adls']['uri']
-DLIS_COSMOS_ADLS_MODEL_STORE_NAME = cfg['dlis']['model-store']['cosmos-adls']['store-name']
-DLIS_COSMOS_ADLS_MODEL_STORE_HTTP = cfg['dlis']['model-store']['cosmos-adls']['public']
-DLIS_API_ENDPOINT = cfg['dlis']['api']['uri']
-DLIS_COSMOS_MODEL_STORE = cfg['dlis']['model-store']['cosmos']['uri']['private']
-DLIS_COSMOS_MODEL_STORE_HTTP = cfg['dlis']['model-store']['cosmos']['uri']['public']
-GIT_REPOSITORY_URL = cfg['git-repository']['uri']
-APP_INSIGHTS_KEY = cfg['azure']['application-insights']['instrumentation-key']
-APP_INSIGHTS_EVENT_TITLE = cfg['azure']['application-insights']['event-title']
-STORAGE_ENDPOINT = cfg['azure']['storage']['uri']
-STORAGE_ACCOUNT = cfg['azure']['storage']['account']
-API_ENDPOINT = cfg['azure']['api']['uri']
+                    with open(get_conf_file_path(), 'r') as f:
+                        self._cfg = yaml.safe_load(f)
+        return self._cfg
+
+    @property
+    def user_id(self):
+        if self._user_id is None:
+            with self._lock:
+                if self._user_id is None:
+                    self._user_id = get_user_metadata().get('user_id')
+                    if self._user_id is None:
+                        self._user_id = str(uuid.uuid4())
+                        update_user_metadata('user_id', self._user_id)
+        return self._user_id
+
+    @property
+    def client_id(self):
+        return self.cfg['app']['omlcli-client-id']
+
+    @property
+    def tenant_id(self):
+        return self.cfg['app']['tenant-id']
+
+    @property
+    def authority_uri(self):
+        return 'https://login.microsoftonline.com/' + self.tenant_id
+
+    @property
+    def model_store_adls_name(self):
+        return self.cfg['azure']['data-lake-storage']['name']
+
+    @property
+    def dlis_adls_model_store(self):
+        return self.cfg['dlis']['model-store']['adls']['uri']
+
+    @property
+    def dlis_adls_model_store_name(self):
+        return self.cfg['dlis']['model-store']['adls']['store-name']
+
+    @property
+    def dlis_cosmos_adls_model_store(self):
+        return self.cfg['dlis']['model-store']['cosmos-adls']['uri']
+
+    @property
+    def dlis_cosmos_adls_model_store_name(self):
+        return self.cfg['dlis']['model-store']['cosmos-adls']['store-name']
+
+    @property
+    def dlis_cosmos_adls_model_store_http(self):
+        return self.cfg['dlis']['model-store']['cosmos-adls']['public']
+
+    @property
+    def dlis_api_endpoint(self):
+        return self.cfg['dlis']['api']['uri']
+
+    @property
+    def dlis_cosmos_model_store(self):
+        return self.cfg['dlis']['model-store']['cosmos']['uri']['private']
+
+    @property
+    def dlis_cosmos_model_store_http(self):
+        return self.cfg['dlis']['model-store']['cosmos']['uri']['public']
+
+    @property
+    def git_repository_url(self):
+        return self.cfg['git-repository']['uri']
+
+    @property
+    def app_insights_key(self):
+        return self.cfg['azure']['application-insights']['instrumentation-key']
+
+    @property
+    def app_insights_event_title(self):
+        return self.cfg['azure']['application-insights']['event-title']
+
+    @property
+    def storage_endpoint(self):
+        return self.cfg['azure']['storage']['uri']
+
+    @property
+    def storage_account(self):
+        return self.cfg['azure']['storage']['account']
+
+    @property
+    def api_endpoint(self):
+        return self.cfg['azure']['api']['uri']
+
+
+config = Settings()
+
+
+def ensure_app_cache_dir():
+    os.makedirs(APP_CACHE_DIR_PATH, exist_ok=True)
 
 
 def find_base_path(path):
@@ -91,6 +180,8 @@ def find_base_path(path):
 
 
 def load_model_metadata(base_path):
+    import yaml
+
     try:
         path = os.path.join(base_path, MODEL_META_FILENAME)
         with open(path, 'r') as f:
@@ -100,22 +191,29 @@ def load_model_metadata(base_path):
 
 
 def update_model_metadata(base_path, metadata):
+    import yaml
+
     path = os.path.join(base_path, MODEL_META_FILENAME)
     with open(path, 'w') as f:
         return yaml.dump(metadata, stream=f, default_flow_style=False)
 
 
 def get_user_metadata():
+    import yaml
+
     if os.path.exists(METADATA_FILE_PATH):
         with open(METADATA_FILE_PATH) as f:
-            return yaml.safe_load(f)
+            return yaml.safe_load(f) or dict()
 
     return dict()
 
 
 def update_user_metadata(key, value):
+    import yaml
+
     metadata = get_user_metadata()
     metadata[key] = value
 
+    ensure_app_cache_dir()
     with open(METADATA_FILE_PATH, 'w') as f:
         yaml.dump(metadata, stream=f, default_flow_style=False)
@@ -1,4 +1,6 @@
 using System;
+using System.IO;
+using System.Text;
 
 namespace Template
 {
@@ -6,6 +8,13 @@ namespace Template
     {
         static void Main(string[] args)
         {
+            // serve-stdio answers on stdout, so whatever the model prints while it
+            // loads goes to stderr instead of into the response stream
+            if (args.Length > 0 && args[0] == "serve-stdio")
+            {
+                Console.SetOut(Console.Error);
+            }
+
             var model = new Model();
             string option;
             string data = "";
@@ -43,10 +52,83 @@ namespace Template
                 case "eval":
                     model.Eval();
                     return;
+                case "serve-stdio":
+                    ServeStdio(model);
+                    return;
                 default:
-                    Console.WriteLine("Call with params predict or eval");
+                    Console.WriteLine("Call with params predict, eval or serve-stdio");
                     return;
             }
         }
+
+        // Used by "oml serve": the model is loaded once and answers predict requests
+        // from stdin until it is closed. A request is a 4-byte big-endian length and
+        // the UTF-8 input. A response is a status byte (0 ok, 1 error), a 4-byte
+        // big-endian length and the UTF-8 output or error message.
+        static void ServeStdio(Model model)
+        {
+            var input = Console.OpenStandardInput();
+            // The raw stream, as Console.Out was sent to stderr before the model loaded
+            var output = Console.OpenStandardOutput();
+
+            byte[] request;
+            while ((request = ReadFrame(input)) != null)
+            {
+                byte status = 0;
+                string result;
+                try
+                {
+                    result = model.Predict(Encoding.UTF8.GetString(request));
+                }
+                catch (Exception e)
+                {
+                    status = 1;
+                    result = e.Message;
+                }
+                WriteFrame(output, status, Encoding.UTF8.GetBytes(result ?? ""));
+            }
+        }
+
+        static byte[] ReadFrame(Stream stream)
+        {
+            var header = ReadExactly(stream, 4);
+            if (header == null)
+            {
+                return null;
+            }
+            var length = (header[0] << 24) | (header[1] << 16) | (header[2] << 8) | header[3];
+            return ReadExactly(stream, length);
+        }
+
+        static byte[] ReadExactly(Stream stream, int count)
+        {
+            var buffer = new byte[count];
+            var offset = 0;
+            while (offset < count)
+            {
+                var read = stream.Read(buffer, offset, count - offset);
+                if (read == 0)
+                {
+                    return null;
+                }
+                offset += read;
+            }
+            return buffer;
+        }
+
+        static void WriteFrame(Stream stream, byte status, byte[] payload)
+        {
+            var header = new byte[]
+            {
+                status,
+                (byte)(payload.Length >> 24),
+                (byte)(payload.Length >> 16),
+                (byte)(payload.Length >> 8),
+                (byte)payload.Length
+            };
+            stream.Write(header, 0, header.Length);
+            stream.Write(payload, 0, payload.Length);
+            stream.Flush();
+        }
     }
 }
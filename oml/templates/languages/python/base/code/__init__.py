@@ -22,12 +22,38 @@ class BaseModel(ABC):
 
     @abstractmethod
     def predict(self, data):
+        """
+        Predict one input value. When `cache_entries` is set in the `serving`
+        section of oml.yml, the DLIS and QAS servers cache predictions by
+        request, so only turn it on when predict depends on the input alone.
+        """
         pass
 
+    def predict_batch(self, batch):
+        """
+        Predict a list of values at once. The DLIS server calls this with
+        concurrent requests when OML_MAX_BATCH_SIZE is set, so override it
+        with a vectorized implementation to serve them faster.
+
+        :param batch: List of input values.
+        :return: List of predictions in the same order as the inputs.
+        """
+        return [self.predict(data) for data in batch]
+
     @abstractmethod
     def eval(self, **kwargs):
         pass
 
+    @classmethod
+    def prepare_package(cls, data_dirpath):
+        """
+        Called by `oml package` on the packaged copy of the data folder, to
+        precompute files the model loads faster than it builds them.
+
+        :param data_dirpath: Path of the packaged data folder.
+        """
+        pass
+
     def generate_scores(self, precision, recall):
         """
         Generate .score file and print the scores.
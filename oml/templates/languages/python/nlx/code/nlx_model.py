@@ -8,13 +8,19 @@ Base abstract class for NLX team. This class provides common
 functions across different models within NLX team.
 """
 
+import random
 from abc import abstractmethod
+from itertools import islice
 from os.path import join
 from nltk.tokenize import word_tokenize
 import numpy as np
 
 from . import BaseModel
-from .settings import SEQ_LEN, UNK_CHAR, VALIDATION_FILE_NAME, VOCAB_FILE_NAME
+from .vocab import Vocabulary
+from .settings import BATCH_SIZE, PAD_CHAR, SEQ_LEN, UNK_CHAR, VALIDATION_FILE_NAME, VOCAB_FILE_NAME
+
+# Batches read ahead by generate_batches to shuffle or bucket lines
+BUCKET_WINDOW = 16
 
 
 class NLXModel(BaseModel):
@@ -22,9 +28,34 @@ class NLXModel(BaseModel):
     def __init__(self, data_dirpath):
         super().__init__(data_dirpath)
 
-        self.query_dict = self.generate_vocab_map(join(self.data_dirpath, VOCAB_FILE_NAME))
+        self.vocab = self.generate_vocab(join(self.data_dirpath, VOCAB_FILE_NAME))
         self.validation_data = join(self.data_dirpath, VALIDATION_FILE_NAME)
-        self.vocab_size = len(self.query_dict)
+        self.vocab_size = len(self.vocab)
+        # Ids of unknown tokens and of padding. -1 when the vocabulary has no such entry
+        self.unk_id = self.vocab.get(UNK_CHAR, -1)
+        self.pad_id = self.vocab.get(PAD_CHAR, -1)
+        self._query_dict = None
+
+    @classmethod
+    def prepare_package(cls, data_dirpath):
+        """
+        Save the vocabulary's lookup arrays next to vocab.txt, so the packaged
+        model memory-maps them instead of building them when it loads.
+        """
+        vocab_path = join(data_dirpath, VOCAB_FILE_NAME)
+        Vocabulary.from_text(vocab_path).save(vocab_path)
+
+    def generate_vocab(self, vocab_path):
+        """
+        Load the vocabulary mapping input words to their IDs, from the arrays
+        saved by `oml package` when they are up to date, else from the text file.
+
+        :param vocab_path: Vocab path containing all the words in the input sentences
+        :return: Vocabulary
+        """
+        vocab = Vocabulary.open(vocab_path)
+        print('Common vocab loaded.')
+        return vocab
 
     def generate_vocab_map(self, vocab_path):
         """
@@ -34,59 +65,166 @@ class NLXModel(BaseModel):
         :param vocab_path: Vocab path containing all the words in the input sentences
         :return: Dictionary (Map) from word in input vocabulary to corresponding ID
         """
-        query_wl = [line.strip() for line in open(vocab_path, encoding='utf-8', mode='r')]
-        query_dict = {query_wl[i]: i for i in range(len(query_wl))}
-        print('Common vocab loaded.')
-        return query_dict
+        return Vocabulary.from_text(vocab_path).to_dict()
+
+    @property
+    def query_dict(self):
+        """Dictionary from word to ID, built on first use. Prefer self.vocab.lookup for batches of tokens."""
+        if self._query_dict is None:
+            self._query_dict = self.vocab.to_dict()
+        return self._query_dict
 
     def get_ids(self, seq):
         """
         Run a sequence through and get the ids for the sequence
 
         :param seq: word sequence
-        :return: the ids for the sequence
+        :return: the ids for the sequence, unk_id for unknown words
+        """
+        return self.vocab.lookup(seq, self.unk_id).tolist()
+
+    def token_ids(self, data):
+        """
+        Tokenize a query and map the tokens to vocabulary ids.
+
+        :param data: Query string
+        :return: int32 array with one id per token, unk_id for unknown tokens
+        """
+        return self.vocab.lookup(word_tokenize(data), self.unk_id)
+
+    def token_ids_batch(self, queries, seq_len=SEQ_LEN):
         """
-        ids = []
-        for tok in seq:
-            if tok in self.query_dict.keys():
-                ids.append(self.query_dict[tok])
-            else:
-                ids.append(UNK_CHAR)
-        return ids
+        Tokenize queries into one padded buffer, ready for an embedding lookup.
+
+        :param queries: List of query strings
+        :param seq_len: Tokens kept per query
+        :return: int32 array of shape [len(queries), seq_len] padded with pad_id,
+            and int32 array of the number of tokens kept per query
+        """
+        ids = np.full((len(queries), seq_len), self.pad_id, np.int32)
+        lengths = np.zeros(len(queries), np.int32)
+        for i, data in enumerate(queries):
+            w = self.token_ids(data)[:seq_len]
+            ids[i, :len(w)] = w
+            lengths[i] = len(w)
+        return ids, lengths
+
+    def onehot_sparse(self, data):
+        """
+        One-hot encode a query as a sparse matrix. Needs scipy.
+
+        :param data: Query string
+        :return: scipy.sparse.csr_matrix of shape [tokens, vocab_size], with
+            empty rows for unknown tokens when the vocabulary has no UNK_CHAR
+        """
+        return self._onehot_csr(self.token_ids(data))
+
+    def onehot_sparse_batch(self, queries):
+        """
+        One-hot encode queries as one sparse matrix. Needs scipy.
+
+        :param queries: List of query strings
+        :return: scipy.sparse.csr_matrix with one row per token of every query,
+            in order, and int32 array of the number of tokens per query
+        """
+        ids = [self.token_ids(data) for data in queries]
+        lengths = np.array([len(w) for w in ids], np.int32)
+        return self._onehot_csr(np.concatenate(ids) if ids else np.zeros(0, np.int32)), lengths
 
     def generate_onehot(self, data):
-        seq = word_tokenize(data)
+        """
+        One-hot encode a query as a dense matrix. This allocates tokens x
+        vocab_size floats per query, so prefer token_ids, token_ids_batch or
+        onehot_sparse unless the model really needs dense input.
 
-        w = self.get_ids(seq)  # convert to word indices
-        onehot = np.zeros([len(w), len(self.query_dict)], np.float32)
-        for t in range(len(w)):
-            onehot[t, w[t]] = 1
+        :param data: Query string
+        :return: float32 array of shape [tokens, vocab_size]
+        """
+        w = self.token_ids(data)
+        onehot = np.zeros([len(w), self.vocab_size], np.float32)
+        rows = np.flatnonzero(w >= 0)
+        onehot[rows, w[rows]] = 1
         return onehot
 
-    def generate_batches(self):
-        x_batch, y_batch, batch_lengths = [], [], []
+    def _onehot_csr(self, ids):
+        try:
+            from scipy import sparse
+        except ImportError:
+            raise ImportError('Sparse one-hot encoding needs scipy. Please add it to env-dev.yml and env-prod.yml.')
 
-        for x, y, line_seqlen in self.get_dynamic_line(self.validation_data, SEQ_LEN):
-            x_batch.append(x)
-            y_batch.append(y)
-            batch_lengths.append(line_seqlen)
-            yield (np.asarray(x_batch), np.asarray(y_batch), np.asarray(batch_lengths))
+        known = ids >= 0
+        indptr = np.zeros(len(ids) + 1, np.int32)
+        np.cumsum(known, out=indptr[1:])
+        data = np.ones(int(indptr[-1]), np.float32)
+        return sparse.csr_matrix((data, ids[known], indptr), shape=(len(ids), self.vocab_size))
+
+    def generate_batches(self, batch_size=BATCH_SIZE, seq_len=SEQ_LEN, shuffle=False, bucket=False,
+                         window=BUCKET_WINDOW, seed=None, filename=None):
+        """
+        Read labelled lines in padded batches of at most batch_size lines.
+        Lines are read lazily, so memory stays flat however large the file is.
+
+        The batches are views of buffers allocated once and overwritten by the
+        next batch, so copy them to keep them past the next iteration.
+
+        :param batch_size: Lines per batch. Only the last batch can be smaller
+        :param seq_len: Tokens kept per line. Ids are padded with pad_id and labels with 0
+        :param shuffle: Shuffle lines and batches, within windows of `window` batches
+        :param bucket: Sort lines by length within windows of `window` batches and
+            cut each batch to its longest line, so less padding is scored
+        :param window: Batches read ahead when shuffling or bucketing
+        :param seed: Seed of the shuffle
+        :param filename: File of tab separated sentences and labels, validation.txt by default
+        :return: Generator of (x, y, lengths): int32 arrays of shape [n, seq_len], or
+            [n, longest line] when bucketing, and int32 array of the tokens per line
+        """
+        x = np.empty((batch_size, seq_len), np.int32)
+        y = np.empty((batch_size, seq_len), np.int32)
+        lengths = np.empty(batch_size, np.int32)
+        rng = random.Random(seed)
+        lines = self.get_dynamic_line(filename or self.validation_data, seq_len)
+        read_ahead = batch_size * window if shuffle or bucket else batch_size
+
+        while True:
+            chunk = list(islice(lines, read_ahead))
+            if not chunk:
+                return
+            if shuffle:
+                rng.shuffle(chunk)
+            if bucket:
+                chunk.sort(key=lambda line: line[2])
+            starts = list(range(0, len(chunk), batch_size))
+            if shuffle:
+                rng.shuffle(starts)
+
+            for start in starts:
+                batch = chunk[start:start + batch_size]
+                n = len(batch)
+                width = max(line_seqlen for _, _, line_seqlen in batch) if bucket else seq_len
+                x[:n, :width] = self.pad_id
+                y[:n, :width] = 0
+                for i, (x_line, y_line, line_seqlen) in enumerate(batch):
+                    x[i, :line_seqlen] = x_line
+                    y_line = y_line[:width]
+                    y[i, :len(y_line)] = y_line
+                    lengths[i] = line_seqlen
+                yield x[:n, :width], y[:n, :width], lengths[:n]
 
     def get_dynamic_line(self, filename, seqlen):
-        with open(filename, 'r') as f:
-            line_count = 0
+        """
+        Read a file of tab separated sentences and labels, one line at a time.
+
+        :return: Generator of (ids, labels, number of tokens), truncated to seqlen tokens
+        """
+        with open(filename, 'r', encoding='utf-8') as f:
             for line in f:
-                line_count += 1
+                if not line.strip():
+                    continue
                 line_split = line.strip().split('\t')
-                sentence = line_split[0].strip().split(' ')
-                labels = line_split[1].strip().split(' ')
-                sentence = [self.get_ids(w) for w in sentence]
-                labels = [int(label) for label in labels]
-                if len(sentence) > seqlen:
-                    sentence = sentence[: seqlen]
-                    labels = labels[: seqlen]
-                x_line, y_line = sentence, labels
-                yield x_line, y_line, len(x_line)
+                sentence = line_split[0].strip().split(' ')[:seqlen]
+                labels = [int(label) for label in line_split[1].strip().split(' ')[:seqlen]]
+                x_line = self.get_ids(sentence)
+                yield x_line, labels, len(x_line)
 
     @abstractmethod
     def predict(self, data):
@@ -0,0 +1,102 @@
+"""
+DO NOT EDIT UNLESS YOU KNOW WHAT YOU'RE DOING
+
+Compact vocabulary for NLX models.
+
+Words are kept as one sorted fixed-width byte-string array with the id of
+each word alongside, so a batch of tokens is looked up with a single
+vectorised binary search instead of a Python dict lookup per token. Both
+arrays can be saved as .npy files next to vocab.txt, which `oml package`
+does, and memory-mapped when the model loads instead of being rebuilt.
+"""
+
+import os
+
+import numpy as np
+
+WORDS_SUFFIX = '.words.npy'
+IDS_SUFFIX = '.ids.npy'
+
+
+class Vocabulary:
+
+    def __init__(self, words, ids):
+        """
+        :param words: Sorted array of distinct UTF-8 encoded words (numpy bytes dtype)
+        :param ids: int32 array with the id of each word in words
+        """
+        self.words = words
+        self.ids = ids
+        self.size = int(ids.max()) + 1 if len(ids) else 0
+
+    @classmethod
+    def from_text(cls, vocab_path):
+        """
+        Build the vocabulary from a file with one word per line, the line
+        number being the word's id. When a word repeats, its last id is kept.
+        """
+        with open(vocab_path, encoding='utf-8', mode='r') as f:
+            words = np.array([line.strip().encode('utf-8') for line in f], dtype=bytes)
+        if len(words) == 0:
+            return cls(words, np.zeros(0, np.int32))
+        order = np.argsort(words, kind='stable')
+        words = words[order]
+        # Keep the last of each run of equal words, as a dict built in file order would
+        last = np.append(words[1:] != words[:-1], True)
+        return cls(words[last], order[last].astype(np.int32))
+
+    @classmethod
+    def load(cls, path_prefix, mmap=True):
+        """Load a vocabulary saved with save, memory-mapped unless mmap is False."""
+        mode = 'r' if mmap else None
+        return cls(np.load(path_prefix + WORDS_SUFFIX, mmap_mode=mode),
+                   np.load(path_prefix + IDS_SUFFIX, mmap_mode=mode))
+
+    @classmethod
+    def open(cls, vocab_path):
+        """Load the prebuilt arrays of vocab_path when they are up to date, else build from the text file."""
+        words_path = vocab_path + WORDS_SUFFIX
+        if os.path.exists(words_path) and os.path.exists(vocab_path + IDS_SUFFIX) and (
+                not os.path.exists(vocab_path) or os.path.getmtime(words_path) >= os.path.getmtime(vocab_path)):
+            return cls.load(vocab_path)
+        return cls.from_text(vocab_path)
+
+    def save(self, path_prefix):
+        np.save(path_prefix + WORDS_SUFFIX, np.ascontiguousarray(self.words))
+        np.save(path_prefix + IDS_SUFFIX, np.ascontiguousarray(self.ids))
+
+    def lookup(self, tokens, default=-1):
+        """
+        Map tokens to ids.
+
+        :param tokens: List of token strings
+        :param default: Id of tokens not in the vocabulary
+        :return: int32 array with one id per token
+        """
+        if not len(tokens) or not len(self.words):
+            return np.full(len(tokens), default, np.int32)
+        encoded = [token.encode('utf-8') for token in tokens]
+        # Keys of the words' own width, so the words are not converted on every call.
+        # Longer tokens are truncated, so they must not match.
+        width = self.words.dtype.itemsize
+        keys = np.array(encoded, dtype=self.words.dtype)
+        pos = np.searchsorted(self.words, keys)
+        np.minimum(pos, len(self.words) - 1, out=pos)
+        found = self.words[pos] == keys
+        if max(len(key) for key in encoded) > width:
+            found &= np.array([len(key) <= width for key in encoded])
+        return np.where(found, self.ids[pos], default).astype(np.int32)
+
+    def get(self, token, default=None):
+        id_ = self.lookup([token])[0]
+        return default if id_ < 0 else int(id_)
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def __len__(self):
+        return self.size
+
+    def to_dict(self):
+        """Return the word to id mapping as a dict."""
+        return {word.decode('utf-8'): int(id_) for word, id_ in zip(self.words, self.ids)}
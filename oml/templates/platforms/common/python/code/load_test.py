@@ -0,0 +1,105 @@
+#####################
+#### DO NOT EDIT ####
+#####################
+
+"""
+owner: isst.
+
+Measures the HTTP server's latency at increasing concurrency.
+Start the server, then run for example:
+
+python load_test.py http://localhost:8888 --data-file ../data/input.txt --concurrency 1,4,16,64
+
+Each input line is posted as one request. 503 responses are counted as
+rejected rather than timed.
+"""
+
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run_level(url, inputs, concurrency, requests, content_type):
+    latencies = []
+    errors = {'rejected': 0, 'failed': 0}
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            start = time.perf_counter()
+            try:
+                conn.request('POST', url.path or '/', body=inputs[i % len(inputs)],
+                             headers={'Content-Type': content_type})
+                res = conn.getresponse()
+                res.read()
+                status = res.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                status = None
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if status == 200:
+                    latencies.append(elapsed)
+                elif status == 503:
+                    errors['rejected'] += 1
+                else:
+                    errors['failed'] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+    return {
+        'concurrency': concurrency,
+        'qps': len(latencies) / duration,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'rejected': errors['rejected'],
+        'failed': errors['failed'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures p50/p99 latency at increasing concurrency.')
+    parser.add_argument('url', nargs='?', default='http://localhost:8888/')
+    parser.add_argument('--data-file', help='File with one request body per line.')
+    parser.add_argument('--data', default='test input here', help='Request body when no data file is given.')
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32,64', help='Comma separated client counts.')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per concurrency level.')
+    parser.add_argument('--content-type', default='text/plain')
+    args = parser.parse_args()
+
+    inputs = [args.data.encode('utf-8')]
+    if args.data_file:
+        with open(args.data_file, 'r', encoding='utf-8') as f:
+            inputs = [line.rstrip('\n').encode('utf-8') for line in f if line.strip()]
+
+    url = urlparse(args.url)
+    columns = ('concurrency', 'req/s', 'p50 ms', 'p99 ms', 'rejected', 'failed')
+    print('{:>12}{:>10}{:>10}{:>10}{:>10}{:>8}'.format(*columns))
+    for concurrency in [int(c) for c in args.concurrency.split(',')]:
+        result = run_level(url, inputs, concurrency, args.requests, args.content_type)
+        print('{concurrency:>12}{qps:>10.0f}{p50:>10.1f}{p99:>10.1f}{rejected:>10}{failed:>8}'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#####################
+#### DO NOT EDIT ####
+#####################
+
+"""
+owner: isst.
+
+Scores a file of requests, one per line, into a file of results, one per
+line in the same order.
+
+Lines are read in chunks and each chunk is scored by a pool of worker
+processes, each loading its own model, so large files use every core
+without being read into memory at once. Blank lines are kept as blank
+results so the output stays aligned with the input.
+"""
+
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from serving import get_predict_batch
+
+DEFAULT_CHUNK_SIZE = 256
+PROGRESS_INTERVAL_SECONDS = 10
+
+
+def read_chunks(f, chunk_size):
+    while True:
+        chunk = [line.strip() for line in itertools.islice(f, chunk_size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_chunk(model, chunk, batch):
+    inputs = [line for line in chunk if line]
+    if batch:
+        results = iter(get_predict_batch(model)(inputs))
+    else:
+        results = iter([model.predict(line) for line in inputs])
+    return [next(results) if line else '' for line in chunk]
+
+
+_process_model = None
+
+
+def _score_chunk_in_process(load_model, chunk, batch):
+    # Loaded on the first chunk rather than by a pool initializer, which needs Python 3.7
+    global _process_model
+    if _process_model is None:
+        _process_model = load_model()
+    return score_chunk(_process_model, chunk, batch)
+
+
+class Progress:
+    """Reports lines scored and throughput to stderr every interval seconds."""
+
+    def __init__(self, out=sys.stderr, interval=PROGRESS_INTERVAL_SECONDS):
+        self.out = out
+        self.interval = interval
+        self.lines = 0
+        self.start = time.monotonic()
+        self._next_report = self.start + interval
+
+    def update(self, lines):
+        self.lines += lines
+        now = time.monotonic()
+        if self.out is not None and now >= self._next_report:
+            self._report(now)
+            self._next_report = now + self.interval
+
+    def done(self):
+        if self.out is not None:
+            self._report(time.monotonic())
+
+    def _report(self, now):
+        elapsed = max(now - self.start, 1e-9)
+        print('{} lines in {:.1f}s, {:.0f} lines/s'.format(self.lines, elapsed, self.lines / elapsed), file=self.out)
+
+
+def process(load_model, input_path, output_path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, batch=False,
+            progress=None):
+    """
+    Scores input_path into output_path and returns the number of lines written.
+
+    load_model is called once in each worker process, so with more than one
+    worker it must be picklable (a module-level class or a functools.partial
+    of one). batch scores each chunk with a single predict_batch call.
+    """
+    workers = workers or os.cpu_count() or 1
+    progress = progress or Progress()
+
+    with open(input_path, 'r', encoding='utf-8', errors='ignore') as infile, \
+            open(output_path, 'w', encoding='utf-8', errors='ignore') as outfile:
+
+        def write(results):
+            for result in results:
+                outfile.write(str(result))
+                outfile.write('\n')
+            progress.update(len(results))
+
+        if workers == 1:
+            model = load_model()
+            for chunk in read_chunks(infile, chunk_size):
+                write(score_chunk(model, chunk, batch))
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                # Keep a couple of chunks queued per worker: enough to keep them busy,
+                # few enough that the input is not read ahead into memory
+                pending = deque()
+                for chunk in read_chunks(infile, chunk_size):
+                    pending.append(executor.submit(_score_chunk_in_process, load_model, chunk, batch))
+                    if len(pending) >= workers * 2:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+
+    progress.done()
+    return progress.lines
@@ -0,0 +1,433 @@
+#####################
+#### DO NOT EDIT ####
+#####################
+
+"""
+owner: isst.
+
+Helpers shared by the serving entry points.
+
+Settings come from the `serving` section of oml.yml, saved next to this
+file as serving.json by `oml package`, and can be overridden with OML_*
+environment variables (OML_EXECUTOR, OML_WORKERS, ...):
+
+executor       thread or process. Where predict runs, off the server's IOLoop.
+workers        Threads or processes running predict.
+max_in_flight  Requests accepted at once. Further requests are rejected
+               with a 503 instead of queueing without bound.
+max_batch_size Requests handed to predict_batch together. 1 turns batching off.
+max_wait_ms    Longest a request waits for its batch to fill up.
+grpc_port      Port of the gRPC server.
+max_message_mb Largest gRPC message sent or received.
+stream_window  Requests of an EvalStream call scored concurrently.
+warmup_file    Requests, one per line, scored before the server reports ready.
+               Relative paths are under the model's data folder; empty turns warm-up off.
+warmup_samples Most lines of warmup_file to score.
+qas_warmup_file
+               Used by the QAS server instead of warmup_file: serialized QAS requests,
+               base64 encoded, one per line. Warm-up is skipped when it is missing.
+cache_entries  Predictions kept in an LRU cache keyed by a hash of the request.
+               0 turns caching off; only turn it on for deterministic models.
+cache_mb       Largest total size of the cached predictions.
+cache_ttl_s    Seconds a cached prediction is served for. 0 keeps it until evicted.
+"""
+
+import base64
+import binascii
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'serving.json')
+DEFAULTS = {
+    'executor': 'thread',
+    'workers': 1,
+    'max_in_flight': 32,
+    'max_batch_size': 1,
+    'max_wait_ms': 5.0,
+    'grpc_port': 9000,
+    'max_message_mb': 4,
+    'stream_window': 16,
+    'warmup_file': 'input.txt',
+    'warmup_samples': 100,
+    'qas_warmup_file': 'input.qas.b64',
+    'cache_entries': 0,
+    'cache_mb': 64.0,
+    'cache_ttl_s': 0.0,
+}
+EXECUTORS = ('thread', 'process')
+# Seconds warm_up waits for every worker process to load its model
+PROCESS_LOAD_TIMEOUT = 600
+
+
+def load_config(path=CONFIG_PATH):
+    config = dict(DEFAULTS)
+    try:
+        with open(path, 'r') as f:
+            config.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    for key, default in DEFAULTS.items():
+        value = os.getenv('OML_' + key.upper())
+        if value is not None and (value or isinstance(default, str)):
+            config[key] = type(default)(value)
+    if config['executor'] not in EXECUTORS:
+        raise ValueError('executor must be one of {}, not {}'.format(', '.join(EXECUTORS), config['executor']))
+    return config
+
+
+def load_warmup_samples(config, data_dirpath, key='warmup_file', binary=False):
+    """
+    Returns up to warmup_samples lines of the file named by config[key], or
+    none when it is not set or missing. With binary, lines are base64
+    decoded and the ones that are not valid base64 are skipped.
+    """
+    if not config[key] or config['warmup_samples'] <= 0:
+        return []
+    path = os.path.join(data_dirpath, config[key])
+    if not os.path.exists(path):
+        print('Warm-up file {} not found, skipping warm-up.'.format(path))
+        return []
+    samples = []
+    invalid = 0
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if not line:
+                continue
+            if binary:
+                try:
+                    line = base64.b64decode(line, validate=True)
+                except (binascii.Error, ValueError):
+                    invalid += 1
+                    continue
+            samples.append(line)
+            if len(samples) >= config['warmup_samples']:
+                break
+    if invalid:
+        print('[Warning] Skipped {} warm-up lines of {} that are not base64.'.format(invalid, path))
+    return samples
+
+
+class Overloaded(Exception):
+    """Raised when max_in_flight requests are already being served."""
+
+
+def call_predict(model, *args):
+    return model.predict(*args)
+
+
+def get_predict_batch(model):
+    """
+    Returns the model's predict_batch, or per-item predict calls for models
+    generated before the hook existed.
+    """
+    predict_batch = getattr(model, 'predict_batch', None)
+    if predict_batch is None:
+        return lambda batch: [model.predict(data) for data in batch]
+    return predict_batch
+
+
+class Batcher:
+    """
+    Coalesces concurrent predictions into predict_batch calls made on a
+    background thread. submit returns a concurrent.futures.Future for the
+    input's prediction.
+    """
+
+    def __init__(self, model, max_batch_size, max_wait_ms):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.predictions = 0
+        self._predict_batch = get_predict_batch(model)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, data):
+        future = Future()
+        self._queue.put((data, future))
+        return future
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(items) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._dispatch(items)
+
+    def _dispatch(self, items):
+        batch = [data for data, _ in items]
+        self.batches += 1
+        self.predictions += len(batch)
+        try:
+            results = self._predict_batch(batch)
+            if len(results) != len(batch):
+                raise ValueError('predict_batch returned {} results for {} inputs'.format(len(results), len(batch)))
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results):
+            future.set_result(result)
+
+
+class PredictionCache:
+    """
+    LRU cache of predictions keyed by a hash of the request, bounded in
+    entries and in bytes. Entries expire after ttl seconds when ttl is set.
+    """
+
+    MISSING = object()
+
+    def __init__(self, max_entries, max_bytes, ttl=0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # key -> (prediction, size, expiry time)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data):
+        # Text and binary requests with the same bytes get different predictions
+        if isinstance(data, str):
+            data = b's' + data.encode('utf-8')
+        else:
+            data = b'b' + bytes(data)
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def get(self, key):
+        """Returns the cached prediction, or PredictionCache.MISSING."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and entry[2] < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return self.MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, prediction):
+        size = len(prediction) if isinstance(prediction, (str, bytes)) else sys.getsizeof(prediction)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (prediction, size, time.monotonic() + self.ttl)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        self.bytes -= self._entries.pop(key)[1]
+
+
+class Predictor:
+    """
+    Runs predictions off the calling thread and bounds how many are pending.
+
+    load_model builds the model and predict(model, *args) scores a request.
+    With the process executor both are pickled to the worker processes, so
+    they must be module-level functions or classes (functools.partial of
+    them works), and each process loads its own model in warm_up, or on
+    first use without it.
+    Batching applies to single-input requests scored with call_predict.
+    With cache_entries set, single-input requests are answered from the
+    cache, and identical requests in flight share one prediction.
+    """
+
+    def __init__(self, load_model, predict=call_predict, config=None):
+        config = config or load_config()
+        self.max_in_flight = config['max_in_flight']
+        self.workers = config['workers']
+        self.warmup_seconds = None
+        self.warmup_failed = None
+        self.in_flight = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.model = None
+        self.batcher = None
+        self.cache = None
+        self._load_model = load_model
+        self._predict = predict
+        self._lock = threading.Lock()
+        self._pending = {}
+
+        if config['cache_entries'] > 0:
+            self.cache = PredictionCache(
+                config['cache_entries'], int(config['cache_mb'] * 1024 * 1024), config['cache_ttl_s'])
+
+        if config['executor'] == 'process':
+            self._executor = ProcessPoolExecutor(max_workers=config['workers'])
+        else:
+            self.model = load_model()
+            self._executor = ThreadPoolExecutor(max_workers=config['workers'])
+            if config['max_batch_size'] > 1 and predict is call_predict:
+                self.batcher = Batcher(self.model, config['max_batch_size'], config['max_wait_ms'])
+
+    def submit(self, *args):
+        """Returns a concurrent.futures.Future of the prediction, or raises Overloaded."""
+        if self.cache is None or len(args) != 1:
+            return self._submit(args)
+
+        key = self.cache.key(args[0])
+        prediction = self.cache.get(key)
+        if prediction is not PredictionCache.MISSING:
+            future = Future()
+            future.set_result(prediction)
+            return future
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+
+        future = self._submit(args)
+        with self._lock:
+            self._pending[key] = future
+        future.add_done_callback(functools.partial(self._store, key))
+        return future
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight,
+            'rejected': self.rejected,
+            'coalesced': self.coalesced,
+            'warmup_seconds': self.warmup_seconds,
+            'warmup_failed': self.warmup_failed,
+            'cache': self.cache.stats() if self.cache is not None else None,
+        }
+
+    def _submit(self, args):
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise Overloaded()
+            self.in_flight += 1
+
+        try:
+            if self.model is None:
+                future = self._executor.submit(_predict_in_process, self._load_model, self._predict, args)
+            elif self.batcher is not None and len(args) == 1:
+                future = self.batcher.submit(args[0])
+            else:
+                future = self._executor.submit(self._predict, self.model, *args)
+        except Exception:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def warm_up(self, samples):
+        """
+        Scores samples so lazy initialisation (imports, caches, JIT) is done
+        before real queries arrive, and returns how many failed. With the
+        process executor every worker process loads its model first. The
+        pool spreads the samples over the processes as it sees fit, so a
+        process may score none of them.
+        """
+        if self.model is None:
+            self._load_processes()
+        if not samples:
+            return 0
+        start = time.monotonic()
+        failed = 0
+        for i in range(0, len(samples), self.max_in_flight):
+            # Bypasses the cache so every sample reaches the model
+            for future in [self._submit((data,)) for data in samples[i:i + self.max_in_flight]]:
+                try:
+                    future.result()
+                except Exception as e:
+                    failed += 1
+                    if failed == 1:
+                        print('Warm-up request failed: {!r}'.format(e))
+        self.warmup_seconds = time.monotonic() - start
+        self.warmup_failed = failed
+        print('Warmed up with {} requests in {:.2f}s ({} failed).'.format(len(samples), self.warmup_seconds, failed))
+        if failed == len(samples):
+            print('[Warning] Every warm-up request failed, so the model is still cold. '
+                  'Check that the warm-up file holds requests the model accepts.')
+        return failed
+
+    def _load_processes(self):
+        """
+        Loads the model in every worker process. Each load then waits until
+        all of them have started, so no process can take two.
+        """
+        try:
+            with multiprocessing.Manager() as manager:
+                barrier = manager.Barrier(self.workers)
+                futures = [self._executor.submit(_load_in_process, self._load_model, barrier, PROCESS_LOAD_TIMEOUT)
+                           for _ in range(self.workers)]
+                for future in futures:
+                    future.result()
+        except Exception as e:
+            print('[Warning] Loading the model in every worker process failed: {!r}'.format(e))
+
+    def _store(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    def _done(self, future):
+        with self._lock:
+            self.in_flight -= 1
+
+
+_process_model = None
+
+
+def _load_in_process(load_model, barrier, timeout):
+    global _process_model
+    if _process_model is None:
+        _process_model = load_model()
+    barrier.wait(timeout)
+
+
+def _predict_in_process(load_model, predict, args):
+    global _process_model
+    if _process_model is None:
+        _process_model = load_model()
+    return predict(_process_model, *args)
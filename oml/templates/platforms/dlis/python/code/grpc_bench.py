@@ -0,0 +1,113 @@
+#####################
+#### DO NOT EDIT ####
+#####################
+
+"""
+owner: isst.
+
+Drives the local gRPC server and reports throughput and latency percentiles.
+Start the server with `run.sh grpc`, then run for example:
+
+python grpc_bench.py --concurrency 1,8,32 --requests 1000 --data-file ../data/input.txt
+
+Unary mode sends one Eval call per input. Stream mode sends each client's
+inputs over a single EvalStream call and times every response.
+"""
+
+import argparse
+import threading
+import time
+
+import generic_serving_inference_pb2
+import grpc
+
+SERVICE_PATH = '/tensorflow.serving.GenericService/'
+HEALTH_CHECK_PATH = '/grpc.health.v1.Health/Check'
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def unary_client(channel, inputs, count, latencies, errors):
+    eval_call = channel.unary_unary(
+        SERVICE_PATH + 'Eval',
+        request_serializer=generic_serving_inference_pb2.GenericRequest.SerializeToString,
+        response_deserializer=generic_serving_inference_pb2.GenericResponse.FromString)
+    for i in range(count):
+        start = time.perf_counter()
+        try:
+            eval_call(generic_serving_inference_pb2.GenericRequest(data=inputs[i % len(inputs)]))
+        except grpc.RpcError:
+            errors.append(i)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+def stream_client(channel, inputs, count, latencies, errors):
+    eval_stream = channel.stream_stream(
+        SERVICE_PATH + 'EvalStream',
+        request_serializer=generic_serving_inference_pb2.GenericRequest.SerializeToString,
+        response_deserializer=generic_serving_inference_pb2.GenericResponse.FromString)
+    sent = []
+
+    def requests():
+        for i in range(count):
+            sent.append(time.perf_counter())
+            yield generic_serving_inference_pb2.GenericRequest(data=inputs[i % len(inputs)])
+
+    try:
+        for i, _ in enumerate(eval_stream(requests())):
+            latencies.append((time.perf_counter() - sent[i]) * 1000)
+    except grpc.RpcError:
+        errors.append(count - len(latencies))
+
+
+def run_level(target, mode, inputs, concurrency, requests):
+    latencies = []
+    errors = []
+    client = stream_client if mode == 'stream' else unary_client
+    channels = [grpc.insecure_channel(target) for _ in range(concurrency)]
+    threads = [threading.Thread(target=client, args=(channel, inputs, requests // concurrency, latencies, errors))
+               for channel in channels]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+    for channel in channels:
+        channel.close()
+    return len(latencies) / duration, percentile(latencies, 50), percentile(latencies, 99), len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drives the local gRPC server at increasing concurrency.')
+    parser.add_argument('--target', default='localhost:9000')
+    parser.add_argument('--mode', default='unary', choices=['unary', 'stream'])
+    parser.add_argument('--data-file', help='File with one request per line.')
+    parser.add_argument('--data', default='test input here', help='Request when no data file is given.')
+    parser.add_argument('--concurrency', default='1,4,16', help='Comma separated client counts.')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per concurrency level.')
+    args = parser.parse_args()
+
+    inputs = [args.data]
+    if args.data_file:
+        with open(args.data_file, 'r', encoding='utf-8') as f:
+            inputs = [line.rstrip('\n') for line in f if line.strip()]
+
+    with grpc.insecure_channel(args.target) as channel:
+        health = channel.unary_unary(HEALTH_CHECK_PATH)(b'', timeout=10)
+        print('health: {}'.format('SERVING' if health == b'\x08\x01' else repr(health)))
+
+    print('{:>12}{:>10}{:>10}{:>10}{:>8}'.format('concurrency', 'req/s', 'p50 ms', 'p99 ms', 'errors'))
+    for concurrency in [int(c) for c in args.concurrency.split(',')]:
+        qps, p50, p99, errors = run_level(args.target, args.mode, inputs, concurrency, args.requests)
+        print('{:>12}{:>10.0f}{:>10.1f}{:>10.1f}{:>8}'.format(concurrency, qps, p50, p99, errors))
+
+
+if __name__ == '__main__':
+    main()
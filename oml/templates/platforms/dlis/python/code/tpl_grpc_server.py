@@ -0,0 +1,147 @@
+#####################
+#### DO NOT EDIT ####
+#####################
+
+"""
+owner: isst.
+
+This file will start a grpc server.
+
+tensorflow.serving.GenericService serves:
+  Eval        GenericRequest -> GenericResponse, with text data
+  EvalBinary  raw request bytes -> raw response bytes
+  EvalStream  a stream of GenericRequest -> a stream of GenericResponse, in order
+grpc.health.v1.Health/Check answers SERVING once the model is loaded and warmed up.
+
+Concurrency and message limits come from serving.py's settings
+(max_in_flight, max_message_mb, grpc_port, stream_window).
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import functools
+import os
+import time
+from concurrent import futures
+
+import generic_serving_inference_pb2
+import grpc
+from serving import Overloaded, Predictor, load_config, load_warmup_samples
+from {{namespace}}.model import Model
+
+SERVICE_NAME = 'tensorflow.serving.GenericService'
+HEALTH_SERVICE_NAME = 'grpc.health.v1.Health'
+# HealthCheckResponse with status SERVING, encoded by hand to avoid a grpcio-health-checking dependency
+HEALTH_SERVING = b'\x08\x01'
+OVERLOADED_RETRY_SECONDS = 0.005
+
+
+class GenericServer(object):
+    def __init__(self, predictor, stream_window):
+        self.predictor = predictor
+        self.stream_window = stream_window
+
+    def Eval(self, request, context):
+        if not request.data:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "empty request")
+
+        response = generic_serving_inference_pb2.GenericResponse()
+        response.data = self._predict(request.data, context)
+        return response
+
+    def EvalBinary(self, request, context):
+        if not request:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "empty request")
+        return self._predict(request, context)
+
+    def EvalStream(self, request_iterator, context):
+        # Keep up to stream_window requests in flight so they can be batched together
+        pending = collections.deque()
+        for request in request_iterator:
+            while True:
+                try:
+                    pending.append(self.predictor.submit(request.data))
+                    break
+                except Overloaded:
+                    # The number of streams is bounded by maximum_concurrent_rpcs,
+                    # so a stream waits for capacity instead of failing
+                    if pending:
+                        yield self._response(pending.popleft())
+                    elif context.is_active():
+                        time.sleep(OVERLOADED_RETRY_SECONDS)
+                    else:
+                        return
+            if len(pending) >= self.stream_window:
+                yield self._response(pending.popleft())
+        while pending:
+            yield self._response(pending.popleft())
+
+    def Check(self, request, context):
+        return HEALTH_SERVING
+
+    def _predict(self, data, context):
+        return self._submit(data, context).result()
+
+    def _submit(self, data, context):
+        try:
+            return self.predictor.submit(data)
+        except Overloaded:
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "server is overloaded")
+
+    def _response(self, future):
+        response = generic_serving_inference_pb2.GenericResponse()
+        response.data = future.result()
+        return response
+
+
+def add_servicer_to_server(servicer, server):
+    request_deserializer = generic_serving_inference_pb2.GenericRequest.FromString
+    response_serializer = generic_serving_inference_pb2.GenericResponse.SerializeToString
+    rpc_method_handlers = {
+        'Eval': grpc.unary_unary_rpc_method_handler(
+            servicer.Eval,
+            request_deserializer=request_deserializer,
+            response_serializer=response_serializer),
+        # No (de)serializers: the handler gets and returns the raw message bytes
+        'EvalBinary': grpc.unary_unary_rpc_method_handler(servicer.EvalBinary),
+        'EvalStream': grpc.stream_stream_rpc_method_handler(
+            servicer.EvalStream,
+            request_deserializer=request_deserializer,
+            response_serializer=response_serializer),
+    }
+    health_method_handlers = {
+        'Check': grpc.unary_unary_rpc_method_handler(servicer.Check),
+    }
+    server.add_generic_rpc_handlers((
+        grpc.method_handlers_generic_handler(SERVICE_NAME, rpc_method_handlers),
+        grpc.method_handlers_generic_handler(HEALTH_SERVICE_NAME, health_method_handlers),
+    ))
+
+
+if __name__ == "__main__":
+    config = load_config()
+    data_dirpath = os.path.join(os.path.dirname(__file__), '..', 'data')
+    predictor = Predictor(functools.partial(Model, data_dirpath), config=config)
+    # Warm up before the server starts, so health checks only pass once queries are fast
+    predictor.warm_up(load_warmup_samples(config, data_dirpath))
+
+    max_message_length = config['max_message_mb'] * 1024 * 1024
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=config['max_in_flight']),
+        maximum_concurrent_rpcs=config['max_in_flight'],
+        options=[
+            ('grpc.max_send_message_length', max_message_length),
+            ('grpc.max_receive_message_length', max_message_length),
+        ])
+    add_servicer_to_server(GenericServer(predictor, config['stream_window']), server)
+    server.add_insecure_port("[::]:{}".format(config['grpc_port']))
+    server.start()
+    print("running")
+    try:
+        while True:
+            time.sleep(999999)
+    except KeyboardInterrupt:
+        server.stop(0)
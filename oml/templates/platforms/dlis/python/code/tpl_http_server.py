@@ -6,11 +6,15 @@ Owner: isst
 This file will start an HTTP server
 Run following command
 curl http://localhost:8888 --data <the post content>
+curl http://localhost:8888/stats
 """
+import asyncio
+import functools
 import os
 import platform
 import tornado.ioloop
 import tornado.web
+from serving import Overloaded, Predictor, load_config, load_warmup_samples
 from {{namespace}}.model import Model
 
 
@@ -19,23 +23,44 @@ class MainHandler(tornado.web.RequestHandler):
         content_type = self.request.headers.get("Content-Type", "text/plain")
         return (content_type == "application/binary")
 
-    def post(self):
+    async def post(self):
         if self.is_binary_content():
-            response = self.application.model.predict(self.request.body)
-            self.set_header("Content-Type", "application/binary")
+            data = self.request.body
+            content_type = "application/binary"
         else:
-            response = self.application.model.predict(self.request.body.decode("utf-8"))
-            self.set_header("Content-Type", "text/plain")
+            data = self.request.body.decode("utf-8")
+            content_type = "text/plain"
 
+        try:
+            response = await asyncio.wrap_future(self.application.predictor.submit(data))
+        except Overloaded:
+            self.set_status(503)
+            self.set_header("Retry-After", "1")
+            self.finish()
+            return
+
+        self.set_header("Content-Type", content_type)
         self.write(response)
         self.finish()
 
 
+class StatsHandler(tornado.web.RequestHandler):
+    def get(self):
+        # Concurrency, warm-up and prediction cache counters, as JSON
+        self.write(self.application.predictor.stats())
+        self.finish()
+
+
 class Application(tornado.web.Application):
     def __init__(self):
         data_dirpath = os.path.join(os.path.dirname(__file__), '..', 'data')
-        self.model = Model(data_dirpath)
-        handlers = [(r"/", MainHandler)]
+        config = load_config()
+        # Predictions run on the configured executor, off the IOLoop
+        self.predictor = Predictor(functools.partial(Model, data_dirpath), config=config)
+        # Warm up before the port is bound, so no query pays for lazy initialisation
+        self.predictor.warm_up(load_warmup_samples(config, data_dirpath))
+        handlers = [(r"/", MainHandler),
+                    (r"/stats", StatsHandler)]
         super(Application, self).__init__(handlers)
 
 
@@ -0,0 +1,38 @@
+#####################
+#### DO NOT EDIT ####
+#####################
+
+"""
+owner: isst.
+
+This file will do offline processing
+The 1st parameter should be input file path and the 2nd parameter should be output file path
+
+python offline_process.py input.txt output.txt [--workers 8] [--chunk-size 256] [--batch]
+"""
+
+import argparse
+import functools
+import os
+
+from offline import DEFAULT_CHUNK_SIZE, process
+from {{namespace}}.model import Model
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scores one request per line of the input file.')
+    parser.add_argument('input_path')
+    parser.add_argument('output_path')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('OML_OFFLINE_WORKERS', '0')),
+                        help='Worker processes, each with its own model. Defaults to the CPU count.')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Lines sent to a worker at once.')
+    parser.add_argument('--batch', action='store_true', help='Score each chunk with one predict_batch call.')
+    args = parser.parse_args()
+
+    data_dirpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+    process(functools.partial(Model, data_dirpath), args.input_path, args.output_path,
+            workers=args.workers, chunk_size=args.chunk_size, batch=args.batch)
+
+
+if __name__ == "__main__":
+    main()
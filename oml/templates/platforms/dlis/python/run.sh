@@ -18,12 +18,12 @@ then
 	python3 /model/code/http_server.py $argumentation
 elif [ "$1" == "offline" ]
 then
-	python3 /model/code/offline_process.py $2 $3 $argumentation
+	python3 /model/code/offline_process.py "${@:2}" $argumentation
 else
 	echo "usage:"
 	echo $1
 	echo "1. ./run.sh grpc"
 	echo "2. ./run.sh http"
-	echo "3. ./run.sh offline inputfile outputfile"
+	echo "3. ./run.sh offline inputfile outputfile [--workers N] [--chunk-size N] [--batch]"
 	exit 1
 fi
\ No newline at end of file
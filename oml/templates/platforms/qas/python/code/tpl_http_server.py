@@ -4,14 +4,20 @@ This file will start an HTTP server
 Run following command
 curl http://localhost:port/ProcessQuery --data <the post content>
 curl http://localhost:port/GetState 
+curl http://localhost:port/GetStats
 """
 import os
 import argparse
+import asyncio
+import functools
+import threading
+import traceback
 import tornado.ioloop
 import tornado.web
 from importlib import import_module as ImportModule
 from enum import Enum
 import QASOMLAPI
+from serving import Overloaded, Predictor, load_config, load_warmup_samples
 from {{namespace}}.model import Model
 
 
@@ -28,32 +34,78 @@ class State(NoValue):
     Running = "Running"
 
 
+def process_query(model, body):
+    analyzed_queries = QASOMLAPI.Deserialize(body)
+    aggregate_response = model.predict(analyzed_queries, "{{namespace}}")
+    return QASOMLAPI.SerializeToByteAggregateResponse(aggregate_response)
+
+
 class MainHandler(tornado.web.RequestHandler):
-    def post(self):
-        analyzed_queries = QASOMLAPI.Deserialize(self.request.body)
-        aggregate_response = self.application.model.predict(analyzed_queries, "{{namespace}}")
-        byte_blob = QASOMLAPI.SerializeToByteAggregateResponse(aggregate_response)
+    async def post(self):
+        if self.application.state is not State.Running:
+            self.unavailable()
+            return
+        try:
+            byte_blob = await asyncio.wrap_future(self.application.predictor.submit(self.request.body))
+        except Overloaded:
+            self.unavailable()
+            return
         self.set_header("Content-Type", "application/binary")
         self.write(byte_blob)
         self.finish()
 
+    def unavailable(self):
+        self.set_status(503)
+        self.set_header("Retry-After", "1")
+        self.finish()
+
 
 class StateHandler(tornado.web.RequestHandler):
     def get(self):
         self.set_header("Content-Type", "text/plain")
-        self.write(self.application.state)
+        self.write(self.application.state.value)
+        self.finish()
+
+
+class StatsHandler(tornado.web.RequestHandler):
+    def get(self):
+        # Concurrency, warm-up and prediction cache counters, as JSON
+        if self.application.predictor is None:
+            self.set_status(503)
+            self.finish()
+            return
+        self.write(self.application.predictor.stats())
         self.finish()
 
 
 class Application(tornado.web.Application):
     def __init__(self):
-        data_dirpath = os.path.join(os.path.dirname(__file__), '..', 'data')
         self.state = State.Starting
-        self.model = Model(data_dirpath)
-        self.state = State.Running
+        self.predictor = None
         handlers = [(r"/ProcessQuery", MainHandler),
-                    (r"/GetState", StateHandler)]
+                    (r"/GetState", StateHandler),
+                    (r"/GetStats", StatsHandler)]
         super(Application, self).__init__(handlers)
+        self.state = State.Started
+
+    def load(self):
+        """
+        Loads the model and warms it up with qas_warmup_file, whose lines are
+        base64 encoded request bodies. Runs on its own thread so /GetState
+        answers Loading until queries can be served quickly.
+        """
+        self.state = State.Loading
+        try:
+            data_dirpath = os.path.join(os.path.dirname(__file__), '..', 'data')
+            config = load_config()
+            # Queries are processed on the configured executor, so /GetState answers while they run
+            predictor = Predictor(functools.partial(Model, data_dirpath), process_query, config)
+            predictor.warm_up(load_warmup_samples(config, data_dirpath, "qas_warmup_file", binary=True))
+        except Exception:
+            traceback.print_exc()
+            os._exit(1)
+        self.predictor = predictor
+        self.state = State.Running
 
 
 if __name__ == "__main__":
@@ -62,5 +114,6 @@ if __name__ == "__main__":
     args = parser.parse_args()
     app = Application()
     app.listen(args.port)
+    threading.Thread(target=app.load, daemon=True).start()
     print("running \n")
     tornado.ioloop.IOLoop.current().start()
@@ -1,56 +1,229 @@
 import os
+import threading
+import time
+
 from adal import AuthenticationContext, TokenCache, AdalError
+from contextlib import contextmanager
+from dateutil import parser
+from requests.auth import AuthBase
 
 from oml.settings import (
+    config,
+    ensure_app_cache_dir,
     get_user_metadata,
     update_user_metadata,
-    ADAL_TOKEN_FILE_PATH,
-    AUTHORITY_URI,
-    CLIENT_ID)
+    ADAL_TOKEN_FILE_PATH)
 
+# Refresh tokens this many seconds before they expire. ADAL only redeems the
+# refresh token once a cached token is within five minutes of expiry.
+REFRESH_MARGIN = 240
+ADAL_TOKEN_LOCK_FILE_PATH = ADAL_TOKEN_FILE_PATH + '.lock'
 
-def get_token(resource):
-    cache = _get_token_cache()
-    context = AuthenticationContext(AUTHORITY_URI, cache=cache)
-
-    token = None
-    key = os.environ.get('OML_CLI_KEY')
-    if key is not None:
-        token = context.acquire_token_with_client_credentials(resource, CLIENT_ID, key)
-    else:
-        metadata = get_user_metadata()
-        user = metadata.get('userId')
-        if user is not None:
+
+class TokenBroker:
+    """Process-wide token cache.
+
+    Tokens are kept in memory per resource, so each resource is acquired from
+    ADAL at most once per process, and are refreshed on a background timer
+    shortly before they expire. The ADAL disk cache is only written back when
+    an acquisition changed it.
+    """
+
+    def __init__(self, refresh_margin=REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._tokens = {}
+        self._timers = {}
+        self._lock = threading.RLock()
+        self._cache = None
+        self._context = None
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'refreshes': self.refreshes}
+
+    def get_token(self, resource):
+        with self._lock:
+            token = self._tokens.get(resource)
+            if token is not None and _seconds_to_expiry(token) > 0:
+                self.hits += 1
+                return dict(token)
+
+            self.misses += 1
+            token = self._acquire(resource, interactive=True)
+            self._store(resource, token)
+            return dict(token)
+
+    def peek(self, resource):
+        """Returns the cached token for the resource without acquiring one."""
+        with self._lock:
+            token = self._tokens.get(resource)
+            return dict(token) if token is not None else None
+
+    def clear(self):
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+            self._tokens.clear()
+            self._cache = None
+            self._context = None
+
+    def _refresh(self, resource):
+        with self._lock:
+            self._timers.pop(resource, None)
             try:
-                token = context.acquire_token(resource, user, CLIENT_ID)
-            except AdalError as e:
-                # Password change error, prompt new login
-                if('AADSTS50173' in e.error_response):
-                    token = _get_new_token(context, cache, resource)
+                token = self._acquire(resource, interactive=False)
+            except AdalError:
+                token = None
+            if token is None:
+                # Fall back to a full acquisition on the next get_token
+                self._tokens.pop(resource, None)
+                return
+            self.refreshes += 1
+            self._store(resource, token)
 
-        if token is None:
-            token = _get_new_token(context, cache, resource)
+    def _store(self, resource, token):
+        self._tokens[resource] = token
+        timer = self._timers.pop(resource, None)
+        if timer is not None:
+            timer.cancel()
 
-    return token
+        delay = _seconds_to_expiry(token) - self.refresh_margin
+        if delay > 0:
+            timer = threading.Timer(delay, self._refresh, [resource])
+            timer.daemon = True
+            timer.start()
+            self._timers[resource] = timer
+
+    def _get_context(self):
+        if self._context is None:
+            self._cache = _get_token_cache()
+            self._context = AuthenticationContext(config.authority_uri, cache=self._cache)
+        return self._context
+
+    def _acquire(self, resource, interactive):
+        context = self._get_context()
+
+        token = None
+        key = os.environ.get('OML_CLI_KEY')
+        if key is not None:
+            token = context.acquire_token_with_client_credentials(resource, config.client_id, key)
+        else:
+            metadata = get_user_metadata()
+            user = metadata.get('userId')
+            if user is not None:
+                try:
+                    token = context.acquire_token(resource, user, config.client_id)
+                except AdalError:
+                    # Expired refresh token or password change, prompt new login
+                    if not interactive:
+                        raise
+
+            if token is None and interactive:
+                token = _get_new_token(context, resource)
+
+        if self._cache.has_state_changed:
+            _serialize_tokens(self._cache)
+        return token
+
+
+class BearerAuth(AuthBase):
+    """Requests auth that always sends the broker's latest token for a resource."""
+
+    def __init__(self, resource):
+        self.resource = resource
+        self.token = get_token(resource)
 
+    def __call__(self, request):
+        token = get_broker().peek(self.resource)
+        if token is not None:
+            self.token = token
+        request.headers['Authorization'] = 'Bearer {}'.format(self.token['accessToken'])
+        return request
 
-def _get_new_token(context, cache, resource):
-    user_code = context.acquire_user_code(resource, CLIENT_ID)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = TokenBroker()
+        return _broker
+
+
+def get_token(resource):
+    return get_broker().get_token(resource)
+
+
+def _seconds_to_expiry(token):
+    expires_on = token.get('expiresOn')
+    if expires_on is None:
+        return 0
+    expiry_date = parser.parse(expires_on)
+    if expiry_date.tzinfo is None:
+        return time.mktime(expiry_date.timetuple()) + expiry_date.microsecond / 1e6 - time.time()
+    return expiry_date.timestamp() - time.time()
+
+
+def _get_new_token(context, resource):
+    user_code = context.acquire_user_code(resource, config.client_id)
     print(user_code['message'])
-    token = context.acquire_token_with_device_code(resource, user_code, CLIENT_ID)
-    _serialize_tokens(cache)
+    token = context.acquire_token_with_device_code(resource, user_code, config.client_id)
     update_user_metadata('userId', token['userId'])
     return token
 
 
+@contextmanager
+def _token_file_lock():
+    ensure_app_cache_dir()
+    with open(ADAL_TOKEN_LOCK_FILE_PATH, 'a') as lock_file:
+        if os.name == 'nt':
+            import msvcrt
+
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
 def _serialize_tokens(cache: TokenCache):
-    with open(ADAL_TOKEN_FILE_PATH, mode='w') as token_file:
-        token_file.write(cache.serialize())
+    # Merge into what other oml processes may have written since we loaded
+    with _token_file_lock():
+        disk_cache = _read_token_cache()
+        disk_cache.add([entry for _, entry in cache.read_items()])
+        with open(ADAL_TOKEN_FILE_PATH, mode='w') as token_file:
+            token_file.write(disk_cache.serialize())
+    cache.has_state_changed = False
 
 
 def _get_token_cache() -> TokenCache:
     if not os.path.exists(ADAL_TOKEN_FILE_PATH):
         return TokenCache()
 
-    with open(ADAL_TOKEN_FILE_PATH) as token_file:
-        return TokenCache(token_file.read())
+    with _token_file_lock():
+        return _read_token_cache()
+
+
+def _read_token_cache() -> TokenCache:
+    try:
+        with open(ADAL_TOKEN_FILE_PATH) as token_file:
+            return TokenCache(token_file.read())
+    except (OSError, ValueError):
+        return TokenCache()
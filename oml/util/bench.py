@@ -0,0 +1,229 @@
+import bisect
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from oml.exceptions import OMLException
+from oml.util import http
+from oml.util.loadtest import percentile
+
+PROTOCOLS = ('http', 'grpc')
+DEFAULT_ENDPOINTS = {'http': 'http://localhost:8000', 'grpc': 'localhost:9000'}
+GRPC_EVAL_PATH = '/tensorflow.serving.GenericService/Eval'
+# Upper bounds, in ms, of the latency histogram buckets
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# A step is sustained when the server keeps up with at least this share of the offered load
+MIN_THROUGHPUT_RATIO = 0.9
+INPUT_FILES = (os.path.join('data', 'input.txt'), os.path.join('tests', 'predictions.txt'))
+
+
+def read_inputs(path, delimiter='\t'):
+    """Reads one request per line, ignoring the expected response of test files."""
+    with open(path, 'r', encoding='utf-8') as f:
+        inputs = [line.rstrip('\r\n').split(delimiter, 1)[0] for line in f if line.strip()]
+    if not inputs:
+        raise OMLException('No requests found in {}.'.format(path))
+    return inputs
+
+
+def find_input_file(base_path):
+    for name in INPUT_FILES:
+        path = os.path.join(base_path, name)
+        if os.path.exists(path):
+            return path
+    raise OMLException('No {} found. Please pass a file of requests.'.format(' or '.join(INPUT_FILES)))
+
+
+def parse_ramp(value):
+    """Parses a START:STOP:STEP ramp into the list of QPS to offer."""
+    try:
+        start, stop, step = (float(v) for v in value.split(':'))
+    except ValueError:
+        raise OMLException('Ramp must be START:STOP:STEP, for example 10:200:10.')
+    if start <= 0 or step <= 0 or stop < start:
+        raise OMLException('Ramp must go up from a positive QPS by a positive step.')
+    steps = []
+    qps = start
+    while qps <= stop + 1e-9:
+        steps.append(round(qps, 3))
+        qps += step
+    return steps
+
+
+def load_result(path):
+    """Reads a result written by `oml bench --output`."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class HttpSender:
+
+    def __init__(self, endpoint, pool_size, timeout):
+        self.endpoint = endpoint
+        self.session = http.create_session(pool_size=pool_size, retries=0, timeout=timeout)
+
+    def __call__(self, data):
+        try:
+            res = self.session.post(self.endpoint, data=data.encode('utf-8'))
+        except requests.exceptions.Timeout:
+            return 'timeout'
+        except requests.exceptions.RequestException:
+            return 'connection'
+        return None if res.status_code == 200 else 'status_{}'.format(res.status_code)
+
+    def close(self):
+        self.session.close()
+
+
+class GrpcSender:
+    """Calls GenericService.Eval with hand-encoded messages, so no generated stubs are needed."""
+
+    def __init__(self, endpoint, timeout):
+        try:
+            import grpc
+        except ImportError:
+            raise OMLException('gRPC benchmarks need grpcio. Please run "pip install grpcio".')
+        self.grpc = grpc
+        self.timeout = timeout
+        self.channel = grpc.insecure_channel(endpoint)
+        self.eval = self.channel.unary_unary(GRPC_EVAL_PATH)
+
+    def __call__(self, data):
+        try:
+            self.eval(_encode_generic_request(data), timeout=self.timeout)
+        except self.grpc.RpcError as e:
+            code = e.code()
+            if code == self.grpc.StatusCode.DEADLINE_EXCEEDED:
+                return 'timeout'
+            if code == self.grpc.StatusCode.UNAVAILABLE:
+                return 'connection'
+            return 'status_{}'.format(code.name.lower())
+        return None
+
+    def close(self):
+        self.channel.close()
+
+
+def _encode_generic_request(data):
+    """Serializes GenericRequest(data=data): field 1, length-delimited."""
+    payload = data.encode('utf-8') if isinstance(data, str) else data
+    header = bytearray(b'\x0a')
+    length = len(payload)
+    while length > 0x7f:
+        header.append((length & 0x7f) | 0x80)
+        length >>= 7
+    header.append(length)
+    return bytes(header) + payload
+
+
+def histogram(latencies_ms):
+    """Counts latencies per bucket, keyed by the bucket's upper bound."""
+    labels = ['<={}'.format(bound) for bound in HISTOGRAM_BUCKETS_MS] + ['>{}'.format(HISTOGRAM_BUCKETS_MS[-1])]
+    counts = [0] * len(labels)
+    for latency in latencies_ms:
+        counts[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, latency)] += 1
+    return dict(zip(labels, counts))
+
+
+class Bench:
+    """
+    Open-loop load generator: requests are sent on a fixed schedule whether or
+    not earlier ones have finished, and latency is measured from the scheduled
+    send time, so a saturated server shows up as growing latency rather than
+    as the generator slowing down.
+    """
+
+    def __init__(self, endpoint=None, protocol='http', timeout=10.0, max_in_flight=256, max_error_rate=0.01,
+                 slo_ms=None):
+        if protocol not in PROTOCOLS:
+            raise OMLException('Protocol must be one of {}.'.format(', '.join(PROTOCOLS)))
+        self.endpoint = endpoint or DEFAULT_ENDPOINTS[protocol]
+        self.protocol = protocol
+        self.max_in_flight = max_in_flight
+        self.max_error_rate = max_error_rate
+        self.slo_ms = slo_ms
+        if protocol == 'grpc':
+            self.send = GrpcSender(self.endpoint, timeout)
+        else:
+            self.send = HttpSender(self.endpoint, max_in_flight, timeout)
+
+    def run(self, inputs, steps, duration):
+        """Offers each QPS in steps for duration seconds, stopping after the first one not sustained."""
+        if duration <= 0 or any(qps <= 0 for qps in steps):
+            raise OMLException('QPS and duration must be positive.')
+        results = []
+        for qps in steps:
+            result = self.run_step(inputs, qps, duration)
+            results.append(result)
+            if not result['sustained']:
+                break
+        sustained = [result['achieved_qps'] for result in results if result['sustained']]
+        return {
+            'endpoint': self.endpoint,
+            'protocol': self.protocol,
+            'step_duration_s': duration,
+            'max_error_rate': self.max_error_rate,
+            'slo_ms': self.slo_ms,
+            'steps': results,
+            'max_sustainable_qps': max(sustained) if sustained else 0,
+        }
+
+    def run_step(self, inputs, qps, duration):
+        count = max(1, int(qps * duration))
+        latencies = []
+        errors = {}
+        lock = threading.Lock()
+
+        def call(data, scheduled):
+            error = self.send(data)
+            latency = (time.perf_counter() - scheduled) * 1000
+            with lock:
+                if error is None:
+                    latencies.append(latency)
+                else:
+                    errors[error] = errors.get(error, 0) + 1
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            start = time.perf_counter()
+            for i in range(count):
+                scheduled = start + i / qps
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(call, inputs[i % len(inputs)], scheduled)
+        elapsed = time.perf_counter() - start
+
+        failed = sum(errors.values())
+        achieved = len(latencies) / elapsed
+        error_rate = failed / count
+        p99 = percentile(latencies, 99)
+        return {
+            'target_qps': qps,
+            'achieved_qps': round(achieved, 1),
+            'requests': count,
+            'errors': errors,
+            'error_rate': round(error_rate, 4),
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'p99': round(p99, 2),
+                'max': round(max(latencies), 2) if latencies else 0.0,
+            },
+            'histogram_ms': histogram(latencies),
+            'sustained': (error_rate <= self.max_error_rate
+                          and achieved >= qps * MIN_THROUGHPUT_RATIO
+                          and (self.slo_ms is None or p99 <= self.slo_ms)),
+        }
+
+    def close(self):
+        self.send.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,243 @@
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from oml.settings import HTTP_CACHE_DIR_PATH
+
+# Largest total size of the cached responses before the least recently used are evicted
+MAX_SIZE = int(os.environ.get('OML_CACHE_MAX_MB', '50')) * 1024 * 1024
+# Seconds a cached response is served without asking the server, by resource type.
+# Job statuses change quickly, so they are always revalidated with their ETag.
+TTLS = {
+    'models': 300,
+    'artifacts': 60,
+    'activemodels': 30,
+    'tests': 0,
+    'deployments': 0,
+}
+STATS_FILENAME = 'stats.json'
+# Share of MAX_SIZE the cache is evicted down to once it goes over
+EVICT_TO = 0.9
+STAT_NAMES = ('hits', 'misses', 'revalidated', 'evictions')
+
+
+class ResponseCache:
+    """On-disk cache of GET responses keyed by URL.
+
+    Each entry is one JSON file, in one directory per scope (the API base
+    URL of the client that stored it), so invalidating a scope is a single
+    directory removal. Reading an entry bumps its mtime, so evicting the
+    oldest files first keeps the cache size-bounded in least recently used
+    order. The cache size is counted once per process and then kept up to
+    date on each write, so eviction only scans the entries when the size
+    goes over the limit. Counters are kept in memory and added to the
+    persisted totals when the process exits.
+    """
+
+    def __init__(self, path=None, max_size=MAX_SIZE):
+        self.path = path or HTTP_CACHE_DIR_PATH
+        self.max_size = max_size
+        self.counters = dict.fromkeys(STAT_NAMES, 0)
+        self._lock = threading.Lock()
+        # Bytes stored per scope directory, None until first counted
+        self._sizes = None
+
+    def get(self, url, scope=''):
+        entry_path = self._entry_path(url, scope)
+        try:
+            with open(entry_path) as f:
+                entry = json.load(f)
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def put(self, url, status, headers, body, scope=''):
+        entry = {
+            'url': url,
+            'stored_at': time.time(),
+            'status': status,
+            'etag': headers.get('ETag'),
+            'headers': {'Content-Type': headers.get('Content-Type', 'application/json')},
+            'body': body
+        }
+        sizes = self._get_sizes()
+        scope_path = self._scope_path(scope)
+        os.makedirs(scope_path, exist_ok=True)
+        entry_path = self._entry_path(url, scope)
+        try:
+            previous_size = os.path.getsize(entry_path)
+        except OSError:
+            previous_size = 0
+        tmp_path = '{}.{}.{}'.format(entry_path, os.getpid(), threading.get_ident())
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, entry_path)
+        with self._lock:
+            sizes[scope_path] = sizes.get(scope_path, 0) + size - previous_size
+            over = sum(sizes.values()) > self.max_size
+        if over:
+            self._evict()
+        return entry
+
+    def touch(self, url, scope=''):
+        """Marks an entry as fresh again after the server confirmed it is unchanged."""
+        entry = self.get(url, scope)
+        if entry is not None:
+            entry = self.put(url, entry['status'], dict(entry['headers'], ETag=entry['etag']), entry['body'], scope)
+        return entry
+
+    def invalidate(self, scope):
+        """Removes the entries stored under the scope."""
+        scope_path = self._scope_path(scope)
+        shutil.rmtree(scope_path, ignore_errors=True)
+        with self._lock:
+            if self._sizes is not None:
+                self._sizes.pop(scope_path, None)
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.counters = dict.fromkeys(STAT_NAMES, 0)
+        self._sizes = None
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        """Returns the persisted counters plus this process's, and the cache size."""
+        stats = self._load_stats()
+        for name in STAT_NAMES:
+            stats[name] = stats.get(name, 0) + self.counters[name]
+        entries = self._entries()
+        stats['entries'] = len(entries)
+        stats['size'] = sum(size for _, size, _ in entries)
+        lookups = stats['hits'] + stats['revalidated'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['revalidated']) / lookups if lookups else 0.0
+        return stats
+
+    def save_stats(self):
+        if not any(self.counters.values()):
+            return
+        stats = self._load_stats()
+        for name in STAT_NAMES:
+            stats[name] = stats.get(name, 0) + self.counters[name]
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, STATS_FILENAME), 'w') as f:
+                json.dump(stats, f)
+        except OSError:
+            return
+        self.counters = dict.fromkeys(STAT_NAMES, 0)
+
+    def _load_stats(self):
+        try:
+            with open(os.path.join(self.path, STATS_FILENAME)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return dict.fromkeys(STAT_NAMES, 0)
+        return {name: data.get(name, 0) for name in STAT_NAMES}
+
+    def _scope_path(self, scope):
+        return os.path.join(self.path, hashlib.sha256(scope.encode('utf-8')).hexdigest()[:16])
+
+    def _entry_path(self, url, scope):
+        return os.path.join(self._scope_path(scope), hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _entries(self):
+        """Returns the path, size and mtime of every entry."""
+        entries = []
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return entries
+        for name in names:
+            scope_path = os.path.join(self.path, name)
+            if not os.path.isdir(scope_path):
+                continue
+            try:
+                entry_names = os.listdir(scope_path)
+            except OSError:
+                continue
+            for entry_name in entry_names:
+                if not entry_name.endswith('.json'):
+                    continue
+                entry_path = os.path.join(scope_path, entry_name)
+                try:
+                    st = os.stat(entry_path)
+                except OSError:
+                    continue
+                entries.append((entry_path, st.st_size, st.st_mtime))
+        return entries
+
+    def _get_sizes(self):
+        if self._sizes is None:
+            sizes = {}
+            for entry_path, size, _ in self._entries():
+                scope_path = os.path.dirname(entry_path)
+                sizes[scope_path] = sizes.get(scope_path, 0) + size
+            self._sizes = sizes
+        return self._sizes
+
+    def _evict(self):
+        # Down to below the limit, so the next writes do not evict again right away
+        target = self.max_size * EVICT_TO
+        entries = self._entries()
+        size = sum(size for _, size, _ in entries)
+        for entry_path, entry_size, _ in sorted(entries, key=lambda e: e[2]):
+            if size <= target:
+                break
+            _remove(entry_path)
+            self.count('evictions')
+            size -= entry_size
+        sizes = {}
+        for entry_path, entry_size, _ in entries:
+            if os.path.exists(entry_path):
+                scope_path = os.path.dirname(entry_path)
+                sizes[scope_path] = sizes.get(scope_path, 0) + entry_size
+        with self._lock:
+            self._sizes = sizes
+
+
+def get_ttl(url):
+    """Returns the TTL of the resource type named by the URL's last known path segment."""
+    path = url.split('?')[0].rstrip('/')
+    for segment in reversed(path.split('/')):
+        if segment in TTLS:
+            return TTLS[segment]
+    return 0
+
+
+_cache = None
+
+
+def enable(path=None, max_size=MAX_SIZE):
+    """Puts the on-disk cache in front of the REST hooks' GET requests."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(path, max_size)
+        atexit.register(_cache.save_stats)
+    return _cache
+
+
+def disable():
+    global _cache
+    if _cache is not None:
+        _cache.save_stats()
+        _cache = None
+
+
+def get_cache():
+    return _cache
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
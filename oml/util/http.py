@@ -0,0 +1,182 @@
+import gzip
+import os
+import random
+import threading
+import time
+
+import requests
+
+from oml.util import cache
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+# Connections kept alive per host
+POOL_SIZE = int(os.environ.get('OML_HTTP_POOL_SIZE', '10'))
+# Default (connect, read) timeout in seconds for calls that do not pass one
+TIMEOUT = float(os.environ.get('OML_HTTP_TIMEOUT', '30'))
+RETRIES = int(os.environ.get('OML_HTTP_RETRIES', '3'))
+BACKOFF_FACTOR = float(os.environ.get('OML_HTTP_BACKOFF', '0.5'))
+KEEP_ALIVE = os.environ.get('OML_HTTP_KEEPALIVE', '1').lower() not in ('0', 'false', 'no')
+# Gzip request bodies at least this large. Off unless OML_HTTP_GZIP is set.
+GZIP = os.environ.get('OML_HTTP_GZIP', '0').lower() in ('1', 'true', 'yes')
+GZIP_MIN_SIZE = 1024
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class JitterRetry(Retry):
+    """Exponential backoff with full jitter.
+
+    Retry-After headers on 429/503 responses take precedence over the backoff.
+    Only idempotent methods are retried.
+    """
+
+    def get_backoff_time(self):
+        return random.uniform(0, super().get_backoff_time())  # nosec
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+
+    def __init__(self, timeout=TIMEOUT, gzip_requests=GZIP, **kwargs):
+        self.timeout = timeout
+        self.gzip_requests = gzip_requests
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if self.gzip_requests:
+            _gzip_body(request)
+        return super().send(request, timeout=timeout or self.timeout, **kwargs)
+
+
+class Client:
+    """Thin per-hook view of the shared session.
+
+    Every call goes through the process-wide connection pool, with this
+    client's auth and headers applied on top. When a ``cache_scope`` URL is
+    given and the response cache is enabled, GET responses under it are
+    served from the cache and any other successful call clears them.
+    """
+
+    def __init__(self, auth=None, headers=None, timeout=None, cache_scope=None):
+        self.auth = auth
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.cache_scope = cache_scope
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('auth', self.auth)
+        kwargs.setdefault('timeout', self.timeout)
+        if self.headers:
+            kwargs['headers'] = dict(self.headers, **(kwargs.get('headers') or {}))
+
+        response_cache = cache.get_cache() if self.cache_scope is not None else None
+        if response_cache is None:
+            return get_session().request(method, url, **kwargs)
+        if method == 'GET':
+            return self._cached_get(response_cache, url, kwargs)
+
+        res = get_session().request(method, url, **kwargs)
+        if res.ok:
+            response_cache.invalidate(self.cache_scope)
+        return res
+
+    def _cached_get(self, response_cache, url, kwargs):
+        url = requests.Request('GET', url, params=kwargs.pop('params', None)).prepare().url
+        ttl = cache.get_ttl(url)
+        entry = response_cache.get(url, self.cache_scope)
+        if entry is not None and time.time() - entry['stored_at'] < ttl:
+            response_cache.count('hits')
+            return _cached_response(url, entry)
+        if entry is not None and entry['etag'] is not None:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'If-None-Match': entry['etag']})
+
+        res = get_session().request('GET', url, **kwargs)
+        if res.status_code == 304 and entry is not None:
+            response_cache.count('revalidated')
+            return _cached_response(url, response_cache.touch(url, self.cache_scope) or entry)
+
+        response_cache.count('misses')
+        if res.status_code == 200 and (ttl > 0 or 'ETag' in res.headers):
+            response_cache.put(url, res.status_code, res.headers, res.text, self.cache_scope)
+        return res
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        return self.request('POST', url, data=data, json=json, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return self.request('PUT', url, data=data, **kwargs)
+
+    def patch(self, url, data=None, **kwargs):
+        return self.request('PATCH', url, data=data, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_size=POOL_SIZE, retries=RETRIES, timeout=TIMEOUT, keep_alive=KEEP_ALIVE, gzip_requests=GZIP):
+    retry = JitterRetry(
+        total=retries,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False)
+    adapter = PooledHTTPAdapter(
+        timeout=timeout,
+        gzip_requests=gzip_requests,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def get_session():
+    """Returns the process-wide session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _gzip_body(request):
+    body = request.body
+    if body is None or 'Content-Encoding' in request.headers:
+        return
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if not isinstance(body, bytes) or len(body) < GZIP_MIN_SIZE:
+        return
+    request.body = gzip.compress(body)
+    request.headers['Content-Encoding'] = 'gzip'
+    request.headers['Content-Length'] = str(len(request.body))
+
+
+def _cached_response(url, entry):
+    res = requests.Response()
+    res.status_code = entry['status']
+    res.headers = CaseInsensitiveDict(entry['headers'])
+    res.url = url
+    res.encoding = 'utf-8'
+    res._content = entry['body'].encode('utf-8')
+    return res
@@ -0,0 +1,137 @@
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from oml.exceptions import OMLException
+from oml.util import http
+
+Case = namedtuple('Case', ['line', 'input', 'expected'])
+Result = namedtuple('Result', ['line', 'ok', 'latency', 'error'])
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 2
+BACKOFF_SECONDS = 0.1
+
+
+def read_cases(path, delimiter='\t'):
+    """
+    Reads one test case per line: the request, then optionally the expected
+    response after the delimiter. Without an expected response any 200 passes.
+    """
+    cases = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip('\r\n')
+            if not line.strip():
+                continue
+            input, sep, expected = line.partition(delimiter)
+            cases.append(Case(number, input, expected if sep else None))
+    return cases
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class Report:
+    """Outcome of a run, with failures ordered by line whatever the concurrency."""
+
+    def __init__(self, results, duration, concurrency):
+        self.results = sorted(results, key=lambda r: r.line)
+        self.duration = duration
+        self.concurrency = concurrency
+        self.failures = [r for r in self.results if not r.ok]
+        self.latencies = [r.latency for r in self.results if r.ok]
+
+    @property
+    def total(self):
+        return len(self.results)
+
+    @property
+    def passed(self):
+        return self.total - len(self.failures)
+
+    @property
+    def throughput(self):
+        return self.total / self.duration if self.duration else 0.0
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'passed': self.passed,
+            'failed': len(self.failures),
+            'concurrency': self.concurrency,
+            'duration_s': round(self.duration, 3),
+            'throughput': round(self.throughput, 1),
+            'latency_ms': {
+                'p50': round(percentile(self.latencies, 50) * 1000, 2),
+                'p95': round(percentile(self.latencies, 95) * 1000, 2),
+                'p99': round(percentile(self.latencies, 99) * 1000, 2),
+            },
+        }
+
+
+class LoadTest:
+    """
+    Posts test cases to an endpoint from concurrency threads sharing one
+    connection pool. Connection errors, timeouts and retryable statuses
+    (429, 5xx) are retried with a jittered backoff before counting as failed.
+    """
+
+    def __init__(self, endpoint, concurrency=1, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        if concurrency < 1:
+            raise OMLException('Concurrency must be at least 1.')
+        self.endpoint = endpoint
+        self.concurrency = concurrency
+        self.retries = retries
+        # Retries are done here rather than by urllib3, which does not retry POST
+        self.session = http.create_session(pool_size=concurrency, retries=0, timeout=timeout)
+
+    def run(self, cases):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = list(executor.map(self.send, cases))
+        return Report(results, time.perf_counter() - start, self.concurrency)
+
+    def send(self, case):
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, BACKOFF_SECONDS * 2 ** attempt))  # nosec
+            try:
+                res = self.session.post(self.endpoint, data=case.input.encode('utf-8'))
+            except requests.exceptions.RequestException as e:
+                error = 'Failed to call {}: {}'.format(self.endpoint, e.__class__.__name__)
+                continue
+            if res.status_code in http.RETRY_STATUSES:
+                error = 'Status={}'.format(res.status_code)
+                continue
+            break
+        else:
+            return Result(case.line, False, time.perf_counter() - start, error)
+
+        latency = time.perf_counter() - start
+        if res.status_code != 200:
+            return Result(case.line, False, latency, 'Status={}'.format(res.status_code))
+        if case.expected is not None and res.text != case.expected:
+            return Result(case.line, False, latency, 'Expected={} Actual={}'.format(case.expected, res.text))
+        return Result(case.line, True, latency, None)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
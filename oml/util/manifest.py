@@ -1,36 +1,143 @@
-import os
 import hashlib
 import json
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from oml.exceptions import OMLException
+from oml.settings import MANIFEST_CACHE_DIR_PATH
+
+MANIFEST_FILENAME = 'SecureManifest.json'
+BLOCK_SIZE = 4 * 2**20
+# Files at least this large are hashed through mmap rather than read in blocks
+MMAP_MIN_SIZE = 64 * 2**20
+# Files hashed per thread pool task
+BATCH_SIZE = 32
+ENTRY_FORMAT = '''{}
+        {{
+            "name": {},
+            "length": {},
+            "value": "{}",
+            "algorithm": "SHA512"
+        }}'''
+
+
+def create_manifest(root, workers=None, cache_dir_path=MANIFEST_CACHE_DIR_PATH):
+    """
+    Writes root/SecureManifest.json with the SHA-512 of every file under root.
+
+    Files are hashed on a thread pool, as hashlib releases the GIL, and the
+    entries are written to the manifest as they complete, in walk order.
+    Digests are cached per root in cache_dir_path, keyed by the file's size,
+    mtime and inode, so a rerun only hashes the files that changed. Pass
+    cache_dir_path=None to hash every file.
+    """
+    root = os.path.abspath(root)
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    cache_path = _cache_path(cache_dir_path, root) if cache_dir_path else None
+    cache = _load_cache(cache_path) if cache_path else {}
+    hashed = {}
+
+    def entries(file_paths):
+        result = []
+        for file_path in file_paths:
+            name = os.path.relpath(file_path, root)
+            st = os.stat(file_path)
+            key = [st.st_size, st.st_mtime_ns, st.st_ino]
+            cached = cache.get(name)
+            digest = cached[3] if cached and cached[:3] == key else generate_file_sha512(file_path)
+            hashed[name] = key + [digest]
+            result.append((name, st.st_size, digest))
+        return result
 
+    manifest_path = os.path.join(root, MANIFEST_FILENAME)
+    tmp_path = manifest_path + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f, ThreadPoolExecutor(max_workers=workers) as executor:
+            f.write('{\n    "files": [')
+            pending = deque()
+            count = 0
+            for file_paths in _walk(root):
+                pending.append(executor.submit(entries, file_paths))
+                if len(pending) >= workers * 4:
+                    count = _write_entries(f, pending.popleft().result(), count)
+            while pending:
+                count = _write_entries(f, pending.popleft().result(), count)
+            f.write('\n    ]\n}' if count else ']\n}')
+        os.replace(tmp_path, manifest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    if cache_path:
+        _save_cache(cache_path, hashed)
+
+
+def generate_file_sha512(filepath, blocksize=BLOCK_SIZE):
+    m = hashlib.sha512()
+    with open(filepath, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_MIN_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                m.update(mm)
+        elif size <= blocksize:
+            m.update(f.read())
+        else:
+            buf = bytearray(blocksize)
+            view = memoryview(buf)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                m.update(view[:n])
+    return m.hexdigest().upper()
 
-def create_manifest(root):
-    manifest = {'files': []}
-    os.chdir(root)
+
+def _walk(root, batch_size=BATCH_SIZE):
+    """Yields the paths of the files to list, in lists of up to batch_size files of one directory."""
     for path, subdirs, files in os.walk(root):
+        batch = []
         for file in files:
             if file == 'signature':
                 raise OMLException("File with name 'signature' is not allowed. Please change and rerun.")
-            file_path = os.path.join(path, file)
-            file_data = {
-                'name': os.path.relpath(file_path, root),  # Do we need .//?
-                'length': os.path.getsize(file_path),
-                'value': generate_file_sha512(file_path),
-                'algorithm': 'SHA512'
-            }
-            manifest['files'].append(file_data)
-    json_manifest = json.dumps(manifest, indent=4, ensure_ascii=True)
-    with open("SecureManifest.json", "w") as text_file:
-        text_file.write(json_manifest)
-
-
-def generate_file_sha512(filepath, blocksize=2**20):
-    m = hashlib.sha512()
-    with open(filepath, "rb") as f:
-        while True:
-            buf = f.read(blocksize)
-            if not buf:
-                break
-            m.update(buf)
-    return m.hexdigest().upper()
+            # The manifest of a previous run would be stale as soon as it is rewritten
+            if path == root and file in (MANIFEST_FILENAME, MANIFEST_FILENAME + '.tmp'):
+                continue
+            batch.append(os.path.join(path, file))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _write_entries(f, entries, count):
+    # Same layout as json.dumps(manifest, indent=4), without its slow indenting encoder
+    for name, length, digest in entries:
+        f.write(ENTRY_FORMAT.format(',' if count else '', json.dumps(name), length, digest))
+        count += 1
+    return count
+
+
+def _cache_path(cache_dir_path, root):
+    return os.path.join(cache_dir_path, hashlib.sha256(root.encode('utf-8')).hexdigest() + '.json')
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_path, hashed):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = '{}.{}'.format(cache_path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps(hashed))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
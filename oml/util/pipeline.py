@@ -1,10 +1,11 @@
 import os
-from oml.hooks.graph import GraphHook
 
 
 def get_pipeline_owner():
     email = os.environ.get('BUILD_REQUESTEDFOREMAIL') or os.environ.get('RELEASE_REQUESTEDFOREMAIL')
     if email is not None:
+        from oml.hooks.graph import GraphHook
+
         graph = GraphHook()
         return graph.get_user_domain_alias(email)
 
@@ -0,0 +1,88 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from oml.settings import load_model_metadata
+from oml.util.loadtest import percentile
+
+# Same defaults as the packaged serving code and `oml dlis test`
+WARMUP_FILE = 'input.txt'
+WARMUP_SAMPLES = 100
+TIMEOUT_IN_MS = 100
+WAITING_MODEL_READY_IN_MIN = 10
+
+
+def read_samples(base_path, serving_config):
+    """Reads the warm-up requests the packaged servers would use, from the `serving` section of oml.yml."""
+    name = serving_config.get('warmup_file', WARMUP_FILE)
+    limit = serving_config.get('warmup_samples', WARMUP_SAMPLES)
+    if not name or limit <= 0:
+        return []
+    path = os.path.join(base_path, 'data', name)
+    if not os.path.exists(path):
+        print('Warm-up file {} not found, skipping warm-up.'.format(path))
+        return []
+    samples = []
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if line:
+                samples.append(line)
+                if len(samples) >= limit:
+                    break
+    return samples
+
+
+def warm_up(predict, samples, concurrency=1):
+    """Scores samples and returns their latencies in ms, in order, and the number that failed."""
+    def timed(data):
+        start = time.perf_counter()
+        try:
+            predict(data)
+            failed = False
+        except Exception as e:
+            print('Warm-up request failed: {!r}'.format(e))
+            failed = True
+        return (time.perf_counter() - start) * 1000, failed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, samples))
+    return [latency for latency, _ in results], sum(failed for _, failed in results)
+
+
+def validate(base_path, predict, load_seconds, concurrency=1):
+    """
+    Warms the model up like the packaged servers do and reports the time to
+    ready and the latency after warm-up against the DLIS limits in oml.yml
+    (TimeoutInMs and WaitingModelReadyInMin). Returns True when both are met.
+    """
+    metadata = load_model_metadata(base_path)
+    limits = ((metadata.get('commands') or {}).get('dlis') or {}).get('test') or {}
+    timeout_in_ms = float(limits.get('timeout-in-ms', TIMEOUT_IN_MS))
+    waiting_min = float(limits.get('waiting-model-ready-in-min', WAITING_MODEL_READY_IN_MIN))
+
+    samples = read_samples(base_path, metadata.get('serving') or {})
+    start = time.perf_counter()
+    latencies, failed = warm_up(predict, samples, concurrency)
+    warmup_seconds = time.perf_counter() - start
+
+    print('Model loaded in {:.2f}s.'.format(load_seconds))
+    print('Warmed up with {} requests in {:.2f}s ({} failed).'.format(len(samples), warmup_seconds, failed))
+    ok = True
+    if samples and failed == len(samples):
+        print('[Warning] Every warm-up request failed, so the latencies below are of errors, not predictions.')
+        ok = False
+    if latencies:
+        # The second half of the samples runs on a warm model
+        warm = latencies[len(latencies) // 2:]
+        print('First request: {:.1f} ms. Warm: p50 {:.1f} ms, p99 {:.1f} ms.'.format(
+            latencies[0], percentile(warm, 50), percentile(warm, 99)))
+        if percentile(warm, 99) > timeout_in_ms:
+            print('[Warning] Warm p99 latency is over the TimeoutInMs of {:g} ms.'.format(timeout_in_ms))
+            ok = False
+    ready_min = (load_seconds + warmup_seconds) / 60
+    if ready_min > waiting_min:
+        print('[Warning] Loading and warm-up take {:.1f} min, over the WaitingModelReadyInMin of {:g} min.'.format(
+            ready_min, waiting_min))
+        ok = False
+    return ok
@@ -0,0 +1,123 @@
+import queue
+import struct
+import subprocess  # nosec
+import threading
+
+from oml.exceptions import OMLException
+
+# Request frame: 4-byte big-endian length, then the UTF-8 payload.
+REQUEST_HEADER = struct.Struct('>I')
+# Response frame: 1-byte status (0 ok, 1 error), 4-byte big-endian length, then the payload.
+RESPONSE_HEADER = struct.Struct('>BI')
+STATUS_OK = 0
+STATUS_ERROR = 1
+# Seconds a worker gets to exit after its stdin is closed
+STOP_TIMEOUT = 5
+
+
+class Worker:
+    """A long-lived model process answering framed requests on stdin/stdout.
+
+    The process is started on first use and again after it dies, so a crash
+    costs one failed request instead of the server.
+    """
+
+    def __init__(self, cmd):
+        self.cmd = cmd
+        self._process = None
+
+    @property
+    def alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        if not self.alive:
+            self._process = subprocess.Popen(self.cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)  # nosec
+
+    def request(self, data):
+        self.start()
+        try:
+            self._process.stdin.write(REQUEST_HEADER.pack(len(data)) + data)
+            self._process.stdin.flush()
+            status, length = RESPONSE_HEADER.unpack(self._read(RESPONSE_HEADER.size))
+            if status not in (STATUS_OK, STATUS_ERROR):
+                # Anything else is text the model printed to stdout, not a response
+                self.stop()
+                raise OMLException('The model worker wrote to stdout outside of a response. '
+                                   'Model output must go to stderr in serve-stdio mode.')
+            payload = self._read(length)
+        except (OSError, EOFError, ValueError):
+            self.stop()
+            raise OMLException('The model worker exited unexpectedly.')
+        if status != STATUS_OK:
+            raise OMLException('Prediction failed: {}'.format(payload.decode('utf-8', 'replace')))
+        return payload
+
+    def stop(self):
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            self._process.wait(STOP_TIMEOUT)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            self._process.kill()
+            self._process.wait()
+        self._process.stdout.close()
+        self._process = None
+
+    def _read(self, size):
+        data = self._process.stdout.read(size)
+        if len(data) < size:
+            raise EOFError()
+        return data
+
+
+class WorkerPool:
+    """Spreads concurrent predictions over a fixed set of worker processes.
+
+    Each worker serves one request at a time. A caller takes an idle worker,
+    waiting up to ``timeout`` seconds for one to be returned, so requests are
+    multiplexed over the pool in the order they arrive.
+    """
+
+    def __init__(self, cmd, size=1, timeout=None):
+        if size < 1:
+            raise OMLException('The worker pool needs at least one worker.')
+        self.timeout = timeout
+        self._workers = [Worker(cmd) for _ in range(size)]
+        # LIFO keeps recently used workers, and their warm caches, busy
+        self._idle = queue.LifoQueue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return len(self._workers)
+
+    def start(self):
+        """Starts every worker so the model loads before the first request."""
+        for worker in self._workers:
+            worker.start()
+        return self
+
+    def predict(self, data):
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise OMLException('No model worker was free within {} seconds.'.format(self.timeout))
+        try:
+            return worker.request(data.encode('utf-8')).decode('utf-8')
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,196 @@
+import gc
+import io
+import os
+import signal
+import socket
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler, WSGIServer, make_server as make_wsgiref_server
+
+from oml.exceptions import OMLException
+
+SERVERS = ('wsgiref', 'threaded', 'prefork')
+# Seconds an idle keep-alive connection holds on to its thread
+KEEP_ALIVE_TIMEOUT = 5
+MAX_REQUEST_LINE = 65536
+
+
+class KeepAliveServerHandler(ServerHandler):
+    http_version = '1.1'
+
+    def cleanup_headers(self):
+        super().cleanup_headers()
+        if 'Content-Length' not in self.headers:
+            self.request_handler.close_connection = True
+        if self.request_handler.close_connection:
+            self.headers['Connection'] = 'close'
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """Serves any number of HTTP/1.1 requests on one connection.
+
+    The request body is read up front, so the next request on the connection
+    starts at the right place even when the app ignores the body. Responses
+    without a Content-Length close the connection.
+    """
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEP_ALIVE_TIMEOUT
+    # Headers and body are written separately, which Nagle's algorithm would
+    # hold back on a kept-alive connection until the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        self.close_connection = True
+        self._handle_one()
+        while not self.close_connection:
+            self._handle_one()
+
+    def _handle_one(self):
+        try:
+            self.raw_requestline = self.rfile.readline(MAX_REQUEST_LINE + 1)
+        except (socket.timeout, ConnectionError):
+            self.close_connection = True
+            return
+        if len(self.raw_requestline) > MAX_REQUEST_LINE:
+            self.send_error(414)
+            return
+        if not self.raw_requestline or not self.parse_request():
+            self.close_connection = True
+            return
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            self.send_error(411)
+            return
+
+        body = io.BytesIO(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+        handler = KeepAliveServerHandler(
+            body, self.wfile, self.get_stderr(), self.get_environ(),
+            multithread=isinstance(self.server, ThreadPoolWSGIServer))
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadPoolWSGIServer(ThreadingMixIn, WSGIServer):
+    """Handles connections on a fixed number of threads.
+
+    A connection is only accepted once a thread is free for it, which leaves
+    it to another prefork worker otherwise. The pool is created on first use,
+    so a server built before forking gets one pool per worker process.
+    """
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class, threads):
+        self.threads = threads
+        self._executor = None
+        self._free_threads = threading.Semaphore(threads)
+        super().__init__(server_address, handler_class)
+
+    def get_request(self):
+        self._free_threads.acquire()
+        try:
+            return super().get_request()
+        except OSError:
+            self._free_threads.release()
+            raise
+
+    def process_request(self, request, client_address):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads)
+        try:
+            self._executor.submit(self._process_request, request, client_address)
+        except RuntimeError:
+            self._free_threads.release()
+            raise
+
+    def _process_request(self, request, client_address):
+        try:
+            self.process_request_thread(request, client_address)
+        finally:
+            self._free_threads.release()
+
+    def server_close(self):
+        super().server_close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+def make_server(app, host, port, server='threaded', threads=1):
+    """Returns a bound server for the WSGI app.
+
+    ``wsgiref`` is the standard library's one request at a time server.
+    The other servers keep connections alive and handle them on
+    ``threads`` threads.
+    """
+    if server not in SERVERS:
+        raise OMLException('Unknown server "{}". Choose one of {}.'.format(server, ', '.join(SERVERS)))
+    if server == 'wsgiref':
+        return make_wsgiref_server(host, port, app)
+    httpd = ThreadPoolWSGIServer((host, port), KeepAliveRequestHandler, threads)
+    httpd.set_app(app)
+    return httpd
+
+
+def concurrency(server, threads=1):
+    """Returns the number of requests one process of the server handles at once."""
+    return 1 if server == 'wsgiref' else threads
+
+
+def serve(app, host='localhost', port=8000, server='wsgiref', workers=1, threads=1):
+    """Serves the WSGI app until interrupted.
+
+    With ``prefork`` the app, and the model it holds, is loaded once and
+    ``workers`` processes are forked to share it copy-on-write.
+    """
+    if workers > 1 and server != 'prefork':
+        raise OMLException('Serving with {} workers requires the prefork server.'.format(workers))
+    httpd = make_server(app, host, port, server, threads)
+    try:
+        if server == 'prefork':
+            _prefork(httpd, workers)
+        else:
+            httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+def _prefork(httpd, workers):
+    if not hasattr(os, 'fork'):
+        raise OMLException('The prefork server is not supported on this platform. Use --server threaded instead.')
+
+    # Workers race for each connection, so losing an accept must not block
+    httpd.socket.setblocking(False)
+    # Keep the garbage collector from touching, and so copying, the inherited objects
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                httpd.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            except Exception:
+                code = 1
+            finally:
+                os._exit(code)
+        pids.append(pid)
+
+    try:
+        for pid in pids:
+            os.waitpid(pid, 0)
+    finally:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
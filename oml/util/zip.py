@@ -1,15 +1,237 @@
 import os
 import shutil
+import struct
+import tempfile
+import time
 import zipfile
+import zlib
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
+from oml.exceptions import OMLException
 
-def archive(src, dest, filename):
-    os.chdir(dest)
-    zf = shutil.make_archive(filename, 'zip', src)
-    os.chdir(os.path.expanduser('~'))
-    return zf
+# Deflate level of `oml package` archives, overridden by the OML_ZIP_LEVEL environment variable
+DEFAULT_LEVEL = 6
+# Already compressed, so deflating them costs time for next to no gain
+STORED_EXTENSIONS = ('.so', '.pyd', '.whl', '.zip', '.gz', '.bz2', '.xz', '.jar', '.png', '.jpg', '.jpeg')
+CHUNK_SIZE = 2**20
+# Compressed files larger than this are buffered on disk until written
+SPOOL_SIZE = 16 * 2**20
+# Data held in memory by the files being compressed or waiting to be written
+PENDING_SIZE = 128 * 2**20
+# Sizes and offsets from this value on are stored in ZIP64 extra fields
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+LOCAL_HEADER = struct.Struct('<4sHHHHHLLLHH')
+CENTRAL_HEADER = struct.Struct('<4sBBHHHHHLLLHHHHHLL')
+END_RECORD = struct.Struct('<4sHHHHLLH')
+END_RECORD64 = struct.Struct('<4sQHHLLQQQQ')
+END_LOCATOR64 = struct.Struct('<4sLQL')
+VERSION_DEFLATE = 20
+VERSION_ZIP64 = 45
+CREATE_SYSTEM = 0 if os.name == 'nt' else 3
+UTF8_FLAG = 0x800
+
+Member = namedtuple('Member', ['name', 'method', 'crc', 'compress_size', 'file_size', 'dostime', 'dosdate',
+                               'mode', 'offset'])
+
+
+def archive(src, dest, filename, level=None, workers=None):
+    """
+    Zips the content of src into dest/filename.zip and returns its path.
+
+    Files are deflated in parallel on a thread pool, as zlib releases the
+    GIL, and written to the archive in walk order. Files with one of the
+    STORED_EXTENSIONS, or that do not shrink, are stored. Archives over
+    4 GB or 65535 entries are written as ZIP64. Files are compressed ahead
+    of the writer until PENDING_SIZE of their data is held in memory. The
+    working directory is left alone.
+
+    :param level: Deflate level from 1 to 9, or 0 to store every file.
+        OML_ZIP_LEVEL or DEFAULT_LEVEL by default.
+    :param workers: Compression threads, the number of CPUs by default
+    """
+    level = _get_level(level)
+    zip_path = os.path.realpath(os.path.join(dest, filename + '.zip'))
+    tmp_path = zip_path + '.tmp'
+    workers = workers or os.cpu_count() or 1
+    members = []
+    try:
+        with open(tmp_path, 'wb') as out, ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            pending_size = 0
+            for path, name, st in _walk(src):
+                if name.endswith('/'):
+                    pending.append((path, name, st, None))
+                else:
+                    pending.append((path, name, st, executor.submit(_compress, path, _level(name, level))))
+                    # At most SPOOL_SIZE of each file is kept in memory
+                    pending_size += min(st.st_size, SPOOL_SIZE)
+                while len(pending) >= workers * 2 or pending_size > PENDING_SIZE:
+                    path, name, st, future = pending.popleft()
+                    members.append(_write_member(out, path, name, st, future))
+                    if future is not None:
+                        pending_size -= min(st.st_size, SPOOL_SIZE)
+            while pending:
+                members.append(_write_member(out, *pending.popleft()))
+            _write_central_directory(out, members)
+        os.replace(tmp_path, zip_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return zip_path
 
 
 def extract(src, dest):
     with zipfile.ZipFile(src, 'r') as zf:
         zf.extractall(dest)
+
+
+def _walk(src):
+    """Yields the directories, as names ending with /, and files to archive, like shutil.make_archive."""
+    for path, dirs, files in os.walk(src):
+        dirs.sort()
+        for name in dirs:
+            dir_path = os.path.join(path, name)
+            yield dir_path, os.path.relpath(dir_path, src).replace(os.sep, '/') + '/', os.stat(dir_path)
+        for name in sorted(files):
+            file_path = os.path.join(path, name)
+            if os.path.isfile(file_path):
+                yield file_path, os.path.relpath(file_path, src).replace(os.sep, '/'), os.stat(file_path)
+
+
+def _get_level(level):
+    value = os.environ.get('OML_ZIP_LEVEL', DEFAULT_LEVEL) if level is None else level
+    try:
+        level = int(value)
+    except (TypeError, ValueError):
+        level = None
+    if level is None or not 0 <= level <= 9:
+        raise OMLException('Invalid zip level {!r}, it must be from 0 to 9 (set with OML_ZIP_LEVEL).'.format(value))
+    return level
+
+
+def _level(name, level):
+    return 0 if name.lower().endswith(STORED_EXTENSIONS) else level
+
+
+def _compress(path, level):
+    """
+    Returns the method, CRC, compressed size and uncompressed size of the
+    file, and its data to write: bytes, a spooled file, or None to copy
+    the file itself.
+    """
+    crc = size = 0
+    with open(path, 'rb') as f:
+        if not level:
+            data = f.read(SPOOL_SIZE + 1)
+            if len(data) <= SPOOL_SIZE:
+                return zipfile.ZIP_STORED, zlib.crc32(data), len(data), len(data), data
+            while data:
+                crc = zlib.crc32(data, crc)
+                size += len(data)
+                data = f.read(CHUNK_SIZE)
+            return zipfile.ZIP_STORED, crc, size, size, None
+
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        while True:
+            data = f.read(CHUNK_SIZE)
+            if not data:
+                break
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            spool.write(compressor.compress(data))
+        spool.write(compressor.flush())
+
+    compress_size = spool.tell()
+    if compress_size >= size:
+        spool.close()
+        return zipfile.ZIP_STORED, crc, size, size, None
+    spool.seek(0)
+    return zipfile.ZIP_DEFLATED, crc, compress_size, size, spool
+
+
+def _write_member(out, path, name, st, future):
+    if future is None:
+        method, crc, compress_size, file_size, data = zipfile.ZIP_STORED, 0, 0, 0, b''
+    else:
+        method, crc, compress_size, file_size, data = future.result()
+    year, month, day, hour, minute, second = time.localtime(st.st_mtime)[:6]
+    if year < 1980:
+        year, month, day, hour, minute, second = 1980, 1, 1, 0, 0, 0
+    member = Member(
+        name=name,
+        method=method,
+        crc=crc,
+        compress_size=compress_size,
+        file_size=file_size,
+        dostime=hour << 11 | minute << 5 | second // 2,
+        dosdate=(year - 1980) << 9 | month << 5 | day,
+        mode=st.st_mode,
+        offset=out.tell())
+
+    encoded, flags = _encode_name(name)
+    zip64 = file_size >= ZIP64_LIMIT or compress_size >= ZIP64_LIMIT
+    extra = struct.pack('<HHQQ', 1, 16, file_size, compress_size) if zip64 else b''
+    out.write(LOCAL_HEADER.pack(
+        b'PK\x03\x04', VERSION_ZIP64 if zip64 else VERSION_DEFLATE, flags, method, member.dostime,
+        member.dosdate, crc, 0xFFFFFFFF if zip64 else compress_size, 0xFFFFFFFF if zip64 else file_size,
+        len(encoded), len(extra)))
+    out.write(encoded)
+    out.write(extra)
+
+    if isinstance(data, bytes):
+        out.write(data)
+    elif data is not None:
+        with data:
+            shutil.copyfileobj(data, out, CHUNK_SIZE)
+    else:
+        with open(path, 'rb') as f:
+            remaining = file_size
+            while remaining:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise OSError('{} changed while being archived.'.format(path))
+                out.write(chunk)
+                remaining -= len(chunk)
+    return member
+
+
+def _write_central_directory(out, members):
+    start = out.tell()
+    for member in members:
+        encoded, flags = _encode_name(member.name)
+        fields = [value for value in (member.file_size, member.compress_size, member.offset) if value >= ZIP64_LIMIT]
+        extra = struct.pack('<HH' + 'Q' * len(fields), 1, 8 * len(fields), *fields) if fields else b''
+        external_attr = (member.mode & 0xFFFF) << 16
+        if member.name.endswith('/'):
+            external_attr |= 0x10
+        version = VERSION_ZIP64 if fields else VERSION_DEFLATE
+        out.write(CENTRAL_HEADER.pack(
+            b'PK\x01\x02', version, CREATE_SYSTEM, version, flags, member.method, member.dostime,
+            member.dosdate, member.crc, 0xFFFFFFFF if member.compress_size >= ZIP64_LIMIT else member.compress_size,
+            0xFFFFFFFF if member.file_size >= ZIP64_LIMIT else member.file_size,
+            len(encoded), len(extra), 0, 0, 0, external_attr,
+            0xFFFFFFFF if member.offset >= ZIP64_LIMIT else member.offset))
+        out.write(encoded)
+        out.write(extra)
+
+    end = out.tell()
+    count, size = len(members), end - start
+    if count >= ZIP64_COUNT_LIMIT or size >= ZIP64_LIMIT or start >= ZIP64_LIMIT:
+        out.write(END_RECORD64.pack(
+            b'PK\x06\x06', END_RECORD64.size - 12, VERSION_ZIP64, VERSION_ZIP64, 0, 0, count, count, size, start))
+        out.write(END_LOCATOR64.pack(b'PK\x06\x07', 0, end, 1))
+        count = count if count < ZIP64_COUNT_LIMIT else 0xFFFF
+        size = size if size < ZIP64_LIMIT else 0xFFFFFFFF
+        start = start if start < ZIP64_LIMIT else 0xFFFFFFFF
+    out.write(END_RECORD.pack(b'PK\x05\x06', 0, 0, count, count, size, start, 0))
+
+
+def _encode_name(name):
+    try:
+        return name.encode('ascii'), 0
+    except UnicodeEncodeError:
+        return name.encode('utf-8'), UTF8_FLAG
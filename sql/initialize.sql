@@ -70,6 +70,14 @@ CREATE TABLE `model_catalog`.`deployments` (
     FOREIGN KEY (artifact_id) REFERENCES artifacts(id)
 );
 
+-- Indexes for the lookups the CLI hooks make. The composite indexes lead with
+-- the foreign key column, so they also serve the foreign key constraints.
+CREATE UNIQUE INDEX idx_models_name ON `model_catalog`.`models` (name);
+CREATE INDEX idx_artifacts_model_compliant_version ON `model_catalog`.`artifacts` (model_id, is_compliant, version);
+CREATE INDEX idx_artifacts_model_version ON `model_catalog`.`artifacts` (model_id, version);
+CREATE UNIQUE INDEX idx_deployments_job_id ON `model_catalog`.`deployments` (job_id);
+CREATE INDEX idx_deployments_artifact_job_type ON `model_catalog`.`deployments` (artifact_id, job_type);
+
 INSERT INTO `model_catalog`.`namespaces` (name, owner) VALUES ('Microsoft', 'omldev@microsoft.com');
 
 CREATE USER 'oml_users'@'%';
@@ -0,0 +1,15 @@
+-- Adds the lookup indexes of initialize.sql to a catalog created before them.
+--
+-- The unique indexes fail on existing duplicates. Find them first with:
+--
+--   SELECT name, COUNT(*) FROM `model_catalog`.`models` GROUP BY name HAVING COUNT(*) > 1;
+--   SELECT job_id, COUNT(*) FROM `model_catalog`.`deployments` GROUP BY job_id HAVING COUNT(*) > 1;
+--
+-- InnoDB builds secondary indexes in place, so reads and writes continue
+-- while the statements run.
+
+CREATE UNIQUE INDEX idx_models_name ON `model_catalog`.`models` (name);
+CREATE INDEX idx_artifacts_model_compliant_version ON `model_catalog`.`artifacts` (model_id, is_compliant, version);
+CREATE INDEX idx_artifacts_model_version ON `model_catalog`.`artifacts` (model_id, version);
+CREATE UNIQUE INDEX idx_deployments_job_id ON `model_catalog`.`deployments` (job_id);
+CREATE INDEX idx_deployments_artifact_job_type ON `model_catalog`.`deployments` (artifact_id, job_type);
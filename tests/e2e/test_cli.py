@@ -25,7 +25,7 @@ class CLITest(TestCase):
     @mock.patch('oml.hooks.adls.AzureDataLakeStoreHook.authenticate')
     @mock.patch('oml.hooks.adls.AzureDataLakeStoreHook.upload')
     @mock.patch('oml.context.Context.is_outdated')
-    @mock.patch('oml.hooks.catalog.ModelCatalogHook.update_deployment')
+    @mock.patch('oml.hooks.catalog.ModelCatalogHook.sync_deployments')
     @mock.patch('oml.hooks.catalog.ModelCatalogHook.create_deployment')
     @mock.patch('oml.hooks.catalog.ModelCatalogHook.register')
     @mock.patch('oml.hooks.catalog.ModelCatalogHook.get_model')
@@ -40,7 +40,7 @@ class CLITest(TestCase):
     @mock.patch('oml.util.auth.get_token')
     def test_dlis_deployment(self, mock_get_token, mock_create_test, mock_get_tests, mock_get_deployments,
             mock_deployment, mock_get_models, mock_get_model_tests, mock_get_model_deployments,
-            mock_get_model_artifacts, mock_get_model, mock_register, mock_create_deployment, mock_update_deployment,
+            mock_get_model_artifacts, mock_get_model, mock_register, mock_create_deployment, mock_sync_deployments,
             mock_outdated, mock_adls_upload, mock_auth, mock_pipeline_owner):
         # Non-compliant deployment
         if 'BUILD_STAGINGDIRECTORY' in os.environ:
@@ -125,11 +125,11 @@ class CLITest(TestCase):
         self.assertIn('Task submitted', result.output)
 
     @skipUnless(sys.platform.startswith('win'), 'requires Windows')
-    @mock.patch('oml.hooks.catalog.ModelCatalogHook.update_deployment')
+    @mock.patch('oml.hooks.catalog.ModelCatalogHook.sync_deployments')
     @mock.patch('oml.hooks.catalog.ModelCatalogHook.get_model')
-    @mock.patch('oml.hooks.dlis.DLISHook.get_tests')
+    @mock.patch('oml.hooks.dlis.DLISHook.iter_tests')
     @mock.patch('oml.util.auth.get_token')
-    def test_cli_dlis_list(self, mock_get_token, mock_get_tests, mock_get_model, mock_update_deployment):
+    def test_cli_dlis_list(self, mock_get_token, mock_get_tests, mock_get_model, mock_sync_deployments):
         new_status = 'succeeded'
         test_id = '1234'
         mock_get_token.return_value = {'accessToken': '1111'}
@@ -137,16 +137,16 @@ class CLITest(TestCase):
             'owner': 'REDMOND\\test',
             'name': 'test'
         }
-        mock_get_tests.return_value = [{
+        mock_get_tests.return_value = iter([{
             'ID': test_id,
             'ModelName': 'test',
             'StartTime': 'test',
             'EndTime': 'test',
             'Status': new_status,
             'Error': 'test'
-        }]
+        }])
         result = CliRunner().invoke(main, ['dlis', 'list'])
-        mock_update_deployment.assert_called_with(test_id, new_status)
+        mock_sync_deployments.assert_called_once_with('test', {test_id: new_status}, 'test')
         self.assertEqual(mock_get_tests.call_count, 1)
         self.assertEqual(result.exit_code, 0)
         self.assertIn('1 test(s) found', result.output)
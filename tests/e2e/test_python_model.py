@@ -28,6 +28,14 @@ class TestPythonModel(TestCase):
         self.model.serve()
         self.assertEqual(mock_serve.call_count, 1)
 
+    @mock.patch('oml.util.wsgi.serve')
+    @mock.patch('oml.util.warmup.validate')
+    def test_serve_warmup_concurrency(self, mock_validate, mock_wsgi_serve):
+        self.model.model.serve(8000, workers=2, threads=3, server='prefork', warmup=True)
+        self.assertEqual(mock_validate.call_args[0][3], 3)
+        self.model.model.serve(8000, warmup=True)
+        self.assertEqual(mock_validate.call_args[0][3], 1)
+
     @skipUnless(sys.platform.startswith('win'), 'requires Windows')
     @mock.patch('shutil.rmtree')
     @mock.patch('subprocess.run')
@@ -56,6 +64,23 @@ class TestPythonModel(TestCase):
         self.assertEqual(os.path.exists(os.path.join(package_path, 'conda',
             '{}.zip'.format(self.model.model_name))), False)
 
+    @mock.patch('oml.models.python.run_shell')
+    def test_prepare_package_runs_in_conda_env(self, mock_run_shell):
+        python_model = self.model.model
+        os.makedirs(python_model.conda_package_path, exist_ok=True)
+        python_path = os.path.join(python_model.conda_package_path, 'python.exe')
+        open(python_path, 'w').close()
+        python_model._prepare_package_data()
+        args = mock_run_shell.call_args[0][0]
+        self.assertEqual(args[0], python_path)
+        self.assertIn('from {}.model import Model'.format(python_model.model_name), args[2])
+        self.assertEqual(args[3], os.path.join(python_model.model_package_dir_path, 'data'))
+
+    @mock.patch('oml.models.python.run_shell')
+    def test_prepare_package_skipped_without_conda_env(self, mock_run_shell):
+        self.model.model._prepare_package_data()
+        self.assertEqual(mock_run_shell.call_count, 0)
+
     @skipUnless(sys.platform.startswith('win'), 'requires Windows')
     @mock.patch('oml.util.pipeline.get_pipeline_owner')
     @mock.patch('oml.context.Context.is_outdated')
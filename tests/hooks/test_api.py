@@ -1,3 +1,5 @@
+import json
+from urllib.parse import parse_qs, urlparse
 from unittest import mock, TestCase
 from requests import ConnectionError
 import responses
@@ -12,6 +14,13 @@ class ApiHookTest(TestCase):
     def setUp(self, mock_get_token):
         mock_get_token.return_value = {'accessToken': '1111'}
         self.hook = ApiHook()
+        self.metadata = {}
+        patches = [
+            mock.patch('oml.hooks.api.get_user_metadata', side_effect=lambda: dict(self.metadata)),
+            mock.patch('oml.hooks.api.update_user_metadata', side_effect=self.metadata.__setitem__)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
 
     @responses.activate
     def test_create_model(self):
@@ -127,3 +136,91 @@ class ApiHookTest(TestCase):
 
         res = self.hook.update_deployment(job_id='1234', status='succeeded')
         self.assertEqual(res, {'ID': '1'})
+
+    @responses.activate
+    def test_update_deployments(self):
+        responses.add(responses.PUT,
+            self.hook.bulk_deployments_url,
+            json=[{'ID': '1'}, {'ID': '2'}])
+
+        res = self.hook.update_deployments({'1234': 'succeeded', '5678': 'failed'})
+        self.assertEqual(res, [{'ID': '1'}, {'ID': '2'}])
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(json.loads(responses.calls[0].request.body), [
+            {'job_id': '1234', 'status': 'succeeded'},
+            {'job_id': '5678', 'status': 'failed'}])
+
+    @responses.activate
+    def test_update_deployments_fallback(self):
+        responses.add(responses.PUT, self.hook.bulk_deployments_url, status=404)
+        responses.add(responses.PUT, self.hook.deployments_url, json={'ID': '1'})
+
+        res = self.hook.update_deployments({'1234': 'succeeded', '5678': 'failed'})
+        self.assertEqual(res, [{'ID': '1'}, {'ID': '1'}])
+        self.hook.update_deployments({'1234': 'succeeded'})
+        # The bulk endpoint is only probed once
+        urls = [c.request.url.split('?')[0] for c in responses.calls]
+        self.assertEqual(urls.count(self.hook.bulk_deployments_url), 1)
+        self.assertEqual(len(responses.calls), 4)
+
+    @responses.activate
+    def test_iter_artifacts(self):
+        url = '/'.join([self.hook.models_url, '1', 'artifacts'])
+        # Matching responses are returned in the order they were added
+        for ids in [['0', '1'], ['2']]:
+            responses.add(responses.GET, url, json=[{'id': i} for i in ids])
+
+        res = self.hook.iter_artifacts(model_id='1', page_size=2)
+        self.assertEqual([r['id'] for r in res], ['0', '1', '2'])
+        self.assertEqual([parse_qs(urlparse(c.request.url).query) for c in responses.calls], [
+            {'limit': ['2'], 'offset': ['0']},
+            {'limit': ['2'], 'offset': ['2']}])
+
+    @responses.activate
+    def test_register_artifact(self):
+        responses.add(responses.POST, self.hook.register_url, json={'id': '2', 'model_id': '1'})
+
+        res = self.hook.register_artifact({'name': 'test'}, {'version': '1.0.0'})
+        self.assertEqual(res, {'id': '2', 'model_id': '1'})
+        self.assertEqual(json.loads(responses.calls[0].request.body),
+            {'model': {'name': 'test'}, 'artifact': {'version': '1.0.0'}})
+
+    @responses.activate
+    def test_register_artifact_unsupported(self):
+        responses.add(responses.POST, self.hook.register_url, status=404)
+
+        self.assertIsNone(self.hook.register_artifact({'name': 'test'}, {'version': '1.0.0'}))
+        self.assertIsNone(self.hook.register_artifact({'name': 'test'}, {'version': '1.0.0'}))
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    @mock.patch('oml.util.auth.get_token', return_value={'accessToken': '1111'})
+    def test_unsupported_endpoint_is_remembered_across_processes(self, mock_get_token):
+        responses.add(responses.POST, self.hook.register_url, status=404)
+
+        self.assertIsNone(self.hook.register_artifact({'name': 'test'}, {'version': '1.0.0'}))
+        # A later oml process does not probe the endpoint again
+        self.assertIsNone(ApiHook().register_artifact({'name': 'test'}, {'version': '1.0.0'}))
+        self.assertEqual(len(responses.calls), 1)
+
+        # Until the entry expires, in case the API was updated
+        with mock.patch('oml.hooks.api.UNSUPPORTED_ENDPOINT_TTL', 0):
+            self.assertIsNone(ApiHook().register_artifact({'name': 'test'}, {'version': '1.0.0'}))
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_rejected_requests_raise(self):
+        statuses = [400, 401, 403, 409, 422]
+        # Matching responses are returned in the order they were added
+        for status in statuses:
+            responses.add(responses.POST, self.hook.register_url, status=status)
+            responses.add(responses.PUT, self.hook.bulk_deployments_url, status=status)
+        for _ in statuses:
+            with self.assertRaises(OMLException):
+                self.hook.register_artifact({'name': 'test'}, {'version': '1.0.0'})
+            with self.assertRaises(OMLException):
+                self.hook.update_deployments({'1234': 'succeeded'})
+        self.assertEqual([c.response.status_code for c in responses.calls][::2], statuses)
+        # Neither endpoint is given up on, nor the request replayed without it
+        self.assertEqual(len(responses.calls), 2 * len(statuses))
+        self.assertEqual(self.metadata, {})
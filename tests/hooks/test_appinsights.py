@@ -1,13 +1,125 @@
-from oml.hooks.appinsights import AppInsightsHook
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from oml.hooks.appinsights import AppInsightsHook, read_spool
 from unittest import mock, TestCase
 
+# Seconds the stub endpoint takes to answer each request
+STUB_LATENCY = 1.0
+
+
+class SlowTelemetryHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        time.sleep(STUB_LATENCY)
+        self.server.envelopes.extend(json.loads(body.decode('utf-8')))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
 
 class AppInsightsTest(TestCase):
 
-    @mock.patch('applicationinsights.TelemetryClient.flush')
-    @mock.patch('applicationinsights.TelemetryClient.track_event')
-    def test_appinsights_track_event(self, mock_track, mock_flush):
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp()
+        self.spool_path = os.path.join(self.tmp_path, 'telemetry.spool')
+        patchers = [
+            mock.patch('oml.hooks.appinsights.TELEMETRY_SPOOL_FILE_PATH', self.spool_path),
+            mock.patch('oml.hooks.appinsights.ensure_app_cache_dir'),
+            mock.patch('oml.hooks.appinsights.atexit'),
+            mock.patch('pkg_resources.require', return_value=[mock.Mock(version='0.0.0')]),
+            mock.patch('oml.settings.Settings.user_id', 'test-user')
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def start_stub_endpoint(self):
+        server = HTTPServer(('127.0.0.1', 0), SlowTelemetryHandler)
+        server.envelopes = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, 'http://127.0.0.1:{}/v2/track'.format(server.server_port)
+
+    @mock.patch.dict(os.environ, {'OML_TELEMETRY': 'sync'})
+    @mock.patch('oml.hooks.appinsights.TelemetryClient')
+    def test_appinsights_track_event_sync(self, mock_client):
+        hook = AppInsightsHook()
+        hook.track_event('test_event', 'test_command')
+        self.assertIsNone(hook.worker)
+        self.assertEqual(mock_client.return_value.track_event.call_count, 1)
+        self.assertEqual(mock_client.return_value.flush.call_count, 1)
+
+    @mock.patch.dict(os.environ, {'OML_TELEMETRY': 'off'})
+    @mock.patch('oml.hooks.appinsights.TelemetryClient')
+    def test_appinsights_track_event_off(self, mock_client):
         hook = AppInsightsHook()
         hook.track_event('test_event', 'test_command')
-        self.assertEqual(mock_track.call_count, 1)
-        self.assertEqual(mock_flush.call_count, 1)
+        self.assertIsNone(hook.worker)
+        mock_client.return_value.track_event.assert_not_called()
+        mock_client.return_value.flush.assert_not_called()
+
+    @mock.patch.dict(os.environ, {'OML_TELEMETRY': 'async'})
+    def test_appinsights_track_event_does_not_block(self):
+        server, endpoint = self.start_stub_endpoint()
+        hook = AppInsightsHook(endpoint)
+
+        start = time.perf_counter()
+        hook.track_event('command', 'list')
+        hook.track_event('command', 'show')
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, STUB_LATENCY / 10)
+        self.assertTrue(hook.flush(timeout=STUB_LATENCY * 10))
+        actions = [e['data']['baseData']['properties']['action'] for e in server.envelopes]
+        self.assertEqual(sorted(actions), ['list', 'show'])
+
+    @mock.patch.dict(os.environ, {'OML_TELEMETRY': 'async'})
+    @mock.patch('oml.hooks.appinsights.TelemetryClient')
+    def test_appinsights_spools_unsent_events(self, mock_client):
+        release = threading.Event()
+        mock_client.return_value.flush.side_effect = lambda: release.wait()
+
+        hook = AppInsightsHook()
+        hook.track_event('command', 'list')
+        hook.track_event('command', 'show')
+        hook.worker.close(timeout=0.1)
+        release.set()
+
+        replayed = read_spool()
+        self.assertEqual(sorted(e['action'] for e in replayed), ['list', 'show'])
+        self.assertFalse(os.path.exists(self.spool_path))
+
+    @mock.patch.dict(os.environ, {'OML_TELEMETRY': 'async'})
+    def test_appinsights_close_sends_before_spooling(self):
+        server, endpoint = self.start_stub_endpoint()
+        hook = AppInsightsHook(endpoint)
+        hook.track_event('command', 'list')
+
+        hook.worker.close(timeout=STUB_LATENCY * 10)
+        actions = [e['data']['baseData']['properties']['action'] for e in server.envelopes]
+        self.assertEqual(actions, ['list'])
+        self.assertFalse(os.path.exists(self.spool_path))
+
+    @mock.patch.dict(os.environ, {'OML_TELEMETRY': 'async'})
+    @mock.patch('oml.hooks.appinsights.TelemetryClient')
+    def test_appinsights_replays_spool(self, mock_client):
+        with open(self.spool_path, 'w') as f:
+            f.write(json.dumps({'action': 'spooled'}) + '\n')
+
+        hook = AppInsightsHook()
+        self.assertTrue(hook.flush(timeout=5))
+        mock_client.return_value.track_event.assert_called_once_with(mock.ANY, {'action': 'spooled'})
+        self.assertFalse(os.path.exists(self.spool_path))
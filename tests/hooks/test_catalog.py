@@ -14,6 +14,7 @@ class ModelCatalogHookTest(TestCase):
     @mock.patch('oml.util.auth.get_token')
     def setUp(self, mock_get_token):
         mock_get_token.return_value = {'accessToken': '1111'}
+        ModelCatalogHook._model_ids.clear()
         self.hook = ModelCatalogHook()
         self.hook.metadata = {
             'name': METADATA_NAME,
@@ -24,10 +25,11 @@ class ModelCatalogHookTest(TestCase):
             'is_compliant': False
         }
 
+    @mock.patch('oml.hooks.api.ApiHook.register_artifact', return_value=None)
     @mock.patch('oml.hooks.api.ApiHook.create_artifact')
     @mock.patch('oml.hooks.api.ApiHook.create_model')
     @mock.patch('oml.hooks.api.ApiHook.get_model')
-    def test_register(self, mock_get_model, mock_create_model, mock_create_artifact):
+    def test_register(self, mock_get_model, mock_create_model, mock_create_artifact, mock_register_artifact):
         artifact_type = 'model'
         version = '1.0.0'
         path = 'path/to/model'
@@ -52,6 +54,29 @@ class ModelCatalogHookTest(TestCase):
             'is_compliant': is_compliant
         })
 
+    @mock.patch('oml.hooks.api.ApiHook.get_model')
+    @mock.patch('oml.hooks.api.ApiHook.register_artifact')
+    def test_register_upsert(self, mock_register_artifact, mock_get_model):
+        mock_register_artifact.return_value = {'id': '2', 'model_id': '10'}
+        res = self.hook.register('model', '1.0.0', 'path/to/model', 'adls')
+        self.assertEqual(res, {'id': '2', 'model_id': '10'})
+        mock_register_artifact.assert_called_once_with({
+            'flavor': METADATA_FLAVOR,
+            'language': CSHARP_LANG,
+            'owner': METADATA_OWNER,
+            'name': METADATA_NAME
+        }, {
+            'version': '1.0.0',
+            'type': 'model',
+            'path': 'path/to/model',
+            'storage': 'adls',
+            'platform': METADATA_PLATFORM,
+            'is_compliant': False
+        })
+        # The model id is cached for later lookups by name
+        self.assertEqual(self.hook._get_model_id(METADATA_NAME), '10')
+        mock_get_model.assert_not_called()
+
     @mock.patch('oml.hooks.api.ApiHook.create_deployment')
     def test_create_deployment(self, mock_create_deployment):
         artifact_id = '1'
@@ -70,15 +95,57 @@ class ModelCatalogHookTest(TestCase):
         self.hook.update_deployment(job_id='1234', status='succeeded')
         mock_update_deployment.assert_called_with('1234', 'succeeded')
 
+    @mock.patch('oml.hooks.api.ApiHook.update_deployments')
+    @mock.patch('oml.hooks.api.ApiHook.get_deployment_jobs')
+    @mock.patch('oml.hooks.api.ApiHook.iter_artifacts')
+    @mock.patch('oml.hooks.api.ApiHook.get_model')
+    def test_sync_deployments(self, mock_get_model, mock_iter_artifacts, mock_get_deployment_jobs,
+            mock_update_deployments):
+        mock_get_model.return_value = [{'id': '10'}]
+        mock_iter_artifacts.return_value = [{'id': '1'}, {'id': '2'}]
+        mock_get_deployment_jobs.side_effect = [
+            [{'job_id': '1', 'status': 'running'}, {'job_id': '2', 'status': 'failed'}],
+            [{'job_id': '3', 'status': 'running'}]]
+
+        changes = self.hook.sync_deployments('test', {'1': 'succeeded', '2': 'failed', '4': 'failed'}, 'sync')
+        # Only the changed job is sent, and the job the catalog does not track is left out
+        self.assertEqual(changes, {'1': 'succeeded'})
+        mock_update_deployments.assert_called_once_with({'1': 'succeeded'})
+        # Only the model's jobs are fetched
+        mock_iter_artifacts.assert_called_once_with('10')
+        self.assertEqual(mock_get_deployment_jobs.call_args_list, [mock.call('test', '1'), mock.call('test', '2')])
+
+        mock_update_deployments.reset_mock()
+        mock_get_deployment_jobs.side_effect = [[{'job_id': '1', 'status': 'succeeded'}], []]
+        self.assertEqual(self.hook.sync_deployments('test', {'1': 'succeeded'}, 'sync'), {})
+        mock_update_deployments.assert_not_called()
+
+    @mock.patch('oml.hooks.api.ApiHook.update_deployments')
+    @mock.patch('oml.hooks.api.ApiHook.get_deployment_jobs')
+    def test_sync_deployments_without_model(self, mock_get_deployment_jobs, mock_update_deployments):
+        changes = self.hook.sync_deployments('test', {'1': 'succeeded'})
+        self.assertEqual(changes, {'1': 'succeeded'})
+        mock_update_deployments.assert_called_once_with({'1': 'succeeded'})
+        mock_get_deployment_jobs.assert_not_called()
+
+        mock_update_deployments.reset_mock()
+        self.hook.sync_deployments('test', {})
+        mock_update_deployments.assert_not_called()
+
+    @mock.patch('oml.hooks.api.ApiHook.get_model')
     @mock.patch('oml.hooks.api.ApiHook.get_artifacts')
-    def test_list(self, mock_get_artifacts):
+    def test_list(self, mock_get_artifacts, mock_get_model):
         mock_get_artifacts.return_value = {
             'ID': '1'
         }
+        mock_get_model.return_value = [{'id': '1'}]
+        self.hook.list()
+        mock_get_artifacts.assert_called_with('1', name=METADATA_NAME)
         self.hook.list()
-        mock_get_artifacts.assert_called_with(name=METADATA_NAME)
+        mock_get_model.assert_called_once_with(name=METADATA_NAME)
+        mock_get_model.return_value = []
         self.hook.list(model_name='model')
-        mock_get_artifacts.assert_called_with(name='model')
+        mock_get_artifacts.assert_called_with(None, name='model')
 
     @mock.patch('oml.hooks.api.ApiHook.get_model')
     def test_get_model(self, mock_get_model):
@@ -1,8 +1,9 @@
+from urllib.parse import parse_qs, urlparse
 from unittest import mock, TestCase
 import responses
 
 from oml.hooks.dlis import DLISHook
-from oml.settings import DLIS_API_ENDPOINT
+from oml.settings import config
 
 
 class DLISHookTest(TestCase):
@@ -11,7 +12,7 @@ class DLISHookTest(TestCase):
     def setUp(self, mock_get_token):
         mock_get_token.return_value = {'accessToken': '1111'}
         self.hook = DLISHook()
-        self.dlis_endpoint = '/'.join([DLIS_API_ENDPOINT, 'dlis'])
+        self.dlis_endpoint = '/'.join([config.dlis_api_endpoint, 'dlis'])
 
     @responses.activate
     def test_get_tests(self):
@@ -58,3 +59,42 @@ class DLISHookTest(TestCase):
 
         res = self.hook.create_deployment(data={'test': 'test'})
         self.assertEqual(res, {'ID': '1'})
+
+    @responses.activate
+    def test_iter_tests(self):
+        url = '/'.join([self.dlis_endpoint, 'tests'])
+        # Matching responses are returned in the order they were added
+        for ids in [['0', '1'], ['2', '3'], ['4']]:
+            responses.add(responses.GET, url, json=[{'ID': i} for i in ids])
+
+        res = self.hook.iter_tests(page_size=2)
+        self.assertEqual(next(res), {'ID': '0'})
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual([r['ID'] for r in res], ['1', '2', '3', '4'])
+        self.assertEqual([parse_qs(urlparse(c.request.url).query) for c in responses.calls], [
+            {'$orderby': ['StartTime desc'], '$top': ['2'], '$skip': [str(skip)]} for skip in (0, 2, 4)])
+
+    @responses.activate
+    def test_iter_deployments_with_next_link(self):
+        url = '/'.join([self.dlis_endpoint, 'deployments'])
+        next_link = '{}?$skiptoken=abc'.format(url)
+        responses.add(responses.GET, url,
+            json={'value': [{'ID': '0'}, {'ID': '1'}], '@odata.nextLink': next_link})
+        responses.add(responses.GET, url,
+            json={'value': [{'ID': '2'}]})
+
+        res = self.hook.iter_deployments(filter={'ModelName': 'test'}, page_size=5)
+        self.assertEqual([r['ID'] for r in res], ['0', '1', '2'])
+        self.assertEqual(len(responses.calls), 2)
+        # The next page is fetched from the next link only
+        self.assertEqual(parse_qs(urlparse(responses.calls[1].request.url).query), {'$skiptoken': ['abc']})
+
+    @responses.activate
+    def test_iter_tests_ignored_skip(self):
+        responses.add(responses.GET,
+            '/'.join([self.dlis_endpoint, 'tests']),
+            json=[{'ID': '0'}, {'ID': '1'}])
+
+        res = self.hook.iter_tests(page_size=2)
+        self.assertEqual([r['ID'] for r in res], ['0', '1'])
+        self.assertEqual(len(responses.calls), 2)
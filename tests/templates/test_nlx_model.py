@@ -0,0 +1,158 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from importlib import import_module
+from importlib.util import find_spec
+from unittest import mock
+
+from oml.settings import TEMPLATE_LANG_DIR_PATH
+
+PACKAGE_NAME = 'nlxtest'
+VOCAB = ['<PAD>', '<UNK>', 'hello', 'world', 'again']
+
+
+@unittest.skipUnless(find_spec('numpy') and find_spec('nltk'), 'requires numpy and nltk')
+class NLXModelTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_path = tempfile.mkdtemp()
+        package_path = os.path.join(cls.tmp_path, PACKAGE_NAME)
+        os.makedirs(package_path)
+        for template in ('base', 'nlx'):
+            code_path = os.path.join(TEMPLATE_LANG_DIR_PATH, 'python', template, 'code')
+            for name in os.listdir(code_path):
+                if name.endswith('.py') and not name.startswith('tpl_'):
+                    shutil.copy(os.path.join(code_path, name), package_path)
+        data_path = os.path.join(cls.tmp_path, 'data')
+        os.makedirs(data_path)
+        with open(os.path.join(data_path, 'vocab.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(VOCAB))
+
+        sys.path.insert(0, cls.tmp_path)
+        cls.nlx_model = import_module(PACKAGE_NAME + '.nlx_model')
+        cls.patcher = mock.patch.object(cls.nlx_model, 'word_tokenize', str.split)
+        cls.patcher.start()
+
+        class Model(cls.nlx_model.NLXModel):
+            def predict(self, data):
+                pass
+
+            def eval(self, **kwargs):
+                pass
+
+        with mock.patch('builtins.print'):
+            cls.model = Model(data_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.patcher.stop()
+        sys.path.remove(cls.tmp_path)
+        shutil.rmtree(cls.tmp_path)
+
+    def test_token_ids(self):
+        ids = self.model.token_ids('hello big world')
+        self.assertEqual(ids.dtype.name, 'int32')
+        self.assertEqual(ids.tolist(), [2, 1, 3])
+
+    def test_token_ids_batch(self):
+        ids, lengths = self.model.token_ids_batch(['hello world', 'again hello world again'], seq_len=3)
+        self.assertEqual(ids.tolist(), [[2, 3, 0], [4, 2, 3]])
+        self.assertEqual(lengths.tolist(), [2, 3])
+
+    def test_dense_one_hot(self):
+        onehot = self.model.generate_onehot('world unknown')
+        self.assertEqual(onehot.shape, (2, len(VOCAB)))
+        self.assertEqual(onehot.argmax(axis=1).tolist(), [3, 1])
+        self.assertEqual(onehot.sum(), 2)
+
+    @unittest.skipUnless(find_spec('scipy'), 'requires scipy')
+    def test_sparse_one_hot_matches_dense(self):
+        query = 'hello world again unknown'
+        self.assertEqual(self.model.onehot_sparse(query).toarray().tolist(),
+                         self.model.generate_onehot(query).tolist())
+
+        onehot, lengths = self.model.onehot_sparse_batch(['hello', 'world again'])
+        self.assertEqual(lengths.tolist(), [1, 2])
+        self.assertEqual(onehot.indices.tolist(), [2, 3, 4])
+        self.assertEqual(onehot.shape, (3, len(VOCAB)))
+
+    def test_vocabulary_lookup(self):
+        vocab = self.model.vocab
+        self.assertEqual(vocab.lookup(['world', 'nope', 'hello', '']).tolist(), [3, -1, 2, -1])
+        self.assertEqual(vocab.lookup([]).tolist(), [])
+        # Longer than every word, so compared truncated to 'hello'
+        self.assertEqual(vocab.lookup(['hello!!', 'hello']).tolist(), [-1, 2])
+        self.assertEqual((vocab.get('again'), vocab.get('nope')), (4, None))
+        self.assertIn('hello', vocab)
+        self.assertEqual(self.model.query_dict, {word: i for i, word in enumerate(VOCAB)})
+
+    def test_vocabulary_keeps_last_id_of_repeated_words(self):
+        vocab_module = import_module(PACKAGE_NAME + '.vocab')
+        path = os.path.join(self.tmp_path, 'repeated.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('a\nb\na\nc')
+
+        vocab = vocab_module.Vocabulary.from_text(path)
+        self.assertEqual(vocab.lookup(['a', 'b', 'c']).tolist(), [2, 1, 3])
+        self.assertEqual(len(vocab), 4)
+
+    def test_empty_vocabulary(self):
+        vocab_module = import_module(PACKAGE_NAME + '.vocab')
+        path = os.path.join(self.tmp_path, 'empty.txt')
+        open(path, 'w').close()
+        vocab = vocab_module.Vocabulary.from_text(path)
+        self.assertEqual(len(vocab), 0)
+        self.assertEqual(vocab.lookup(['a', 'b']).tolist(), [-1, -1])
+
+    def test_prepared_vocabulary_is_memory_mapped(self):
+        vocab_module = import_module(PACKAGE_NAME + '.vocab')
+        data_path = os.path.join(self.tmp_path, 'package')
+        os.makedirs(data_path)
+        vocab_path = os.path.join(data_path, 'vocab.txt')
+        shutil.copy(os.path.join(self.tmp_path, 'data', 'vocab.txt'), vocab_path)
+        os.utime(vocab_path, (0, 0))
+
+        self.model.prepare_package(data_path)
+        vocab = vocab_module.Vocabulary.open(vocab_path)
+        self.assertEqual(type(vocab.words).__name__, 'memmap')
+        self.assertEqual(vocab.lookup(['again', 'hello']).tolist(), [4, 2])
+
+        # A vocab.txt edited after packaging is read again
+        os.utime(vocab_path, None)
+        os.utime(vocab_path + vocab_module.WORDS_SUFFIX, (0, 0))
+        self.assertNotEqual(type(vocab_module.Vocabulary.open(vocab_path).words).__name__, 'memmap')
+
+    def write_lines(self, name, lines):
+        path = os.path.join(self.tmp_path, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
+        return path
+
+    def test_generate_batches_pads_to_fixed_size(self):
+        path = self.write_lines('batches.txt', [
+            'hello world\t1 2', 'again\t3', '', 'hello nope again world\t1 0 1 2', 'world\t4'])
+
+        batches = [(x.copy(), y.copy(), lengths.copy())
+                   for x, y, lengths in self.model.generate_batches(batch_size=3, seq_len=3, filename=path)]
+        self.assertEqual([x.shape for x, _, _ in batches], [(3, 3), (1, 3)])
+        x, y, lengths = batches[0]
+        self.assertEqual(x.tolist(), [[2, 3, 0], [4, 0, 0], [2, 1, 4]])
+        self.assertEqual(y.tolist(), [[1, 2, 0], [3, 0, 0], [1, 0, 1]])
+        self.assertEqual(lengths.tolist(), [2, 1, 3])
+        self.assertEqual(batches[1][0].tolist(), [[3, 0, 0]])
+
+    def test_generate_batches_bucket_and_shuffle(self):
+        lines = ['{}\t{}'.format(' '.join(['hello'] * n), ' '.join(['1'] * n)) for n in (3, 1, 2, 1, 3, 2)]
+        path = self.write_lines('buckets.txt', lines)
+
+        batches = [(x.shape, lengths.tolist())
+                   for x, _, lengths in self.model.generate_batches(batch_size=2, bucket=True, filename=path)]
+        self.assertEqual(batches, [((2, 1), [1, 1]), ((2, 2), [2, 2]), ((2, 3), [3, 3])])
+
+        shuffled = [n for _, _, lengths in self.model.generate_batches(batch_size=4, shuffle=True, seed=1,
+                                                                       filename=path) for n in lengths.tolist()]
+        self.assertEqual(sorted(shuffled), [1, 1, 2, 2, 3, 3])
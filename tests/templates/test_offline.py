@@ -0,0 +1,88 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import spec_from_file_location, module_from_spec
+from unittest import mock
+
+from oml.settings import TEMPLATE_PLATFORM_DIR_PATH
+from tests.templates.test_serving import serving  # noqa: F401 (offline imports the serving module)
+
+OFFLINE_PATH = os.path.join(TEMPLATE_PLATFORM_DIR_PATH, 'common', 'python', 'code', 'offline.py')
+
+
+def load_offline():
+    spec = spec_from_file_location('offline', OFFLINE_PATH)
+    mod = module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    # Process pool workers look module-level functions up by module name
+    sys.modules['offline'] = mod
+    return mod
+
+
+offline = load_offline()
+
+
+class UpperModel:
+
+    def predict(self, data):
+        return data.upper()
+
+    def predict_batch(self, batch):
+        return ['{}:{}'.format(len(batch), data.upper()) for data in batch]
+
+
+class Python36ProcessPoolExecutor(ProcessPoolExecutor):
+    """ProcessPoolExecutor as of Python 3.6, the packaged runtime, which has no initializer."""
+
+    def __init__(self, max_workers=None):
+        super().__init__(max_workers)
+
+
+class ProcessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.tmpdir, 'input.txt')
+        self.output_path = os.path.join(self.tmpdir, 'output.txt')
+        with open(self.input_path, 'w', encoding='utf-8') as f:
+            f.write('a\nb\n\nc\n  d  \ne\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read_output(self):
+        with open(self.output_path, 'r', encoding='utf-8') as f:
+            return f.read().split('\n')[:-1]
+
+    def test_keeps_order_and_blank_lines(self):
+        for workers in (1, 2):
+            lines = offline.process(UpperModel, self.input_path, self.output_path, workers=workers, chunk_size=2,
+                                    progress=offline.Progress(out=None))
+
+            self.assertEqual(lines, 6)
+            self.assertEqual(self.read_output(), ['A', 'B', '', 'C', 'D', 'E'])
+
+    def test_pool_runs_without_initializer(self):
+        with mock.patch.object(offline, 'ProcessPoolExecutor', Python36ProcessPoolExecutor):
+            offline.process(UpperModel, self.input_path, self.output_path, workers=2, chunk_size=2,
+                            progress=offline.Progress(out=None))
+
+        self.assertEqual(self.read_output(), ['A', 'B', '', 'C', 'D', 'E'])
+
+    def test_batch_scores_chunks_together(self):
+        offline.process(UpperModel, self.input_path, self.output_path, workers=2, chunk_size=3, batch=True,
+                        progress=offline.Progress(out=None))
+
+        self.assertEqual(self.read_output(), ['2:A', '2:B', '', '3:C', '3:D', '3:E'])
+
+    def test_reports_progress(self):
+        out = io.StringIO()
+        offline.process(UpperModel, self.input_path, self.output_path, workers=1,
+                        progress=offline.Progress(out=out, interval=0))
+
+        self.assertIn('6 lines in', out.getvalue().splitlines()[-1])
@@ -0,0 +1,320 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from importlib.util import spec_from_file_location, module_from_spec
+
+from oml.settings import TEMPLATE_PLATFORM_DIR_PATH
+from unittest import mock
+
+SERVING_PATH = os.path.join(TEMPLATE_PLATFORM_DIR_PATH, 'common', 'python', 'code', 'serving.py')
+
+
+def load_serving():
+    spec = spec_from_file_location('serving', SERVING_PATH)
+    mod = module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    # Process pool workers look module-level functions up by module name
+    sys.modules['serving'] = mod
+    return mod
+
+
+serving = load_serving()
+
+
+class EchoModel:
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, data):
+        return 'Hello {}!'.format(data)
+
+    def predict_batch(self, batch):
+        self.batches.append(list(batch))
+        time.sleep(0.05)
+        return [self.predict(data) for data in batch]
+
+
+class PredictOnlyModel:
+
+    def predict(self, data):
+        if data == 'fail':
+            raise ValueError('bad input')
+        return data.upper()
+
+
+class BatcherTest(unittest.TestCase):
+
+    def test_concurrent_requests_are_batched(self):
+        model = EchoModel()
+        batcher = serving.Batcher(model, max_batch_size=4, max_wait_ms=50)
+
+        futures = [batcher.submit(str(i)) for i in range(6)]
+        results = [future.result(timeout=5) for future in futures]
+
+        self.assertEqual(results, ['Hello {}!'.format(i) for i in range(6)])
+        self.assertEqual([len(batch) for batch in model.batches], [4, 2])
+        self.assertEqual((batcher.batches, batcher.predictions), (2, 6))
+
+    def test_single_request_waits_at_most_max_wait(self):
+        batcher = serving.Batcher(EchoModel(), max_batch_size=8, max_wait_ms=10)
+        start = time.time()
+        self.assertEqual(batcher.submit('a').result(timeout=5), 'Hello a!')
+        self.assertLess(time.time() - start, 0.5)
+
+    def test_falls_back_to_predict(self):
+        batcher = serving.Batcher(PredictOnlyModel(), max_batch_size=4, max_wait_ms=10)
+        futures = []
+        threads = [threading.Thread(target=lambda d=d: futures.append(batcher.submit(d))) for d in 'abc']
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(future.result(timeout=5) for future in futures), ['A', 'B', 'C'])
+
+    def test_errors_are_returned_to_the_batch(self):
+        batcher = serving.Batcher(PredictOnlyModel(), max_batch_size=2, max_wait_ms=50)
+        futures = [batcher.submit('ok'), batcher.submit('fail')]
+        for future in futures:
+            with self.assertRaisesRegex(ValueError, 'bad input'):
+                future.result(timeout=5)
+        self.assertEqual(batcher.submit('next').result(timeout=5), 'NEXT')
+
+    def test_result_count_mismatch(self):
+        model = EchoModel()
+        model.predict_batch = lambda batch: []
+        batcher = serving.Batcher(model, max_batch_size=1, max_wait_ms=5)
+        with self.assertRaisesRegex(ValueError, '0 results for 1 inputs'):
+            batcher.submit('a').result(timeout=5)
+
+
+class SlowModel:
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+
+    def predict(self, data):
+        time.sleep(self.delay)
+        return '{}:{}'.format(os.getpid(), data)
+
+
+class LoadRecordingModel:
+    """Writes the pid of every process that loads it to OML_TEST_LOADS_DIR."""
+
+    def __init__(self):
+        open(os.path.join(os.environ['OML_TEST_LOADS_DIR'], str(os.getpid())), 'w').close()
+
+    def predict(self, data):
+        return data
+
+
+def config(**kwargs):
+    return dict(serving.DEFAULTS, **kwargs)
+
+
+class PredictorTest(unittest.TestCase):
+
+    def test_thread_executor(self):
+        predictor = serving.Predictor(SlowModel, config=config(workers=2))
+        start = time.time()
+        futures = [predictor.submit(i) for i in range(2)]
+        self.assertEqual([f.result(timeout=5).split(':')[1] for f in futures], ['0', '1'])
+        self.assertLess(time.time() - start, 0.35)
+        self.assertEqual(predictor.in_flight, 0)
+
+    def test_rejects_over_max_in_flight(self):
+        predictor = serving.Predictor(SlowModel, config=config(max_in_flight=2))
+        futures = [predictor.submit(i) for i in range(2)]
+        with self.assertRaises(serving.Overloaded):
+            predictor.submit(3)
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(predictor.rejected, 1)
+        self.assertEqual(predictor.submit(4).result(timeout=5).split(':')[1], '4')
+
+    def test_custom_predict(self):
+        predictor = serving.Predictor(EchoModel, lambda model, a, b: model.predict(a + b), config=config())
+        self.assertEqual(predictor.submit('a', 'b').result(timeout=5), 'Hello ab!')
+
+    def test_batching(self):
+        predictor = serving.Predictor(EchoModel, config=config(max_batch_size=4, max_wait_ms=20))
+        futures = [predictor.submit(i) for i in range(4)]
+        self.assertEqual([f.result(timeout=5) for f in futures], ['Hello {}!'.format(i) for i in range(4)])
+        self.assertEqual(predictor.model.batches, [[0, 1, 2, 3]])
+
+    def test_warm_up(self):
+        predictor = serving.Predictor(PredictOnlyModel, config=config(max_in_flight=2))
+        with mock.patch('builtins.print'):
+            self.assertEqual(predictor.warm_up(['a', 'fail', 'b', 'c', 'fail']), 2)
+        self.assertGreaterEqual(predictor.warmup_seconds, 0)
+        self.assertEqual(predictor.in_flight, 0)
+        self.assertEqual(predictor.stats()['warmup_failed'], 2)
+
+    def test_warm_up_where_every_request_fails_warns(self):
+        predictor = serving.Predictor(PredictOnlyModel, config=config())
+        with mock.patch('builtins.print') as mock_print:
+            self.assertEqual(predictor.warm_up(['fail', 'fail']), 2)
+        self.assertIn('Every warm-up request failed', mock_print.call_args[0][0])
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_process_executor(self):
+        predictor = serving.Predictor(SlowModel, config=config(executor='process', workers=2))
+        self.assertIsNone(predictor.model)
+        futures = [predictor.submit(i) for i in range(2)]
+        pids = {f.result(timeout=10).split(':')[0] for f in futures}
+        self.assertNotIn(str(os.getpid()), pids)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_warm_up_loads_every_worker_process(self):
+        loads_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, loads_dir)
+        predictor = serving.Predictor(LoadRecordingModel, config=config(executor='process', workers=3))
+        with mock.patch.dict(os.environ, {'OML_TEST_LOADS_DIR': loads_dir}), mock.patch('builtins.print'):
+            # Fewer samples than processes
+            self.assertEqual(predictor.warm_up(['a']), 0)
+        self.assertEqual(len(os.listdir(loads_dir)), 3)
+        self.assertNotIn(str(os.getpid()), os.listdir(loads_dir))
+
+
+class PredictionCacheTest(unittest.TestCase):
+
+    def test_lru_eviction_by_entries(self):
+        cache = serving.PredictionCache(max_entries=2, max_bytes=1024)
+        for data in ('a', 'b'):
+            cache.put(cache.key(data), data.upper())
+        self.assertEqual(cache.get(cache.key('a')), 'A')
+        cache.put(cache.key('c'), 'C')
+
+        self.assertIs(cache.get(cache.key('b')), serving.PredictionCache.MISSING)
+        self.assertEqual(cache.get(cache.key('a')), 'A')
+        stats = cache.stats()
+        self.assertEqual((stats['entries'], stats['hits'], stats['misses'], stats['evictions']), (2, 2, 1, 1))
+
+    def test_eviction_by_bytes(self):
+        cache = serving.PredictionCache(max_entries=10, max_bytes=10)
+        cache.put(cache.key('a'), 'x' * 6)
+        cache.put(cache.key('b'), 'y' * 6)
+        cache.put(cache.key('c'), 'z' * 11)
+
+        self.assertEqual(cache.stats()['entries'], 1)
+        self.assertEqual(cache.bytes, 6)
+        self.assertIs(cache.get(cache.key('c')), serving.PredictionCache.MISSING)
+
+    def test_ttl(self):
+        cache = serving.PredictionCache(max_entries=10, max_bytes=1024, ttl=0.05)
+        cache.put(cache.key('a'), 'A')
+        self.assertEqual(cache.get(cache.key('a')), 'A')
+        time.sleep(0.1)
+        self.assertIs(cache.get(cache.key('a')), serving.PredictionCache.MISSING)
+        self.assertEqual((cache.stats()['expirations'], cache.bytes), (1, 0))
+
+    def test_text_and_binary_keys_differ(self):
+        self.assertNotEqual(serving.PredictionCache.key('a'), serving.PredictionCache.key(b'a'))
+
+
+class CountingModel:
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, data):
+        self.calls += 1
+        time.sleep(0.05)
+        return data.upper()
+
+
+class PredictorCacheTest(unittest.TestCase):
+
+    def test_repeated_requests_are_cached(self):
+        predictor = serving.Predictor(CountingModel, config=config(cache_entries=10))
+        self.assertEqual(predictor.submit('a').result(timeout=5), 'A')
+        self.assertEqual(predictor.submit('a').result(timeout=5), 'A')
+
+        self.assertEqual(predictor.model.calls, 1)
+        self.assertEqual(predictor.stats()['cache']['hits'], 1)
+
+    def test_identical_requests_in_flight_share_a_prediction(self):
+        predictor = serving.Predictor(CountingModel, config=config(cache_entries=10, workers=4))
+        futures = [predictor.submit('a') for _ in range(4)]
+
+        self.assertEqual([f.result(timeout=5) for f in futures], ['A'] * 4)
+        self.assertEqual(predictor.model.calls, 1)
+        self.assertEqual(predictor.coalesced, 3)
+
+    def test_errors_are_not_cached(self):
+        predictor = serving.Predictor(PredictOnlyModel, config=config(cache_entries=10))
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                predictor.submit('fail').result(timeout=5)
+        self.assertEqual(predictor.cache.stats()['entries'], 0)
+
+    def test_off_by_default(self):
+        predictor = serving.Predictor(CountingModel, config=config())
+        predictor.submit('a').result(timeout=5)
+        predictor.submit('a').result(timeout=5)
+        self.assertEqual(predictor.model.calls, 2)
+        self.assertIsNone(predictor.stats()['cache'])
+
+
+class LoadConfigTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.tmp_path, 'serving.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_defaults(self):
+        self.assertEqual(serving.load_config(self.config_path), serving.DEFAULTS)
+
+    def test_file_and_environment(self):
+        with open(self.config_path, 'w') as f:
+            json.dump({'workers': 4, 'max_in_flight': 8}, f)
+        with mock.patch.dict(os.environ, {'OML_WORKERS': '2', 'OML_MAX_WAIT_MS': '2.5'}):
+            result = serving.load_config(self.config_path)
+        self.assertEqual(result['workers'], 2)
+        self.assertEqual(result['max_in_flight'], 8)
+        self.assertEqual(result['max_wait_ms'], 2.5)
+
+    def test_invalid_executor(self):
+        with mock.patch.dict(os.environ, {'OML_EXECUTOR': 'fiber'}):
+            with self.assertRaisesRegex(ValueError, 'executor must be one of'):
+                serving.load_config(self.config_path)
+
+    def test_empty_environment_value_turns_warm_up_off(self):
+        with mock.patch.dict(os.environ, {'OML_WARMUP_FILE': ''}):
+            self.assertEqual(serving.load_config(self.config_path)['warmup_file'], '')
+
+
+class LoadWarmupSamplesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data_path = tempfile.mkdtemp()
+        with open(os.path.join(self.data_path, 'input.txt'), 'w', encoding='utf-8') as f:
+            f.write('a\n\nb\nc\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.data_path)
+
+    def test_reads_up_to_warmup_samples(self):
+        self.assertEqual(serving.load_warmup_samples(config(warmup_samples=2), self.data_path), ['a', 'b'])
+
+    def test_off_or_missing(self):
+        self.assertEqual(serving.load_warmup_samples(config(warmup_file=''), self.data_path), [])
+        with mock.patch('builtins.print'):
+            self.assertEqual(serving.load_warmup_samples(config(warmup_file='none.txt'), self.data_path), [])
+
+    def test_binary_samples(self):
+        with open(os.path.join(self.data_path, 'input.qas.b64'), 'w', encoding='utf-8') as f:
+            f.write('AAEC\nnot base64!\n/w==\n')
+        with mock.patch('builtins.print') as mock_print:
+            samples = serving.load_warmup_samples(config(), self.data_path, 'qas_warmup_file', binary=True)
+        self.assertEqual(samples, [b'\x00\x01\x02', b'\xff'])
+        self.assertIn('Skipped 1 warm-up lines', mock_print.call_args[0][0])
@@ -0,0 +1,110 @@
+import json
+import os
+import subprocess  # nosec
+import sys
+import time
+
+from click.testing import CliRunner
+from oml.cli import main
+from unittest import mock, TestCase
+
+# Wall-clock budget for a cold `oml --help`, in seconds
+HELP_TIME_BUDGET = float(os.environ.get('OML_HELP_TIME_BUDGET', '2.0'))
+HEAVY_MODULES = ['azureml', 'azure.mgmt.containerregistry', 'OpenSSL', 'rsa', 'git', 'jinja2', 'bottle']
+
+
+def run_help():
+    code = ('import sys\n'
+            'from oml.cli import main\n'
+            'try:\n'
+            '    main(["--help"])\n'
+            'except SystemExit:\n'
+            '    pass\n'
+            'sys.stderr.write(",".join(m for m in {} if m in sys.modules))\n').format(HEAVY_MODULES)
+    start = time.perf_counter()
+    res = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE, check=True)  # nosec
+    return time.perf_counter() - start, res.stderr.decode('utf-8').strip()
+
+
+class CLIStartupTest(TestCase):
+
+    def test_help_lists_lazy_commands(self):
+        result = CliRunner().invoke(main, ['--help'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('dlis', result.output)
+        self.assertIn('DLIS operation commands.', result.output)
+        self.assertIn('azureml', result.output)
+
+    def test_help_does_not_import_heavy_modules(self):
+        _, imported = run_help()
+        self.assertEqual(imported, '')
+
+    def test_help_within_time_budget(self):
+        # Best of three runs to smooth out noisy CI agents
+        elapsed = min(run_help()[0] for _ in range(3))
+        self.assertLess(elapsed, HELP_TIME_BUDGET,
+            '`oml --help` took {:.2f}s, budget is {:.2f}s'.format(elapsed, HELP_TIME_BUDGET))
+
+    @mock.patch('oml.context.AppInsightsHook')
+    def test_lazy_command_dispatch(self, mock_tracker):
+        result = CliRunner().invoke(main, ['dlis', '--help'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('deploy', result.output)
+        self.assertIn('dlis', main.commands)
+
+
+@mock.patch('oml.context.AppInsightsHook')
+class CLIListTest(TestCase):
+
+    def artifacts(self, count):
+        for i in range(count):
+            yield {'version': '1.0.{}'.format(i), 'path': 'path', 'platform': 'dlis',
+                'is_compliant': 0, 'created_at': 'now'}
+
+    @mock.patch('oml.model.Model.__init__', return_value=None)
+    @mock.patch('oml.model.Model.iter_artifacts')
+    def test_list_jsonl_with_limit(self, mock_iter_artifacts, mock_model, mock_tracker):
+        fetched = []
+
+        def iter_artifacts(model_name, page_size):
+            for row in self.artifacts(10):
+                fetched.append(row)
+                yield row
+        mock_iter_artifacts.side_effect = iter_artifacts
+
+        result = CliRunner().invoke(main, ['list', 'test', '--limit', '3', '--format', 'jsonl'])
+        self.assertEqual(result.exit_code, 0)
+        rows = [json.loads(line) for line in result.output.splitlines()]
+        self.assertEqual([r['version'] for r in rows], ['1.0.0', '1.0.1', '1.0.2'])
+        self.assertEqual(len(fetched), 3)
+        mock_iter_artifacts.assert_called_once_with('test', 3)
+
+    @mock.patch('oml.model.Model.__init__', return_value=None)
+    @mock.patch('oml.model.Model.iter_artifacts')
+    def test_list_table(self, mock_iter_artifacts, mock_model, mock_tracker):
+        mock_iter_artifacts.return_value = self.artifacts(2)
+        result = CliRunner().invoke(main, ['list', 'test'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('1.0.1', result.output)
+        self.assertIn('2 published version(s) found.', result.output)
+
+
+@mock.patch('oml.context.AppInsightsHook')
+class CLIDlisTestTest(TestCase):
+
+    @mock.patch('oml.platforms.dlis.cli.DlisApi')
+    def test_bench_file_prefills_qps_and_cpu_cores(self, mock_api, mock_tracker):
+        mock_api.return_value.test.return_value = 'guid'
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            with open('bench.json', 'w') as f:
+                json.dump({'max_sustainable_qps': 123.4, 'cpu_cores': 8}, f)
+
+            result = runner.invoke(main, ['dlis', 'test', '--bench-file', 'bench.json'])
+            self.assertEqual(result.exit_code, 0)
+            kwargs = mock_api.return_value.test.call_args[1]
+            self.assertEqual((kwargs['qps'], kwargs['cpu_cores']), (123, 8))
+
+            runner.invoke(main, ['dlis', 'test', '--bench-file', 'bench.json', '--qps', '50'])
+            self.assertEqual(mock_api.return_value.test.call_args[1]['qps'], '50')
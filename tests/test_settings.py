@@ -1,9 +1,49 @@
+import os
+import shutil
+import subprocess  # nosec
+import sys
+import tempfile
 import unittest
+import yaml
+
+from unittest import mock
 
 from oml import settings
 
 
 class SettingsTest(unittest.TestCase):
 
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp_path, '.oml')
+        self.metadata_path = os.path.join(self.cache_path, 'metadata.yml')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
     def test_loading_conf_file(self):
-        self.assertIsNotNone(settings.cfg)
+        self.assertIsNotNone(settings.config.cfg)
+
+    def test_import_has_no_side_effects(self):
+        env = dict(os.environ, HOME=self.tmp_path, USERPROFILE=self.tmp_path)
+        subprocess.run([sys.executable, '-c', 'import oml.settings'], env=env, check=True)  # nosec
+        self.assertFalse(os.path.exists(self.cache_path))
+
+    def test_config_is_memoized(self):
+        config = settings.Settings()
+        with mock.patch('yaml.safe_load', wraps=yaml.safe_load) as mock_load:
+            cfg = config.cfg
+            self.assertIs(config.cfg, cfg)
+            self.assertEqual(config.api_endpoint, cfg['azure']['api']['uri'])
+            self.assertEqual(mock_load.call_count, 1)
+
+            config.reload()
+            self.assertIsNot(config.cfg, cfg)
+            self.assertEqual(mock_load.call_count, 2)
+
+    def test_user_id_is_persisted(self):
+        with mock.patch('oml.settings.APP_CACHE_DIR_PATH', self.cache_path), \
+                mock.patch('oml.settings.METADATA_FILE_PATH', self.metadata_path):
+            user_id = settings.Settings().user_id
+            self.assertTrue(os.path.exists(self.metadata_path))
+            self.assertEqual(settings.Settings().user_id, user_id)
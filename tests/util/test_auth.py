@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from datetime import datetime, timedelta
+from unittest import mock
+
+from oml.util import auth
+
+RESOURCE = 'https://resource.test'
+
+
+def make_token(access_token, expires_in=3600, resource=RESOURCE):
+    return {
+        'accessToken': access_token,
+        'expiresOn': str(datetime.now() + timedelta(seconds=expires_in)),
+        'resource': resource,
+        'userId': 'user@test',
+        '_clientId': 'client',
+        '_authority': 'https://login.test/tenant'
+    }
+
+
+class TokenBrokerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp()
+        self.token_path = os.path.join(self.tmp_path, 'accessTokens.json')
+        patchers = [
+            mock.patch('oml.util.auth.ADAL_TOKEN_FILE_PATH', self.token_path),
+            mock.patch('oml.util.auth.ADAL_TOKEN_LOCK_FILE_PATH', self.token_path + '.lock'),
+            mock.patch('oml.util.auth.ensure_app_cache_dir'),
+            mock.patch('oml.util.auth.get_user_metadata', return_value={'userId': 'user@test'}),
+            mock.patch.dict(os.environ, clear=False)
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        os.environ.pop('OML_CLI_KEY', None)
+
+        context_patcher = mock.patch('oml.util.auth.AuthenticationContext')
+        self.mock_context = context_patcher.start().return_value
+        self.addCleanup(context_patcher.stop)
+        self.mock_context.acquire_token.side_effect = lambda resource, *_: make_token('1111', resource=resource)
+
+        self.broker = auth.TokenBroker()
+        self.addCleanup(self.broker.clear)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_get_token_is_cached_per_resource(self):
+        self.assertEqual(self.broker.get_token(RESOURCE)['accessToken'], '1111')
+        self.assertEqual(self.broker.get_token(RESOURCE)['accessToken'], '1111')
+        self.broker.get_token('https://other.test')
+
+        self.assertEqual(self.mock_context.acquire_token.call_count, 2)
+        self.assertEqual(self.broker.stats, {'hits': 1, 'misses': 2, 'refreshes': 0})
+
+    def test_returned_token_is_a_copy(self):
+        self.broker.get_token(RESOURCE).update({'accessToken': 'changed'})
+        self.assertEqual(self.broker.get_token(RESOURCE)['accessToken'], '1111')
+
+    def test_expired_token_is_reacquired(self):
+        self.mock_context.acquire_token.side_effect = [make_token('1111', expires_in=-1), make_token('2222')]
+        self.broker.get_token(RESOURCE)
+        self.assertEqual(self.broker.get_token(RESOURCE)['accessToken'], '2222')
+        self.assertEqual(self.broker.stats['misses'], 2)
+
+    def test_token_is_refreshed_before_expiry(self):
+        self.mock_context.acquire_token.side_effect = [make_token('1111', expires_in=2), make_token('2222')]
+        broker = auth.TokenBroker(refresh_margin=1.9)
+        self.addCleanup(broker.clear)
+        broker.get_token(RESOURCE)
+
+        deadline = time.time() + 5
+        while broker.refreshes == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(broker.peek(RESOURCE)['accessToken'], '2222')
+        self.assertEqual(broker.get_token(RESOURCE)['accessToken'], '2222')
+        self.assertEqual(broker.stats, {'hits': 1, 'misses': 1, 'refreshes': 1})
+
+    def test_unchanged_cache_is_not_serialized(self):
+        self.broker.get_token(RESOURCE)
+        self.assertFalse(os.path.exists(self.token_path))
+
+    def test_changed_cache_is_merged_into_disk_cache(self):
+        other_token = make_token('0000', resource='https://other.test')
+        with open(self.token_path, 'w') as f:
+            f.write(json.dumps([other_token]))
+
+        def acquire_token(resource, *_):
+            token = make_token('1111', resource=resource)
+            self.broker._cache.add([token])
+            return token
+        self.mock_context.acquire_token.side_effect = acquire_token
+
+        self.broker.get_token(RESOURCE)
+        self.assertFalse(self.broker._cache.has_state_changed)
+        with open(self.token_path) as f:
+            entries = json.load(f)
+        self.assertEqual(sorted(e['accessToken'] for e in entries), ['0000', '1111'])
+
+    def test_hooks_share_one_acquisition(self):
+        from oml.hooks.api import ApiHook
+        from oml.hooks.dlis import DLISHook
+
+        with mock.patch('oml.util.auth._broker', self.broker):
+            DLISHook()
+            ApiHook()
+        self.assertEqual(self.mock_context.acquire_token.call_count, 1)
+        self.assertEqual(self.broker.stats['misses'], 1)
@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+
+from oml.exceptions import OMLException
+from oml.util import bench, wsgi
+
+
+class SlowApp:
+    """Answers in service_time seconds, one request at a time."""
+
+    def __init__(self, service_time):
+        self.service_time = service_time
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        environ['wsgi.input'].read(int(environ.get('CONTENT_LENGTH') or 0))
+        with self.lock:
+            time.sleep(self.service_time)
+        start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', '2')])
+        return [b'ok']
+
+
+class HelpersTest(unittest.TestCase):
+
+    def test_parse_ramp(self):
+        self.assertEqual(bench.parse_ramp('10:40:10'), [10, 20, 30, 40])
+        with self.assertRaises(OMLException):
+            bench.parse_ramp('10:5:1')
+        with self.assertRaises(OMLException):
+            bench.parse_ramp('fast')
+
+    def test_histogram(self):
+        counts = bench.histogram([0.5, 1, 1.5, 30, 9000])
+        self.assertEqual((counts['<=1'], counts['<=2'], counts['<=50'], counts['>5000']), (2, 1, 1, 1))
+
+    def test_encode_generic_request(self):
+        self.assertEqual(bench._encode_generic_request('hi'), b'\x0a\x02hi')
+        self.assertEqual(bench._encode_generic_request('x' * 200)[:3], b'\x0a\xc8\x01')
+
+
+class BenchTest(unittest.TestCase):
+
+    def setUp(self):
+        # About 100 QPS of capacity
+        self.httpd = wsgi.make_server(SlowApp(0.01), '127.0.0.1', 0, 'threaded', threads=16)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.endpoint = 'http://127.0.0.1:{}/'.format(self.httpd.server_port)
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def test_ramp_stops_at_saturation(self):
+        with bench.Bench(self.endpoint, timeout=5, max_in_flight=16, slo_ms=100) as load:
+            result = load.run(['a', 'b'], [20, 50, 200, 400], duration=0.5)
+
+        self.assertEqual([step['sustained'] for step in result['steps']], [True, True, False])
+        self.assertGreater(result['max_sustainable_qps'], 40)
+        self.assertLess(result['max_sustainable_qps'], 60)
+        first = result['steps'][0]
+        self.assertEqual((first['requests'], first['errors']), (10, {}))
+        self.assertEqual(sum(first['histogram_ms'].values()), 10)
+
+    def test_connection_errors(self):
+        with bench.Bench('http://127.0.0.1:1/', timeout=1) as load:
+            result = load.run(['a'], [10], duration=0.5)
+
+        self.assertEqual(result['steps'][0]['errors'], {'connection': 5})
+        self.assertEqual(result['max_sustainable_qps'], 0)
@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import responses
+
+from click.testing import CliRunner
+from unittest import mock
+
+from oml.cli import main
+from oml.util import cache
+from oml.util.http import Client
+
+API_URL = 'https://api.test/api/v1'
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp()
+        self.cache = cache.enable(path=self.tmp_path)
+        self.addCleanup(cache.disable)
+        self.client = Client(cache_scope=API_URL)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    @responses.activate
+    def test_get_is_served_within_ttl(self):
+        responses.add(responses.GET, API_URL + '/models', json=[{'id': 1}])
+
+        self.assertEqual(self.client.get(API_URL + '/models', params={'name': 'test'}).json(), [{'id': 1}])
+        self.assertEqual(self.client.get(API_URL + '/models', params={'name': 'test'}).json(), [{'id': 1}])
+        self.client.get(API_URL + '/models', params={'name': 'other'})
+
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(self.cache.counters['hits'], 1)
+        self.assertEqual(self.cache.counters['misses'], 2)
+
+    @responses.activate
+    def test_expired_get_is_revalidated_with_etag(self):
+        url = API_URL + '/deployments'
+        responses.add(responses.GET, url, json=[{'status': 'running'}], headers={'ETag': '"v1"'})
+        responses.add(responses.GET, url, status=304)
+
+        self.client.get(url)
+        res = self.client.get(url)
+
+        self.assertEqual(res.json(), [{'status': 'running'}])
+        self.assertEqual(responses.calls[1].request.headers['If-None-Match'], '"v1"')
+        self.assertEqual(self.cache.counters['revalidated'], 1)
+
+    @responses.activate
+    def test_get_without_ttl_or_etag_is_not_stored(self):
+        responses.add(responses.GET, API_URL + '/tests', json=[])
+        self.client.get(API_URL + '/tests')
+        self.client.get(API_URL + '/tests')
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    @responses.activate
+    def test_write_invalidates_scope(self):
+        responses.add(responses.GET, API_URL + '/models', json=[])
+        responses.add(responses.POST, API_URL + '/models', json={'id': 1})
+
+        self.client.get(API_URL + '/models')
+        self.client.post(API_URL + '/models', json={'name': 'test'})
+        self.client.get(API_URL + '/models')
+        self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    def test_client_without_scope_is_not_cached(self):
+        responses.add(responses.GET, API_URL + '/models', json=[])
+        Client().get(API_URL + '/models')
+        Client().get(API_URL + '/models')
+        self.assertEqual(len(responses.calls), 2)
+
+    @mock.patch.object(cache, 'EVICT_TO', 1.0)
+    def test_lru_eviction(self):
+        body = 'x' * 1000
+        response_cache = cache.ResponseCache(self.tmp_path, max_size=2500)
+        for i in range(3):
+            response_cache.put('{}/models/{}'.format(API_URL, i), 200, {}, body)
+            # Make the access order visible to the mtime based eviction
+            time.sleep(0.01)
+            response_cache.get('{}/models/0'.format(API_URL))
+            time.sleep(0.01)
+
+        self.assertIsNotNone(response_cache.get('{}/models/0'.format(API_URL)))
+        self.assertIsNone(response_cache.get('{}/models/1'.format(API_URL)))
+        self.assertIsNotNone(response_cache.get('{}/models/2'.format(API_URL)))
+        self.assertEqual(response_cache.counters['evictions'], 1)
+
+    def test_eviction_only_scans_over_the_limit(self):
+        response_cache = cache.ResponseCache(self.tmp_path, max_size=100000)
+        with mock.patch.object(response_cache, '_entries', wraps=response_cache._entries) as entries:
+            for i in range(200):
+                response_cache.put('{}/models/{}'.format(API_URL, i), 200, {}, 'x' * 1000)
+        # Counted once, then scanned only when the size went over the limit,
+        # which eviction leaves about ten entries below
+        self.assertLess(entries.call_count, 20)
+        self.assertLessEqual(response_cache.stats()['size'], 100000)
+        self.assertGreater(response_cache.counters['evictions'], 0)
+
+    def test_invalidate_removes_only_its_scope(self):
+        response_cache = cache.ResponseCache(self.tmp_path)
+        response_cache.put(API_URL + '/models', 200, {}, '[]', scope=API_URL)
+        response_cache.put('https://other.test/jobs', 200, {}, '[]', scope='https://other.test')
+
+        with mock.patch.object(response_cache, '_entries') as entries:
+            response_cache.invalidate(API_URL)
+        entries.assert_not_called()
+        self.assertIsNone(response_cache.get(API_URL + '/models', scope=API_URL))
+        self.assertIsNotNone(response_cache.get('https://other.test/jobs', scope='https://other.test'))
+
+    def test_get_ttl(self):
+        self.assertEqual(cache.get_ttl(API_URL + '/models?name=test'), cache.TTLS['models'])
+        self.assertEqual(cache.get_ttl(API_URL + '/models/1/artifacts'), cache.TTLS['artifacts'])
+        self.assertEqual(cache.get_ttl(API_URL + '/unknown'), 0)
+
+    @mock.patch('oml.context.AppInsightsHook')
+    def test_cache_commands(self, mock_tracker):
+        self.cache.count('hits')
+        self.cache.count('misses')
+        self.cache.save_stats()
+        self.cache.put(API_URL + '/models', 200, {}, '[]')
+
+        with mock.patch('oml.util.cache.HTTP_CACHE_DIR_PATH', self.tmp_path):
+            result = CliRunner().invoke(main, ['--no-cache', 'cache', 'stats'])
+            self.assertEqual(result.exit_code, 0)
+            self.assertIn('Entries:     1', result.output)
+            self.assertIn('Hit rate:    50.0%', result.output)
+
+            result = CliRunner().invoke(main, ['--no-cache', 'cache', 'clear'])
+            self.assertEqual(result.exit_code, 0)
+            self.assertFalse(os.path.exists(self.tmp_path))
+        os.makedirs(self.tmp_path)
@@ -0,0 +1,137 @@
+import gzip
+import json
+import threading
+import time
+import unittest
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from unittest import mock
+
+from requests.exceptions import RequestException
+
+from oml.util.http import Client, create_session
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.connections = 0
+        self.requests = []
+        # Queue of (status, headers) to answer with before falling back to 200
+        self.responses = []
+        self.delay = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_port)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+    def _respond(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        self.server.requests.append((self.command, dict(self.headers), body))
+        if self.server.delay is not None:
+            self.server.delay.wait(2)
+
+        status, headers = self.server.responses.pop(0) if self.server.responses else (200, {})
+        payload = json.dumps({'ok': status == 200}).encode('utf-8')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def use_session(self, **kwargs):
+        kwargs.setdefault('retries', 3)
+        session = create_session(**kwargs)
+        patcher = mock.patch('oml.util.http._session', session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(session.close)
+        return session
+
+    def test_clients_share_connections(self):
+        self.use_session()
+        clients = [Client(headers={'X-Hook': 'api'}), Client(headers={'X-Hook': 'dlis'})]
+        for i in range(10):
+            res = clients[i % 2].get(self.server.url)
+            self.assertEqual(res.status_code, 200)
+
+        self.assertEqual(len(self.server.requests), 10)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.requests[1][1]['X-Hook'], 'dlis')
+
+    def test_retry_honours_retry_after(self):
+        self.use_session()
+        self.server.responses = [(429, {'Retry-After': '0'}), (503, {'Retry-After': '0'})]
+        res = Client().get(self.server.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_post_is_not_retried(self):
+        self.use_session()
+        self.server.responses = [(503, {'Retry-After': '0'})]
+        res = Client().post(self.server.url, json={})
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_default_timeout(self):
+        self.use_session(retries=0, timeout=0.2)
+        self.server.delay = threading.Event()
+        self.addCleanup(self.server.delay.set)
+        start = time.perf_counter()
+        with self.assertRaises(RequestException):
+            Client().get(self.server.url)
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_gzip_request_body(self):
+        self.use_session(gzip_requests=True)
+        data = {'payload': 'x' * 4096}
+        Client().post(self.server.url, json=data)
+
+        _, headers, body = self.server.requests[0]
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(body.decode('utf-8')), data)
+
+    def test_auth_is_applied_per_client(self):
+        self.use_session()
+
+        def bearer(request):
+            request.headers['Authorization'] = 'Bearer 1111'
+            return request
+        Client(auth=bearer).get(self.server.url)
+        Client().get(self.server.url)
+
+        self.assertEqual(self.server.requests[0][1]['Authorization'], 'Bearer 1111')
+        self.assertNotIn('Authorization', self.server.requests[1][1])
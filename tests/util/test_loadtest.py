@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from oml.util import loadtest, wsgi
+
+
+class FlakyApp:
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        body = environ['wsgi.input'].read(int(environ.get('CONTENT_LENGTH') or 0)).decode('utf-8')
+        with self.lock:
+            self.calls[body] = self.calls.get(body, 0) + 1
+            calls = self.calls[body]
+        if body == 'flaky' and calls == 1:
+            status, data = '503 Service Unavailable', b''
+        elif body == 'down':
+            status, data = '503 Service Unavailable', b''
+        else:
+            status, data = '200 OK', body.upper().encode('utf-8')
+        start_response(status, [('Content-Type', 'text/plain'), ('Content-Length', str(len(data)))])
+        return [data]
+
+
+class LoadTestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = FlakyApp()
+        self.httpd = wsgi.make_server(self.app, '127.0.0.1', 0, 'threaded', threads=8)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.endpoint = 'http://127.0.0.1:{}/'.format(self.httpd.server_port)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        shutil.rmtree(self.tmpdir)
+
+    def write_cases(self, content):
+        path = os.path.join(self.tmpdir, 'cases.tsv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_read_cases(self):
+        path = self.write_cases('a\tA\n\nb\n')
+
+        self.assertEqual(loadtest.read_cases(path), [loadtest.Case(1, 'a', 'A'), loadtest.Case(3, 'b', None)])
+
+    def test_reports_failures_in_line_order(self):
+        lines = ['q{}\tQ{}'.format(i, i) for i in range(40)]
+        lines[7] = 'q7\twrong'
+        lines[31] = 'down\tDOWN'
+        lines.append('flaky\tFLAKY')
+        cases = loadtest.read_cases(self.write_cases('\n'.join(lines)))
+
+        with loadtest.LoadTest(self.endpoint, concurrency=8, retries=1) as load_test:
+            report = load_test.run(cases)
+
+        self.assertEqual((report.total, report.passed), (41, 39))
+        self.assertEqual([failure.line for failure in report.failures], [8, 32])
+        self.assertEqual(report.failures[0].error, 'Expected=wrong Actual=Q7')
+        self.assertEqual(report.failures[1].error, 'Status=503')
+        self.assertEqual(self.app.calls['flaky'], 2)
+        self.assertEqual(report.to_dict()['concurrency'], 8)
+
+    def test_connection_errors_are_failures(self):
+        with loadtest.LoadTest('http://127.0.0.1:1/', retries=0) as load_test:
+            report = load_test.run([loadtest.Case(1, 'a', 'A')])
+
+        self.assertFalse(report.ok)
+        self.assertIn('ConnectionError', report.failures[0].error)
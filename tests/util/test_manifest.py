@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from unittest import mock
+
+from oml.exceptions import OMLException
+from oml.util import manifest
+
+
+class CreateManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_path)
+        self.root = os.path.join(self.tmp_path, 'package')
+        self.cache_path = os.path.join(self.tmp_path, 'cache')
+        self.files = {'a.txt': b'a', os.path.join('lib', 'b.bin'): b'\x00' * 5000, os.path.join('lib', 'empty'): b''}
+        for name, content in self.files.items():
+            self.write(name, content)
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def create(self):
+        manifest.create_manifest(self.root, workers=2, cache_dir_path=self.cache_path)
+        with open(os.path.join(self.root, 'SecureManifest.json')) as f:
+            return f.read()
+
+    def test_manifest_lists_every_file(self):
+        cwd = os.getcwd()
+        text = self.create()
+        self.assertEqual(os.getcwd(), cwd)
+
+        files = json.loads(text)['files']
+        self.assertEqual(text, json.dumps({'files': files}, indent=4, ensure_ascii=True))
+        self.assertEqual(sorted(f['name'] for f in files), sorted(self.files))
+        for f in files:
+            content = self.files[f['name']]
+            self.assertEqual(f['length'], len(content))
+            self.assertEqual(f['value'], hashlib.sha512(content).hexdigest().upper())
+            self.assertEqual(f['algorithm'], 'SHA512')
+
+    def test_rerun_only_hashes_changed_files(self):
+        first = self.create()
+        with mock.patch.object(manifest, 'generate_file_sha512', wraps=manifest.generate_file_sha512) as sha512:
+            self.assertEqual(self.create(), first)
+            self.assertEqual(sha512.call_count, 0)
+
+            self.write('a.txt', b'changed')
+            files = {f['name']: f for f in json.loads(self.create())['files']}
+            self.assertEqual(sha512.call_count, 1)
+            self.assertEqual(files['a.txt']['value'], hashlib.sha512(b'changed').hexdigest().upper())
+        self.assertEqual(len(files), len(self.files))
+
+    def test_empty_root(self):
+        shutil.rmtree(self.root)
+        os.makedirs(self.root)
+        self.assertEqual(json.loads(self.create()), {'files': []})
+
+    def test_signature_file_is_rejected(self):
+        self.write(os.path.join('lib', 'signature'), b'')
+        with self.assertRaises(OMLException):
+            self.create()
+        self.assertEqual(sorted(os.listdir(self.root)), ['a.txt', 'lib'])
+
+    def test_large_files_are_memory_mapped(self):
+        with mock.patch.object(manifest, 'MMAP_MIN_SIZE', 4096):
+            files = {f['name']: f for f in json.loads(self.create())['files']}
+        self.assertEqual(files[os.path.join('lib', 'b.bin')]['value'],
+                         hashlib.sha512(self.files[os.path.join('lib', 'b.bin')]).hexdigest().upper())
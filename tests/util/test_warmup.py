@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import yaml
+
+from oml.settings import MODEL_META_FILENAME
+from oml.util import warmup
+from unittest import mock
+
+
+class WarmupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.base_path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.base_path, 'data'))
+        with open(os.path.join(self.base_path, 'data', 'input.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join('q{}'.format(i) for i in range(10)))
+
+    def tearDown(self):
+        shutil.rmtree(self.base_path)
+
+    def write_metadata(self, metadata):
+        with open(os.path.join(self.base_path, MODEL_META_FILENAME), 'w') as f:
+            yaml.safe_dump(metadata, f)
+
+    def test_read_samples(self):
+        self.assertEqual(len(warmup.read_samples(self.base_path, {})), 10)
+        self.assertEqual(warmup.read_samples(self.base_path, {'warmup_samples': 3}), ['q0', 'q1', 'q2'])
+        self.assertEqual(warmup.read_samples(self.base_path, {'warmup_file': ''}), [])
+
+    def test_warm_up(self):
+        latencies, failed = warmup.warm_up(lambda data: data[5], ['short', 'long input'], concurrency=2)
+        self.assertEqual((len(latencies), failed), (2, 1))
+
+    @mock.patch('builtins.print')
+    def test_validate_within_limits(self, mock_print):
+        self.write_metadata({'name': 'model'})
+        calls = []
+
+        self.assertTrue(warmup.validate(self.base_path, calls.append, 1.5))
+        self.assertEqual(len(calls), 10)
+        self.assertIn('Model loaded in 1.50s.', [args[0][0] for args in mock_print.call_args_list])
+
+    @mock.patch('builtins.print')
+    def test_validate_over_limits(self, mock_print):
+        self.write_metadata({'commands': {'dlis': {'test': {'waiting-model-ready-in-min': 1}}}})
+
+        self.assertFalse(warmup.validate(self.base_path, lambda data: data, 120))
+        warnings = [args[0][0] for args in mock_print.call_args_list if args[0][0].startswith('[Warning]')]
+        self.assertEqual(len(warnings), 1)
+        self.assertIn('WaitingModelReadyInMin of 1 min', warnings[0])
+
+    @mock.patch('builtins.print')
+    def test_validate_when_every_request_fails(self, mock_print):
+        self.write_metadata({'name': 'model'})
+
+        def predict(data):
+            raise ValueError(data)
+
+        self.assertFalse(warmup.validate(self.base_path, predict, 1))
+        warnings = [args[0][0] for args in mock_print.call_args_list if args[0][0].startswith('[Warning]')]
+        self.assertIn('Every warm-up request failed', warnings[0])
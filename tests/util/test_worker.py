@@ -0,0 +1,112 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from oml.exceptions import OMLException
+from oml.util.worker import WorkerPool
+
+# Stands in for the generated exe's serve-stdio loop
+STUB_WORKER = '''
+import os
+import struct
+import sys
+import time
+
+stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+if sys.argv[1:2] == ['serve-stdio']:
+    # As the generated exe does before it constructs the model
+    sys.stdout = sys.stderr
+if 'noisy-load' in sys.argv:
+    print('Loading model...')
+    sys.stdout.flush()
+while True:
+    header = stdin.read(4)
+    if len(header) < 4:
+        break
+    data = stdin.read(struct.unpack('>I', header)[0]).decode('utf-8')
+    if data == 'crash':
+        sys.exit(1)
+    if data.startswith('sleep'):
+        time.sleep(float(data.split()[1]))
+    status, result = (1, 'bad input') if data == 'fail' else (0, '{}:{}'.format(os.getpid(), data.upper()))
+    payload = result.encode('utf-8')
+    stdout.write(struct.pack('>BI', status, len(payload)) + payload)
+    stdout.flush()
+'''
+
+
+class WorkerPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp()
+        script_path = os.path.join(self.tmp_path, 'worker.py')
+        with open(script_path, 'w') as f:
+            f.write(STUB_WORKER)
+        self.cmd = [sys.executable, script_path]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_predict_reuses_worker(self):
+        with WorkerPool(self.cmd) as pool:
+            first = pool.predict('hello')
+            second = pool.predict('wörld')
+
+        pid, result = first.split(':')
+        self.assertEqual(result, 'HELLO')
+        self.assertEqual(second, '{}:WÖRLD'.format(pid))
+
+    def test_model_output_while_loading_stays_out_of_responses(self):
+        with WorkerPool(self.cmd + ['serve-stdio', 'noisy-load']) as pool:
+            self.assertTrue(pool.predict('hello').endswith(':HELLO'))
+
+        # Without the redirect the output lands where the first response is read
+        with WorkerPool(self.cmd + ['noisy-load']) as pool:
+            with self.assertRaisesRegex(OMLException, 'wrote to stdout'):
+                pool.predict('hello')
+
+    def test_large_input(self):
+        data = 'x' * (1024 * 1024)
+        with WorkerPool(self.cmd) as pool:
+            self.assertEqual(pool.predict(data).split(':')[1], data.upper())
+
+    def test_prediction_error(self):
+        with WorkerPool(self.cmd) as pool:
+            with self.assertRaisesRegex(OMLException, 'bad input'):
+                pool.predict('fail')
+            self.assertTrue(pool.predict('ok').endswith(':OK'))
+
+    def test_crashed_worker_is_restarted(self):
+        with WorkerPool(self.cmd) as pool:
+            pid = pool.predict('a').split(':')[0]
+            with self.assertRaisesRegex(OMLException, 'exited unexpectedly'):
+                pool.predict('crash')
+            self.assertNotEqual(pool.predict('b').split(':')[0], pid)
+
+    def test_concurrent_requests_use_all_workers(self):
+        results = []
+        with WorkerPool(self.cmd, size=3) as pool:
+            threads = [threading.Thread(target=lambda: results.append(pool.predict('sleep 0.3')))
+                       for _ in range(3)]
+            start = time.time()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.time() - start
+
+        self.assertEqual(len({result.split(':')[0] for result in results}), 3)
+        self.assertLess(elapsed, 0.8)
+
+    def test_timeout_when_all_workers_busy(self):
+        with WorkerPool(self.cmd, size=1, timeout=0.1) as pool:
+            thread = threading.Thread(target=pool.predict, args=('sleep 0.5',))
+            thread.start()
+            time.sleep(0.1)
+            with self.assertRaisesRegex(OMLException, 'No model worker was free'):
+                pool.predict('late')
+            thread.join()
@@ -0,0 +1,127 @@
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from oml.exceptions import OMLException
+from oml.util import wsgi
+
+
+def app(environ, start_response):
+    body = environ['wsgi.input'].read(int(environ.get('CONTENT_LENGTH') or 0))
+    if environ['PATH_INFO'] == '/slow':
+        time.sleep(0.3)
+    data = '{}:{}'.format(os.getpid(), body.decode('utf-8')).encode('utf-8')
+    start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', str(len(data)))])
+    return [data]
+
+
+PREFORK_SCRIPT = '''
+import sys
+from tests.util.test_wsgi import app
+from oml.util import wsgi
+wsgi.serve(app, '127.0.0.1', int(sys.argv[1]), 'prefork', workers=2, threads=1)
+'''
+
+
+def post_all(port, path, count):
+    results = []
+
+    def post():
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        conn.request('POST', path, body='x')
+        results.append(conn.getresponse().read().decode('utf-8'))
+        conn.close()
+
+    threads = [threading.Thread(target=post) for _ in range(count)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.time() - start
+
+
+class ThreadedServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.httpd = wsgi.make_server(app, '127.0.0.1', 0, 'threaded', threads=3)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.port = self.httpd.server_port
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def test_keep_alive(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port)
+        conn.request('POST', '/', body='first')
+        first = conn.getresponse()
+        self.assertEqual(first.version, 11)
+        self.assertTrue(first.read().decode('utf-8').endswith(':first'))
+        sock = conn.sock
+
+        # An unread body must not leak into the next request
+        conn.request('GET', '/', body='ignored', headers={'Content-Length': '7'})
+        conn.getresponse().read()
+        conn.request('POST', '/', body='second')
+        self.assertTrue(conn.getresponse().read().decode('utf-8').endswith(':second'))
+        self.assertIs(conn.sock, sock)
+        conn.close()
+
+    def test_concurrent_requests(self):
+        results, elapsed = post_all(self.port, '/slow', 3)
+        self.assertEqual(len(results), 3)
+        self.assertLess(elapsed, 0.8)
+
+    def test_connection_close(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port)
+        conn.request('POST', '/', body='x', headers={'Connection': 'close'})
+        conn.getresponse().read()
+        self.assertIsNone(conn.sock)
+
+
+class ServeTest(unittest.TestCase):
+
+    def test_workers_require_prefork(self):
+        with self.assertRaisesRegex(OMLException, 'requires the prefork server'):
+            wsgi.serve(app, '127.0.0.1', 0, 'threaded', workers=2)
+
+    def test_unknown_server(self):
+        with self.assertRaisesRegex(OMLException, 'Unknown server'):
+            wsgi.make_server(app, '127.0.0.1', 0, 'gunicorn')
+
+    def test_concurrency(self):
+        self.assertEqual(wsgi.concurrency('wsgiref', 4), 1)
+        self.assertEqual(wsgi.concurrency('threaded', 4), 4)
+        # Every forked process handles its own --threads requests
+        self.assertEqual(wsgi.concurrency('prefork', 4), 4)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_prefork_workers(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+        proc = subprocess.Popen([sys.executable, '-c', PREFORK_SCRIPT, str(port)], cwd=root)
+        try:
+            for _ in range(50):
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            results, elapsed = post_all(port, '/slow', 2)
+        finally:
+            proc.terminate()
+            proc.wait(5)
+
+        pids = {result.split(':')[0] for result in results}
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(str(proc.pid), pids)
@@ -2,7 +2,12 @@ import os
 import shutil
 import tempfile
 import unittest
+import zipfile
 
+from unittest import mock
+
+from oml.exceptions import OMLException
+from oml.util import zip as zip_util
 from oml.util.os import touch
 from oml.util.zip import archive, extract
 
@@ -35,3 +40,95 @@ class ZipTest(unittest.TestCase):
         dirpath = os.path.join(self.tmp_path, 'new')
         extract(zipf, dirpath)
         self.assertTrue(os.path.exists(dirpath))
+
+
+class ParallelArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_path)
+        self.src = os.path.join(self.tmp_path, 'env')
+        self.files = {
+            'lib/python.py': b'import os\n' * 1000,
+            'lib/native.so': b'\x7fELF' * 1000,
+            'lib/random.bin': os.urandom(5000),
+            'lib/big.txt': b'0123456789' * 50000,
+            'empty.txt': b'',
+            'caf\u00e9.txt': b'cafe',
+        }
+        for name, content in self.files.items():
+            path = os.path.join(self.src, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(content)
+        os.makedirs(os.path.join(self.src, 'pkgs', 'empty'))
+
+    def archive(self, **kwargs):
+        cwd = os.getcwd()
+        zip_path = archive(self.src, self.tmp_path, 'env', workers=3, **kwargs)
+        self.assertEqual(os.getcwd(), cwd)
+        return zipfile.ZipFile(zip_path)
+
+    def assertContent(self, zf):
+        self.assertIsNone(zf.testzip())
+        for name, content in self.files.items():
+            self.assertEqual(zf.read(name), content)
+        self.assertIn('pkgs/empty/', zf.namelist())
+
+    def test_compressed_and_stored_files(self):
+        with self.archive(level=6) as zf:
+            self.assertContent(zf)
+            methods = {info.filename: info.compress_type for info in zf.infolist()}
+        self.assertEqual(methods['lib/python.py'], zipfile.ZIP_DEFLATED)
+        self.assertEqual(methods['lib/native.so'], zipfile.ZIP_STORED)
+        self.assertEqual(methods['lib/random.bin'], zipfile.ZIP_STORED)
+
+        with self.archive(level=0) as zf:
+            self.assertContent(zf)
+            self.assertEqual({info.compress_type for info in zf.infolist()}, {zipfile.ZIP_STORED})
+
+    def test_large_files_are_streamed(self):
+        with mock.patch.object(zip_util, 'CHUNK_SIZE', 4096), mock.patch.object(zip_util, 'SPOOL_SIZE', 8192):
+            with self.archive(level=1) as zf:
+                self.assertContent(zf)
+            with self.archive(level=0) as zf:
+                self.assertContent(zf)
+
+    def test_pending_files_are_bounded_by_size(self):
+        events = []
+        walk, write_member = zip_util._walk, zip_util._write_member
+
+        def record_walk(src):
+            for path, name, st in walk(src):
+                events.append(('walk', name))
+                yield path, name, st
+
+        def record_write(out, path, name, st, future):
+            events.append(('write', name))
+            return write_member(out, path, name, st, future)
+
+        with mock.patch.object(zip_util, 'PENDING_SIZE', 100000), \
+                mock.patch.object(zip_util, '_walk', side_effect=record_walk), \
+                mock.patch.object(zip_util, '_write_member', side_effect=record_write):
+            with self.archive(level=6) as zf:
+                self.assertContent(zf)
+        # big.txt alone is over the limit, so it is written before the next file is walked
+        walked = events.index(('walk', 'lib/big.txt'))
+        next_walk = next((i for i, event in enumerate(events[walked + 1:], walked + 1) if event[0] == 'walk'),
+                         len(events))
+        self.assertIn(('write', 'lib/big.txt'), events[walked:next_walk])
+
+    def test_invalid_level(self):
+        for level in (10, -1, 'fast'):
+            with self.assertRaises(OMLException):
+                self.archive(level=level)
+        with mock.patch.dict(os.environ, {'OML_ZIP_LEVEL': 'max'}), self.assertRaises(OMLException):
+            self.archive()
+        with mock.patch.dict(os.environ, {'OML_ZIP_LEVEL': '0'}), self.archive() as zf:
+            self.assertEqual({info.compress_type for info in zf.infolist()}, {zipfile.ZIP_STORED})
+
+    def test_zip64(self):
+        with mock.patch.object(zip_util, 'ZIP64_LIMIT', 1000), mock.patch.object(zip_util, 'ZIP64_COUNT_LIMIT', 3):
+            with self.archive(level=6) as zf:
+                self.assertContent(zf)
+                self.assertEqual(zf.getinfo('lib/big.txt').file_size, 500000)